@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# Filename: bench_transform.py
+"""
+(c) 2026 Rafael Ulhoa
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+The above copyright notice and this permission notice (including the next paragraph) shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+https://opensource.org/licenses/GPL-3.0
+# SPDX-License-Identifier: GPL-3.0-or-later
+For information on SDPX, https://spdx.org/licenses/GPL-3.0-or-later.html
+
+w3rkstatt Python micro benchmarks
+Time the per alert transformations with fixed fixtures and compare them
+against the saved baseline
+
+Fixtures:  templates/bench.fixtures.json
+Baseline:  templates/bench.baseline.json
+
+Usage:
+    python bench_transform.py
+    python bench_transform.py :save
+    python bench_transform.py :case transformCtmJobLog :repeat 10
+
+Exit code 1 if a case is slower than baseline * (1 + tolerance).
+Host name lookups are replaced by the fixture values while timing.
+
+Change Log
+Date (YMD)    Name                  What
+--------      ------------------    ------------------------
+20261019      Rafael Ulhoa          Initial Development
+20261019      Rafael Ulhoa          Agent memberships of a 5000 agent estate
+20261019      Rafael Ulhoa          Host lookups from the fixtures, socket lookups stubbed too
+
+"""
+
+import os
+import sys
+import json
+import time
+import timeit
+import logging
+import argparse
+import socket
+import platform
+import pandas as pd
+
+# handle dev environment vs. production
+try:
+    import w3rkstatt as w3rkstatt
+    import core_ctm as ctm
+    import ctm_alerts as alerts
+    import disco_ctm as disco
+except:
+    # fix import issues for modules
+    sys.path.append(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    from src import w3rkstatt as w3rkstatt
+    from src import core_ctm as ctm
+    from src import ctm_alerts as alerts
+    from src import disco_ctm as disco
+
+# Get configuration from bmcs_core.json
+jCfgData = w3rkstatt.getProjectConfig()
+
+# Fixtures and baseline are part of the repository
+benchFolder = os.path.join(w3rkstatt.getCurrentFolder(), "templates")
+fixtureFile = os.path.join(benchFolder, "bench.fixtures.json")
+baselineFile = os.path.join(benchFolder, "bench.baseline.json")
+
+# Assign module defaults
+_modVer = "20.26.10.00"
+_localDebug = False
+logger = logging.getLogger(__name__)
+logFile = w3rkstatt.getJsonValue(path="$.DEFAULT.log_file", data=jCfgData)
+epoch = time.time()
+parser = argparse.ArgumentParser(prefix_chars=':')
+parser.add_argument(':save',
+                    action='store_true',
+                    help='store the results as new baseline')
+parser.add_argument(':case', action='append', help='run named cases only')
+parser.add_argument(':repeat', type=int, default=5, help='timing rounds')
+parser.add_argument(':tolerance',
+                    type=float,
+                    default=0.25,
+                    help='allowed slowdown vs. baseline, 0.25 = 25%%')
+
+
+class StubDns(object):
+    '''
+    Replace host name lookups with the fixture values, DNS latency is not
+    part of the transformations. The socket functions are replaced as
+    well, so lookups outside of w3rkstatt never reach the resolver.
+    '''
+
+    def __init__(self, fixture):
+        '''
+        :param dict fixture: ip and domain returned for every host name
+        '''
+        self.ip = fixture["ip"]
+        self.domain = fixture["domain"]
+
+    def __enter__(self):
+        ip = self.ip
+        domain = self.domain
+        self.saved = (w3rkstatt.getHostIP, w3rkstatt.getHostFqdn,
+                      w3rkstatt.getHostDomain, w3rkstatt.getHostByIP,
+                      socket.gethostbyname, socket.getfqdn,
+                      socket.gethostbyaddr)
+        w3rkstatt.getHostIP = lambda hostname: ip
+        w3rkstatt.getHostFqdn = lambda hostname: str(hostname)
+        w3rkstatt.getHostDomain = lambda hostname: domain
+        w3rkstatt.getHostByIP = lambda hostIP: str(hostIP)
+        socket.gethostbyname = lambda hostname: ip
+        socket.getfqdn = lambda name="": str(name)
+        socket.gethostbyaddr = lambda address: (str(address), [], [ip])
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        (w3rkstatt.getHostIP, w3rkstatt.getHostFqdn, w3rkstatt.getHostDomain,
+         w3rkstatt.getHostByIP, socket.gethostbyname, socket.getfqdn,
+         socket.gethostbyaddr) = self.saved
+        return False
+
+
+class BenchResponse(object):
+    '''
+    Response body for ApiClient.deserialize
+    '''
+
+    def __init__(self, data):
+        self.data = data
+
+
+def getAgentModels(fixture):
+    '''
+    Build an AAPI agent list model with the Control-M SDK
+
+    :param dict fixture: agent template and count
+    :return: AAPI model
+    '''
+    agents = []
+    for n in range(fixture["count"]):
+        agent = dict(fixture["agent"])
+        agent["nodeid"] = agent["nodeid"].replace("{n}", str(n))
+        agents.append(agent)
+    response = BenchResponse(json.dumps({"agents": agents}))
+    return ctm.ctm.api_client.ApiClient().deserialize(response,
+                                                      fixture["model"])
+
+
+def legacyModelParse(results):
+    '''
+    Former str(model) parsing of getCtmAgents, reference for ctmModel2Dict
+    '''
+    results = str(results).replace("\n", '')
+    results = str(results).replace("'", '"')
+    results = str(results).replace("None", '"None"')
+    results = str(results).replace('"                                 "', '')
+    return json.loads(results)
+
+
+def getAgentMemberships(fixture):
+    '''
+    Build hostgroup and remote host lists of a synthetic Control-M estate,
+    same records as disco_ctm.getHostGroups and getCtmRemoteHosts
+
+    :param dict fixture: agent name template, counts of agents and lists
+    :return: hostgroups, remote hosts and agent names
+    :rtype: tuple
+    '''
+    server = fixture["server"]
+    agents = [
+        fixture["agent"].replace("{n}", str(n))
+        for n in range(fixture["count"])
+    ]
+    groups = []
+    remote = []
+    for n, agent in enumerate(agents):
+        for g in range(fixture["groups_per_agent"]):
+            group = (n + g * 7) % fixture["hostgroups"]
+            groups.append({
+                "id": f"G{group:04d}A{n:04d}",
+                "server": server,
+                "group": f"hostgroup{group}",
+                "agent": agent
+            })
+        host = n % fixture["remote_hosts"]
+        remote.append({
+            "id": f"R{host:04d}A{n:04d}",
+            "server": server,
+            "host": f"remote{host}.local",
+            "agent": agent
+        })
+    return {"groups": groups}, {"remote": remote}, agents
+
+
+def indexAgentMemberships(hostGroups, remoteHosts, agents):
+    '''
+    Hostgroups and remote hosts of all agents of a server, as in discoCtm
+    '''
+    agentGroups = disco.getAgentHostGroupsIndex(ctmHostGroups=hostGroups)
+    agentHosts = disco.getAgentRemoteHostsIndex(ctmRemoteHosts=remoteHosts)
+    return [(agentGroups.get(agent), agentHosts.get(agent))
+            for agent in agents]
+
+
+def legacyAgentMemberships(hostGroups, remoteHosts, agent):
+    '''
+    Former pandas groupby of discoCtm for one agent, reference for
+    indexAgentMemberships, the estate costs count times this
+    '''
+    df = pd.json_normalize(hostGroups, record_path=['groups'])
+    df = df.loc[df['agent'] == agent]
+    groups = df.groupby('agent')['group'].apply(list).reset_index(
+        name='groups').to_json(orient='records')
+    df = pd.json_normalize(remoteHosts, record_path=['remote'])
+    df = df.loc[df['agent'] == agent]
+    hosts = df.groupby('agent')['host'].apply(list).reset_index(
+        name='hosts').to_json(orient='records')
+    return json.loads(groups), json.loads(hosts)
+
+
+def getBenchCases(fixtures):
+    '''
+    Build the benchmark cases, inputs are copied per call as some
+    functions update them in place
+
+    :param dict fixtures: content of bench.fixtures.json
+    :return: case name and function
+    :rtype: list
+    '''
+    fAlert = fixtures["ctmAlert2Dict"]
+    fCtmAlert = fixtures["trasnformtCtmAlert"]
+    fJobLog = fixtures["transformCtmJobLog"]
+    fJobLogMini = fixtures["transformCtmJobLogMini"]
+    fJobOutput = fixtures["transformCtmJobOutput"]
+    fParams = fixtures["simplifyCtmJson"]
+    fBhom = fixtures["transformCtmBHOM"]
+    dBhom = json.loads(fBhom["data"])
+    fTranslate = fixtures["dTranslate4Json"]
+    fJsonValue = fixtures["getJsonValue"]
+    mAgents = getAgentModels(fixtures["ctmModel2Dict"])
+    gEstate, rEstate, aEstate = getAgentMemberships(
+        fixtures["discoAgentMemberships"])
+
+    cases = [
+        ("ctmAlert2Dict", lambda: alerts.ctmAlert2Dict(
+            list=list(fAlert["argv"]), start=0, end=len(fAlert["argv"]))),
+        ("trasnformtCtmAlert.job",
+         lambda: ctm.trasnformtCtmAlert(data=dict(fCtmAlert["job"]))),
+        ("trasnformtCtmAlert.agent",
+         lambda: ctm.trasnformtCtmAlert(data=dict(fCtmAlert["agent"]))),
+        ("transformCtmJobLog",
+         lambda: ctm.transformCtmJobLog(data=fJobLog["data"])),
+        ("transformCtmJobLogMini", lambda: ctm.transformCtmJobLogMini(
+            data=fJobLogMini["data"], runCounter=fJobLogMini["run_counter"])),
+        ("transformCtmJobOutput",
+         lambda: ctm.transformCtmJobOutput(data=fJobOutput["data"])),
+        ("simplifyCtmJson",
+         lambda: ctm.simplifyCtmJson(data=list(fParams["data"]))),
+        ("transformCtmBHOM", lambda: ctm.transformCtmBHOM(
+            data=fBhom["data"], category=fBhom["category"])),
+        ("transformCtmBHOM.document", lambda: ctm.transformCtmBHOM(
+            data=dBhom, category=fBhom["category"])),
+        ("dTranslate4Json",
+         lambda: w3rkstatt.dTranslate4Json(data=fTranslate["data"])),
+        ("getJsonValue", lambda: w3rkstatt.getJsonValue(
+            path=fJsonValue["path"], data=fJsonValue["data"])),
+        ("getJsonValue.filter", lambda: w3rkstatt.getJsonValue(
+            path=fJsonValue["filter"], data=jCfgData)),
+        ("ctmModel2Dict.agents", lambda: ctm.ctmModel2Dict(mAgents)),
+        ("legacyModelParse.agents", lambda: legacyModelParse(mAgents)),
+        ("indexAgentMemberships.estate",
+         lambda: indexAgentMemberships(gEstate, rEstate, aEstate)),
+        ("legacyAgentMemberships.agent",
+         lambda: legacyAgentMemberships(gEstate, rEstate, aEstate[-1])),
+    ]
+    return cases
+
+
+def runBenchCase(func, repeat):
+    '''
+    Time a case, best of repeat rounds
+
+    :param func func: case function
+    :param int repeat: timing rounds
+    :return: microseconds per call
+    :rtype: float
+    '''
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1000000
+
+
+def compareBaseline(results, baseline, tolerance):
+    '''
+    Compare results with the baseline
+
+    :param dict results: case name and microseconds per call
+    :param dict baseline: content of bench.baseline.json
+    :param float tolerance: allowed slowdown, 0.25 = 25%
+    :return: report lines and names of regressed cases
+    :rtype: tuple
+    '''
+    report = []
+    regressions = []
+    previous = baseline.get("results", {})
+    host = baseline.get("host")
+    if host is not None and host != w3rkstatt.sHostname:
+        report.append(
+            f"Baseline host: {host}, current host: {w3rkstatt.sHostname}, "
+            "save a baseline on this host for reliable ratios")
+    for name, value in results.items():
+        base = previous.get(name)
+        if base is None or base <= 0:
+            report.append(f"{name:<28} {value:>12.1f} us   (no baseline)")
+            continue
+        ratio = value / base
+        status = "ok"
+        if ratio > 1 + tolerance:
+            status = "REGRESSION"
+            regressions.append(name)
+        report.append(
+            f"{name:<28} {value:>12.1f} us {base:>12.1f} us {ratio:>6.2f}x  {status}"
+        )
+    return report, regressions
+
+
+if __name__ == "__main__":
+    logging.basicConfig(filename=logFile,
+                        filemode='a',
+                        level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s # %(message)s',
+                        datefmt='%d-%b-%y %H:%M:%S')
+    args = parser.parse_args()
+    logger.info('Bench: Start micro benchmarks')
+    logger.info('Version: %s ', _modVer)
+
+    jFixtures = w3rkstatt.getFileJson(fixtureFile)
+    jBaseline = {}
+    if w3rkstatt.getFileStatus(baselineFile):
+        jBaseline = w3rkstatt.getFileJson(baselineFile)
+
+    benchResults = {}
+    with StubDns(fixture=jFixtures["dns"]):
+        for name, func in getBenchCases(fixtures=jFixtures):
+            if args.case and name not in args.case:
+                continue
+            benchResults[name] = round(runBenchCase(func, args.repeat), 3)
+            logger.info('Bench: %s: %s us', name, benchResults[name])
+
+    benchReport, benchRegressions = compareBaseline(results=benchResults,
+                                                    baseline=jBaseline,
+                                                    tolerance=args.tolerance)
+    print(f"Version: {_modVer}")
+    print(f"{'case':<28} {'current':>15} {'baseline':>15} {'ratio':>7}")
+    for line in benchReport:
+        print(line)
+
+    if args.save:
+        jBaseline["version"] = 1
+        jBaseline["host"] = w3rkstatt.sHostname
+        jBaseline["python"] = platform.python_version()
+        jBaseline["unit"] = "us"
+        jBaseline.setdefault("results", {}).update(benchResults)
+        w3rkstatt.writeJsonFile(file=baselineFile, content=jBaseline)
+        print(f"Baseline: {baselineFile}")
+
+    logger.info('Bench: End micro benchmarks')
+    logging.shutdown()
+    if len(benchRegressions) > 0 and not args.save:
+        sys.exit(1)
@@ -29,6 +29,7 @@ Date (YMD)    Name                  What
 20200730      Volker Scheithauer    Modify json handling for WCM
 20201009      Volker Scheithauer    Externalize Helix functions
 20220701      Volker Scheithauer    Migrate to W3rkstatt project
+20261019      Rafael Ulhoa          Reuse cached ITSM token
 """
 
 import logging
@@ -147,8 +148,7 @@ def createHelixCrq(data):
     if _localDebug:
         logger.info('Helix: CRQ JSON: %s ', jHelixCrq)
 
-    authToken = helix.authenticate()
-    ctmChangeID = helix.createChange(token=authToken, data=jHelixCrq)
+    ctmChangeID = helix.tokenCache.call(helix.createChange, data=jHelixCrq)
 
     if _localDebug:
         logger.info('CTM: Create CRQ: "%s": %s ', "Change ID", ctmChangeID)
@@ -158,8 +158,7 @@ def createHelixCrq(data):
 
 def getHelixCrq(change):
     ctmChangeID = change
-    authToken = helix.authenticate()
-    crgInfo = helix.getChange(token=authToken, change=ctmChangeID)
+    crgInfo = helix.tokenCache.call(helix.getChange, change=ctmChangeID)
     return crgInfo
 
 
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# Filename: conftest.py
+"""
+w3rkstatt test setup
+
+Modules read the project config of this host when they are imported,
+tests use a config created from templates/integrations.json in a
+temporary home folder. Without the Control-M Python client, a minimal
+controlm_py stand-in lets core_ctm and disco_ctm import; tests replace
+the AAPI calls they need.
+
+Usage:
+    python -m pytest
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import importlib.util
+from types import ModuleType
+
+import w3rkstatt as w3rkstatt
+
+
+def _createConfig():
+    homeFolder = tempfile.mkdtemp(prefix="w3rkstatt-test-")
+    os.environ["HOME"] = homeFolder
+    sTemplate = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                             "templates", "integrations.json")
+    with open(sTemplate, "r", encoding="utf-8") as f:
+        jCfgData = json.load(f)
+    for sFolder in ("config_folder", "log_folder", "data_folder"):
+        jCfgData["DEFAULT"][sFolder] = homeFolder
+    sConfigFile = w3rkstatt.getProjectConfigFileName()
+    os.makedirs(os.path.dirname(sConfigFile), exist_ok=True)
+    with open(sConfigFile, "w", encoding="utf-8") as f:
+        json.dump(jCfgData, f)
+    return homeFolder
+
+
+def _createControlmStub():
+    ctm = ModuleType("controlm_py")
+    ctm.api_client = ModuleType("controlm_py.api_client")
+    ctm.rest = ModuleType("controlm_py.rest")
+
+    class ApiClient(object):
+
+        def __init__(self, configuration=None, *args, **kwargs):
+            self.configuration = configuration
+            self.default_headers = {}
+
+        def set_default_header(self, name, value):
+            self.default_headers[name] = value
+
+    class ApiException(Exception):
+
+        def __init__(self, status=None, reason=None, http_resp=None):
+            super(ApiException, self).__init__(status, reason)
+            self.status = status
+            self.reason = reason
+            self.body = None
+
+    ctm.api_client.ApiClient = ApiClient
+    ctm.ApiClient = ApiClient
+    ctm.rest.ApiException = ApiException
+    sys.modules["controlm_py"] = ctm
+    sys.modules["controlm_py.api_client"] = ctm.api_client
+    sys.modules["controlm_py.rest"] = ctm.rest
+
+
+_homeFolder = _createConfig()
+if importlib.util.find_spec("controlm_py") is None:
+    _createControlmStub()
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_homeFolder, ignore_errors=True)
@@ -26,6 +26,9 @@ Date (YMD)    Name                  What
 --------      ------------------    ------------------------
 20220715      Volker Scheithauer    Initial Development
 20230522      Volker Scheithauer    Update API key issues
+20261019      Rafael Ulhoa          Use shared pooled HTTP sessions
+20261019      Rafael Ulhoa          Cache authentication tokens
+20261019      Rafael Ulhoa          Add async connector variants
 
 See also: https://realpython.com/python-send-email/
 """
@@ -43,11 +46,15 @@ import getopt
 # handle dev environment vs. production
 try:
     import w3rkstatt as w3rkstatt
+    import core_http as http
+    import core_token as token
 except:
     # fix import issues for modules
     sys.path.append(
         os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
     from src import w3rkstatt as w3rkstat
+    from src import core_http as http
+    from src import core_token as token
 
 # Define global variables from w3rkstatt.ini file
 # Get configuration from bmcs_core.json
@@ -124,10 +131,10 @@ def createEvent(token, event_data):
         logger.debug('HTTP Payload: %s', payload)
 
     try:
-        response = requests.post(url,
-                                 data=payload,
-                                 headers=headers,
-                                 verify=False)
+        response = http.post(url,
+                             data=payload,
+                             headers=headers,
+                             verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -172,10 +179,10 @@ def acknowledgeEvent(token, event_id, event_note=""):
         logger.debug('HTTP Payload: %s', payload)
 
     try:
-        response = requests.post(url,
-                                 data=payload,
-                                 headers=headers,
-                                 verify=False)
+        response = http.post(url,
+                             data=payload,
+                             headers=headers,
+                             verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -244,10 +251,10 @@ def setPriorityEvent(token,
         logger.debug('HTTP Payload: %s', payload)
 
     try:
-        response = requests.post(url,
-                                 data=payload,
-                                 headers=headers,
-                                 verify=False)
+        response = http.post(url,
+                             data=payload,
+                             headers=headers,
+                             verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -303,10 +310,10 @@ def assignEvent(token, event_id, assigned_user, event_note=""):
         logger.debug('HTTP Payload: %s', payload)
 
     try:
-        response = requests.post(url,
-                                 data=payload,
-                                 headers=headers,
-                                 verify=False)
+        response = http.post(url,
+                             data=payload,
+                             headers=headers,
+                             verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -356,10 +363,10 @@ def createIncidentEvent(token, event_id):
         logger.debug('HTTP Payload: %s', payload)
 
     try:
-        response = requests.post(url,
-                                 data=payload,
-                                 headers=headers,
-                                 verify=False)
+        response = http.post(url,
+                             data=payload,
+                             headers=headers,
+                             verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -409,10 +416,10 @@ def addNoteEvent(token, event_id, event_note):
         logger.debug('HTTP Payload: %s', payload)
 
     try:
-        response = requests.post(url,
-                                 data=payload,
-                                 headers=headers,
-                                 verify=False)
+        response = http.post(url,
+                             data=payload,
+                             headers=headers,
+                             verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -474,10 +481,10 @@ def authenticate():
         logger.debug('HTTP Payload: %s', payload)
 
     try:
-        response = requests.post(url,
-                                 data=payload,
-                                 headers=headers,
-                                 verify=False)
+        response = http.post(url,
+                             data=payload,
+                             headers=headers,
+                             verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -498,6 +505,48 @@ def authenticate():
     return authToken
 
 
+# Async variants, share pools and limits with the blocking calls
+
+
+async def authenticateAsync():
+    '''
+    Login to BHOM without blocking the event loop, see authenticate
+    '''
+    return await http.runAsync(authenticate, limit="bhom")
+
+
+async def createEventAsync(token, event_data):
+    '''
+    Create a BHOM event without blocking the event loop, see createEvent
+    '''
+    return await http.runAsync(createEvent, token, event_data,
+                               limit="bhom")
+
+
+async def assignEventAsync(token, event_id, assigned_user, event_note=""):
+    '''
+    Assign a BHOM event without blocking the event loop, see assignEvent
+    '''
+    return await http.runAsync(assignEvent,
+                               token,
+                               event_id,
+                               assigned_user,
+                               event_note,
+                               limit="bhom")
+
+
+async def addNoteEventAsync(token, event_id, event_note):
+    '''
+    Add a note to a BHOM event without blocking the event loop, see addNoteEvent
+    '''
+    return await http.runAsync(addNoteEvent, token, event_id, event_note,
+                               limit="bhom")
+
+
+# Shared BHOM token, the JWT exp claim limits the lifetime
+tokenCache = token.TokenCache(name="bhom", login=authenticate, ttl=86400)
+
+
 if __name__ == "__main__":
     logging.basicConfig(filename=logFile,
                         filemode='w',
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# Filename: core_cache.py
+"""
+(c) 2026 Rafael Ulhoa
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+The above copyright notice and this permission notice (including the next paragraph) shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+https://opensource.org/licenses/GPL-3.0
+# SPDX-License-Identifier: GPL-3.0-or-later
+For information on SDPX, https://spdx.org/licenses/GPL-3.0-or-later.html
+
+w3rkstatt Python response cache
+Keep backend responses for a limited time, optionally shared between processes
+
+Change Log
+Date (YMD)    Name                  What
+--------      ------------------    ------------------------
+20261019      Rafael Ulhoa          Initial Development
+20261019      Rafael Ulhoa          Columnar cache for report data
+
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+import pandas as pd
+from io import StringIO
+from collections import OrderedDict
+
+# handle dev environment vs. production
+try:
+    import w3rkstatt as w3rkstatt
+except:
+    # fix import issues for modules
+    sys.path.append(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    from src import w3rkstatt as w3rkstatt
+
+# Parquet files if pyarrow is installed, pickled data frames otherwise
+try:
+    import pyarrow
+    table_format = "parquet"
+except ImportError:
+    table_format = "pickle"
+
+# Get configuration from bmcs_core.json
+jCfgData = w3rkstatt.getProjectConfig()
+cfgFolder = w3rkstatt.getJsonValue(path="$.DEFAULT.config_folder",
+                                   data=jCfgData)
+
+# Cache files are shared by all processes of the same host
+cache_persist = w3rkstatt.getJsonValue(path="$.DEFAULT.cache.persist",
+                                       data=jCfgData) is True
+cache_folder = w3rkstatt.getJsonValue(path="$.DEFAULT.cache.folder",
+                                      data=jCfgData) or cfgFolder
+
+# Assign module defaults
+_modVer = "20.26.10.00"
+_localDebug = False
+logger = logging.getLogger(__name__)
+epoch = time.time()
+
+
+def getCacheSetting(setting, name, default):
+    '''
+    Get the configured setting of a cache
+
+    :param str setting: ttl or size
+    :param str name: cache name, e.g. ctm_folder
+    :param int default: value if not configured
+    :return: lifetime in seconds or max. entries
+    :rtype: int
+    '''
+    value = w3rkstatt.getJsonValue(path="$.DEFAULT.cache." + setting + "." +
+                                   name,
+                                   data=jCfgData)
+    if value == "" or value is None:
+        return default
+    return int(value)
+
+
+class TtlCache(object):
+    '''
+    Cache backend responses by key
+
+    Entries expire after the configured lifetime, the least recently used
+    entry is dropped once the cache holds size entries. With persist the
+    entries are also stored as json files, so short lived processes on the
+    same host reuse one download.
+
+    folderCache = cache.TtlCache(name="ctm_folder", ttl=600, size=64)
+    folder = folderCache.get(("IN01", "DCO_FOLDER"), load=getFolder)
+    '''
+
+    def __init__(self, name, ttl=600, size=128, persist=None):
+        '''
+        :param str name: cache name, used for config and cache files
+        :param int ttl: lifetime in seconds if not configured
+        :param int size: max. entries if not configured
+        :param bool persist: share entries via files, default from config
+        '''
+        self.name = name
+        self.ttl = getCacheSetting("ttl", name, ttl)
+        self.size = max(1, getCacheSetting("size", name, size))
+        if persist is None:
+            persist = cache_persist
+        self.persist = persist and len(cache_folder) > 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _getFile(self, key):
+        digest = hashlib.sha1(
+            json.dumps(key, sort_keys=True,
+                       default=str).encode("utf-8")).hexdigest()
+        return os.path.join(cache_folder,
+                            "cache." + self.name + "." + digest + ".json")
+
+    def _readFile(self, key):
+        try:
+            with open(self._getFile(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data["key"] != json.loads(json.dumps(key, default=str)):
+                return None, 0
+            return data["value"], float(data["expires"])
+        except (OSError, KeyError, TypeError, ValueError):
+            return None, 0
+
+    def _writeFile(self, key, value, expires):
+        content = {
+            "name": self.name,
+            "key": key,
+            "expires": expires,
+            "value": value
+        }
+        try:
+            w3rkstatt.encodeJson(content, compact=True)
+        except (TypeError, ValueError) as err:
+            logger.debug('Cache: "%s" entry not stored: %s', self.name, err)
+            return
+        w3rkstatt.writeJsonFile(file=self._getFile(key),
+                                content=content,
+                                compact=True)
+        self._pruneFiles()
+
+    def _pruneFiles(self):
+        # Drop the oldest files of this cache beyond its size
+        prefix = "cache." + self.name + "."
+        try:
+            files = [
+                os.path.join(cache_folder, file)
+                for file in os.listdir(cache_folder)
+                if file.startswith(prefix) and file.endswith(".json")
+            ]
+            if len(files) <= self.size:
+                return
+            files.sort(key=os.path.getmtime)
+            for file in files[:len(files) - self.size]:
+                os.remove(file)
+        except OSError as err:
+            logger.debug('Cache: "%s" prune failed: %s', self.name, err)
+
+    def get(self, key, load=None):
+        '''
+        Get a cached value, load it if missing or expired
+
+        :param tuple key: entry key, e.g. (server, folder)
+        :param func load: function returning the value or None
+        :return: value, None if not cached and not loaded
+        '''
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] > now:
+                self.entries.move_to_end(key)
+                return entry[0]
+
+        if self.persist:
+            value, expires = self._readFile(key)
+            if value is not None and expires > now:
+                self._store(key, value, expires)
+                return value
+
+        if load is None:
+            return None
+        value = load()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def _store(self, key, value, expires):
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def put(self, key, value):
+        '''
+        Cache a value
+
+        :param tuple key: entry key, e.g. (server, folder)
+        :param value: value, stored as json if persisted
+        '''
+        expires = time.time() + self.ttl
+        self._store(key, value, expires)
+        if self.persist:
+            self._writeFile(key, value, expires)
+        if _localDebug:
+            logger.debug('Cache: "%s" stored: %s', self.name, key)
+
+    def invalidate(self, key=None):
+        '''
+        Drop a cached value, all values if no key is given
+
+        :param tuple key: entry key, e.g. (server, folder)
+        '''
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+        if not self.persist:
+            return
+        try:
+            if key is None:
+                prefix = "cache." + self.name + "."
+                for file in os.listdir(cache_folder):
+                    if file.startswith(prefix) and file.endswith(".json"):
+                        os.remove(os.path.join(cache_folder, file))
+            else:
+                os.remove(self._getFile(key))
+        except OSError:
+            pass
+
+
+class TableCache(object):
+    '''
+    Keep report data as typed columns, one file per partition
+
+    The schema file lists the columns, their types, the refresh time and a
+    content hash per partition. A refresh only writes the partitions that
+    changed, a query only reads the partitions its filters select.
+
+    jobs = cache.TableCache(name="ctm_report_jobs", partition="Folder")
+    jobs.store(data=csvData)
+    failed = jobs.query(filters={"Folder": "DCO", "Status": "Ended Not OK"})
+    '''
+
+    def __init__(self, name, partition=None, folder=None):
+        '''
+        :param str name: cache name, used as folder name
+        :param str partition: column the data is partitioned by
+        :param str folder: parent folder, default cache folder
+        '''
+        self.name = name
+        self.partition = partition
+        self.folder = os.path.join(folder or cache_folder, "table." + name)
+        self.schemaFile = os.path.join(self.folder, "schema.json")
+        self.lock = threading.Lock()
+
+    def getSchema(self):
+        '''
+        Get the schema of the cached data
+
+        :return: name, timestamp, rows, columns, partitions
+        :rtype: dict
+        '''
+        if not w3rkstatt.getFileStatus(self.schemaFile):
+            return {}
+        return w3rkstatt.getFileJson(self.schemaFile)
+
+    def _getHash(self, df):
+        digest = hashlib.sha1(str(dict(df.dtypes)).encode("utf-8"))
+        digest.update(
+            pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        return digest.hexdigest()
+
+    def _write(self, df, file):
+        tmpFile = file + ".tmp"
+        if table_format == "parquet":
+            df.to_parquet(tmpFile, index=False)
+        else:
+            df.to_pickle(tmpFile)
+        os.replace(tmpFile, file)
+
+    def _read(self, file, columns=None):
+        if file.endswith(".parquet"):
+            return pd.read_parquet(file, columns=columns)
+        df = pd.read_pickle(file)
+        if columns is not None:
+            df = df[columns]
+        return df
+
+    def store(self, data=None, file=None, keepDuplicate=False):
+        '''
+        Replace the cached data with a csv report, unchanged partitions
+        are kept
+
+        :param str data: data in csv format
+        :param str file: csv file, instead of data
+        :param str keepDuplicate: panda method of handling duplicate records
+        :return: number of written, unchanged and removed partitions
+        :rtype: dict
+        '''
+        if file is not None:
+            df = pd.read_csv(file)
+        else:
+            df = pd.read_csv(StringIO(data))
+        df = df.drop_duplicates(keep=keepDuplicate).reset_index(drop=True)
+
+        if self.partition and self.partition in df.columns:
+            parts = df.groupby(self.partition, dropna=False, sort=False)
+            partition = self.partition
+        else:
+            parts = [("", df)]
+            partition = None
+
+        with self.lock:
+            os.makedirs(self.folder, exist_ok=True)
+            previous = self.getSchema().get("partitions", {})
+            partitions = {}
+            status = {"written": 0, "unchanged": 0, "removed": 0}
+            extension = ".parquet" if table_format == "parquet" else ".pkl"
+            for (key, part) in parts:
+                key = str(key)
+                digest = self._getHash(part)
+                entry = previous.get(key)
+                if entry is not None and entry["hash"] == digest and \
+                        os.path.isfile(os.path.join(self.folder, entry["file"])):
+                    partitions[key] = entry
+                    status["unchanged"] += 1
+                    continue
+                fileName = "part." + hashlib.sha1(
+                    key.encode("utf-8")).hexdigest()[:16] + extension
+                self._write(part.reset_index(drop=True),
+                            os.path.join(self.folder, fileName))
+                partitions[key] = {
+                    "file": fileName,
+                    "hash": digest,
+                    "rows": int(len(part))
+                }
+                status["written"] += 1
+
+            # Drop partitions no longer in the report
+            for (key, entry) in previous.items():
+                current = partitions.get(key)
+                if current is not None and current["file"] == entry["file"]:
+                    continue
+                if current is None:
+                    status["removed"] += 1
+                try:
+                    os.remove(os.path.join(self.folder, entry["file"]))
+                except OSError:
+                    pass
+
+            schema = {
+                "name": self.name,
+                "timestamp": time.time(),
+                "rows": int(len(df)),
+                "format": table_format,
+                "partition": partition,
+                "columns": {col: str(df[col].dtype)
+                            for col in df.columns},
+                "partitions": partitions
+            }
+            w3rkstatt.writeJsonFile(file=self.schemaFile, content=schema)
+
+        if _localDebug:
+            logger.debug('Cache: "%s" stored: %s', self.name, status)
+        return status
+
+    def query(self, columns=None, filters=None):
+        '''
+        Get cached data
+
+        :param list columns: columns to return, default all
+        :param dict filters: column and value or list of values
+        :return: data, empty if nothing is cached
+        :rtype: panda dataframe
+        '''
+        schema = self.getSchema()
+        partitions = schema.get("partitions", {})
+        filters = filters or {}
+        partition = schema.get("partition")
+
+        # Read only the partitions selected by the filters
+        keys = list(partitions)
+        if partition is not None and partition in filters:
+            values = filters[partition]
+            if not isinstance(values, (list, tuple, set)):
+                values = [values]
+            values = set(str(value) for value in values)
+            keys = [key for key in keys if key in values]
+
+        readColumns = None
+        if columns is not None:
+            readColumns = list(columns) + [
+                col for col in filters if col not in columns
+            ]
+        frames = [
+            self._read(os.path.join(self.folder, partitions[key]["file"]),
+                       readColumns) for key in keys
+        ]
+        if len(frames) == 0:
+            return pd.DataFrame(columns=columns or list(
+                schema.get("columns", {})))
+        df = pd.concat(frames, ignore_index=True)
+
+        for (col, value) in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                df = df[df[col].isin(list(value))]
+            else:
+                df = df[df[col] == value]
+        if columns is not None:
+            df = df[list(columns)]
+        return df.reset_index(drop=True)
@@ -26,6 +26,25 @@ Date (YMD)    Name                  What
 --------      ------------------    ------------------------
 20210311      Volker Scheithauer    Tranfer Development from bmcs_core project
 20240503      Volker Scheithauer    Fix CTM Alert conversion to json
+20261019      Rafael Ulhoa          Use shared pooled HTTP sessions
+20261019      Rafael Ulhoa          Reuse the AAPI session per endpoint
+20261019      Rafael Ulhoa          Convert AAPI models with to_dict instead of str parsing
+20261019      Rafael Ulhoa          Reuse AAPI service objects per client
+20261019      Rafael Ulhoa          Bulk job status lookup by order IDs or folder
+20261019      Rafael Ulhoa          Cache deployed folder definitions
+20261019      Rafael Ulhoa          Index job definitions of deployed folders
+20261019      Rafael Ulhoa          Single pass job log parser
+20261019      Rafael Ulhoa          Size capped streaming job output capture
+20261019      Rafael Ulhoa          Async report runner with backoff polling
+20261019      Rafael Ulhoa          Columnar cache of report data
+20261019      Rafael Ulhoa          Alert field dispatch table, message classifier
+20261019      Rafael Ulhoa          Indexed data center lookup
+20261019      Rafael Ulhoa          Memoized timestamp codec, job status batch
+20261019      Rafael Ulhoa          Declarative BHOM field mapping
+20261019      Rafael Ulhoa          Agent snapshots by server
+20261019      Rafael Ulhoa          Session token per endpoint and user, closeCtmSessions
+20261019      Rafael Ulhoa          Report runner on Python 3.6, failures per report
+20261019      Rafael Ulhoa          Job output capture in bytes, partial on stream errors
 
 """
 
@@ -37,6 +56,14 @@ import time
 import datetime
 import sys
 import getopt
+import threading
+import atexit
+import asyncio
+import random
+import gzip
+import codecs
+import collections
+import operator
 import requests
 import urllib3
 from collections import OrderedDict
@@ -54,11 +81,17 @@ from controlm_py.rest import ApiException
 # handle dev environment vs. production
 try:
     import w3rkstatt as w3rkstatt
+    import core_http as http
+    import core_token as token
+    import core_cache as cache
 except:
     # fix import issues for modules
     sys.path.append(
         os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
     from src import w3rkstatt as w3rkstat
+    from src import core_http as http
+    from src import core_token as token
+    from src import core_cache as cache
 
 # To Handle CTM JSON with '
 # https://pypi.org/project/demjson/
@@ -86,6 +119,258 @@ ctm_rpt_jsm = w3rkstatt.getJsonValue(path="$.CTM.service_model_rpt_job",
                                      data=jCfgData)
 # CTM Report Name to get job definitions for service model
 
+# Job IDs per bulk status query, max. statuses returned per query
+ctm_status_batch = int(
+    w3rkstatt.getJsonValue(path="$.CTM.jobs.status_batch", data=jCfgData)
+    or 50)
+ctm_status_limit = int(
+    w3rkstatt.getJsonValue(path="$.CTM.jobs.status_limit", data=jCfgData)
+    or 1000)
+
+# Job output lines kept from start and end, max. bytes kept of the output
+ctm_output_head = int(
+    w3rkstatt.getJsonValue(path="$.CTM.jobs.output.head_lines",
+                           data=jCfgData) or 200)
+ctm_output_tail = int(
+    w3rkstatt.getJsonValue(path="$.CTM.jobs.output.tail_lines",
+                           data=jCfgData) or 200)
+ctm_output_bytes = int(
+    w3rkstatt.getJsonValue(path="$.CTM.jobs.output.max_bytes", data=jCfgData)
+    or 1048576)
+
+ctm_rpt_folder = w3rkstatt.getJsonValue(
+    path="$.CTM.reports.folder", data=jCfgData) or w3rkstatt.getJsonValue(
+        path="$.DEFAULT.log_folder", data=jCfgData)
+ctm_rpt_poll = float(
+    w3rkstatt.getJsonValue(path="$.CTM.reports.poll_initial", data=jCfgData)
+    or 2)
+ctm_rpt_poll_max = float(
+    w3rkstatt.getJsonValue(path="$.CTM.reports.poll_max", data=jCfgData) or 60)
+ctm_rpt_timeout = float(
+    w3rkstatt.getJsonValue(path="$.CTM.reports.timeout", data=jCfgData)
+    or 1800)
+# Report files, first and max. seconds between status polls, max. runtime
+ctm_rpt_cache = w3rkstatt.getJsonValue(path="$.CTM.reports.cache",
+                                       data=jCfgData) is True
+ctm_rpt_partitions = w3rkstatt.getJsonValue(path="$.CTM.reports.partitions",
+                                            data=jCfgData) or {}
+# Keep finished reports as typed columns, partition column by report name
+
+# Alert message rules, the first matching rule sets the message type
+CTM_ALERT_MESSAGES = [{
+    "match": "STATUS OF AGENT PLATFORM",
+    "type": "agent"
+}, {
+    "match": "DATA CENTER",
+    "type": "datacenter"
+}, {
+    "match": "Distributed Control-M/EM Configuration Agent",
+    "type": "config_agent"
+}, {
+    "match": "Ended not OK",
+    "type": "job_failed"
+}, {
+    "match": "Failed to order",
+    "type": "job_order_failed"
+}, {
+    "match": "BIM / SIM",
+    "type": "job_order_failed"
+}]
+ctm_alert_messages = w3rkstatt.getJsonValue(path="$.CTM.alerts.messages",
+                                            data=jCfgData) or CTM_ALERT_MESSAGES
+ctm_alert_cdmclass = "BMC_ApplicationService"
+
+# BHOM event fields by alert category, source paths relative to root
+CTM_BHOM_MAPPING = {
+    "infrastructure": {
+        "root": "$.infraAlert[0]",
+        "fields": [
+            {"target": "severity", "value": "WARNING"},
+            {"target": "CLASS", "value": "CTMX_EVENT"},
+            {"target": "msg", "source": "message_summary"},
+            {"target": "details", "source": "message_notes"},
+            {"target": "source_identifier", "source": "host_id"},
+            {"target": "source_hostname", "source": "host_id"},
+            {"target": "source_address", "source": "host_ip"},
+            {"target": "alias", "source": "system_class"},
+            {"target": "status", "value": "OPEN"},
+            {"target": "priority", "value": "PRIORITY_3"},
+            {"target": "location", "source": "data_center"},
+            {"target": "instancename", "source": "host_id"},
+            {
+                "target": "cdmclass",
+                "source": "system_class",
+                "transform": ["cdmclass"]
+            },
+            {"target": "componentalias", "source": "system_class"},
+            {"target": "system_category", "source": "system_category"},
+            {"target": "system_status", "source": "system_status"},
+            {"target": "ctmDataCenter", "source": "data_center"},
+            {"target": "ctmUpdateType", "source": "call_type"},
+            {"target": "xctmCallType", "source": "call_type"},
+            {"target": "xctmCompMachine", "source": "Component_machine"},
+            {"target": "xctmCompName", "source": "Component_name"},
+            {"target": "xctmCompType", "source": "Component_type"},
+            {"target": "xctmCounter", "source": "Counter"},
+            {"target": "xctmKey1", "source": "Key1"},
+            {"target": "xctmKey2", "source": "Key2"},
+            {"target": "xctmKey3", "source": "Key3"},
+            {"target": "xctmKey4", "source": "Key4"},
+            {"target": "xctmKey5", "source": "Key5"},
+            {"target": "xctmMessage", "source": "Message"},
+            {"target": "xctmMessageId", "source": "Message_id"},
+            {"target": "xctmNote", "source": "Note"},
+            {"target": "xctmSerial", "source": "Serial"},
+            {"target": "xctmStatus", "source": "Status"},
+            {"target": "xctmXSeverity", "source": "Xseverity"},
+            {"target": "xctmXTime", "source": "Xtime"},
+            {"target": "xctmXTimeOFLast", "source": "Xtime_of_last"}
+        ]
+    },
+    "job": {
+        "root": "$.jobAlert[0]",
+        "fields": [
+            {
+                "target": "ctmFolder",
+                "source": "$.jobInfo[0].entries[0].folder",
+                "when": "$.jobInfo[0].count"
+            },
+            {
+                "target": "ctmFolderID",
+                "source": "$.jobInfo[0].entries[0].folder_id",
+                "when": "$.jobInfo[0].count"
+            },
+            {
+                "target": "ctmJobHeld",
+                "source": "$.jobInfo[0].entries[0].held",
+                "when": "$.jobInfo[0].count"
+            },
+            {
+                "target": "ctmJobType",
+                "source": "$.jobInfo[0].entries[0].type",
+                "when": "$.jobInfo[0].count"
+            },
+            {
+                "target": "ctmJobCyclic",
+                "source": "$.jobInfo[0].entries[0].cyclic",
+                "when": "$.jobInfo[0].count"
+            },
+            {
+                "target": "ctmOwner",
+                "source": "$.jobConfig[0].entries[0]."
+                "{$.jobInfo[0].entries[0].folder}.CreatedBy",
+                "when": "$.jobConfig[0].count",
+                "default": None
+            },
+            {"target": "severity", "source": "severity"},
+            {"target": "CLASS", "value": "CTM_JOB"},
+            {"target": "msg", "source": "message_summary"},
+            {"target": "details", "source": "message_notes"},
+            {"target": "source_identifier", "source": "host_id"},
+            {"target": "source_hostname", "source": "host_id"},
+            {"target": "source_address", "source": "host_ip"},
+            {
+                "target": "alias",
+                "source": "host_id",
+                "format": "BMC_ComputerSystem:{}"
+            },
+            {"target": "status", "value": "OPEN"},
+            {"target": "priority", "value": "PRIORITY_3"},
+            {"target": "location", "source": "data_center"},
+            {"target": "instancename", "source": "host_id"},
+            {"target": "cdmclass", "value": "BMC_ComputerSystem"},
+            {
+                "target": "componentalias",
+                "source": "host_id",
+                "format": "BMC_ComputerSystem:{}"
+            },
+            {"target": "system_category", "source": "system_category"},
+            {"target": "system_status", "source": "system_status"},
+            {"target": "ctmUpdateType", "source": "call_type"},
+            {"target": "ctmAlertId", "source": "alert_id"},
+            {"target": "ctmDataCenter", "source": "data_center"},
+            {"target": "ctmMemName", "source": "memname"},
+            {"target": "ctmOrderId", "source": "order_id"},
+            {"target": "ctmSeverity", "source": "severity"},
+            {"target": "ctmTime", "source": "send_time"},
+            {"target": "ctmStatus", "source": "status"},
+            {"target": "ctmNodeId", "source": "host_id"},
+            {"target": "ctmJobName", "source": "job_name"},
+            {"target": "ctmMessage", "source": "message"},
+            {"target": "ctmApplication", "source": "application"},
+            {"target": "ctmSubApplication", "source": "sub_application"},
+            {"target": "ctmAlertType", "source": "alert_type"},
+            {"target": "ctmClosedFromEM", "source": "closed_from_em"},
+            {"target": "ctmTicketNumber", "source": "ticket_number"},
+            {"target": "ctmRunCounter", "source": "run_counter"},
+            {"target": "ctmUser", "value": "TBD"},
+            {"target": "ctmUpdateTime", "source": "send_time"},
+            {"target": "ctmNotes", "source": "notes"},
+            {"target": "ctmJobID", "source": "job_id"}
+        ]
+    },
+    "core": {
+        "root": "$.coreAlert[0]",
+        "fields": [
+            {"target": "severity", "source": "severity"},
+            {"target": "CLASS", "value": "CTM_EVENT"},
+            {"target": "msg", "source": "message_summary"},
+            {"target": "details", "source": "message_notes"},
+            {"target": "source_identifier", "source": "host_id"},
+            {"target": "source_hostname", "source": "host_id"},
+            {"target": "source_address", "source": "host_ip"},
+            {"target": "alias", "source": "system_class"},
+            {"target": "status", "value": "OPEN"},
+            {"target": "priority", "value": "PRIORITY_3"},
+            {"target": "location", "source": "data_center"},
+            {"target": "instancename", "source": "host_id"},
+            {
+                "target": "cdmclass",
+                "source": "system_class",
+                "transform": ["cdmclass", "strip"]
+            },
+            {"target": "componentalias", "source": "system_class"},
+            {"target": "system_category", "source": "system_category"},
+            {"target": "system_status", "source": "system_status"},
+            {"target": "ctmUpdateType", "source": "call_type"},
+            {"target": "ctmAlertId", "source": "alert_id"},
+            {"target": "ctmDataCenter", "source": "data_center"},
+            {"target": "ctmMemName", "source": "memname"},
+            {"target": "ctmOrderId", "source": "order_id"},
+            {"target": "ctmSeverity", "source": "severity"},
+            {"target": "ctmTime", "source": "send_time"},
+            {"target": "ctmStatus", "source": "status"},
+            {"target": "ctmNodeId", "source": "host_id"},
+            {"target": "ctmJobName", "source": "job_name"},
+            {"target": "ctmMessage", "source": "message"},
+            {"target": "ctmApplication", "source": "application"},
+            {"target": "ctmSubApplication", "source": "sub_application"},
+            {"target": "ctmAlertType", "source": "alert_type"},
+            {"target": "ctmClosedFromEM", "source": "closed_from_em"},
+            {"target": "ctmTicketNumber", "source": "ticket_number"},
+            {"target": "ctmRunCounter", "source": "run_counter"},
+            {"target": "ctmUser", "value": "TBD"},
+            {"target": "ctmUpdateTime", "source": "send_time"},
+            {"target": "ctmNotes", "source": "notes"}
+        ]
+    }
+}
+ctm_bhom_mapping = dict(CTM_BHOM_MAPPING)
+ctm_bhom_mapping.update(
+    w3rkstatt.getJsonValue(path="$.CTM.bhom.mapping", data=jCfgData) or {})
+
+# Deployed folders by (server, folder), shared by the job alerts of a folder
+folderCache = cache.TtlCache(name="ctm_folder", ttl=600, size=64)
+folderIndexCache = cache.TtlCache(name="ctm_folder_index",
+                                 ttl=folderCache.ttl,
+                                 size=folderCache.size,
+                                 persist=False)
+
+# Agent lists by server, downloaded again after refresh seconds and served
+# up to the lifetime of the ctm_agents cache
+ctm_agent_refresh = int(
+    w3rkstatt.getJsonValue(path="$.CTM.agents.refresh", data=jCfgData) or 300)
+
 # Compute CTM Server Name
 ctm_server = w3rkstatt.getHostFromFQDN(ctm_host)
 ctm_agent = ctm_server
@@ -107,6 +392,17 @@ epoch = time.time()
 hostName = w3rkstatt.getHostName()
 hostIP = w3rkstatt.getHostIP(hostName)
 
+# Job log: time, date, message, tab, code
+_ctmJobLogLine = re.compile(
+    r'^(\S+)\s+(\S+)\s+(.*?)(?:\s*\t\s*([^\t\s]*).*)?$')
+_ctmJobLogEscaped = re.compile(
+    r'^(\S+)\s+(\S+)\s+(.*?)(?:\s*\\t\s*([^\\\s]*).*)?$')
+# ENDED AT 20210402124811. OSCOMPSTAT 1. RUNCNT 1
+_ctmJobLogEnded = re.compile(
+    r'^\S+\s+\S+\s+(\S+)\s+\S+\s+(\S+)\s+\S+\s+(\S+)')
+# ORDERED JOB:24; DAILY FORCED, ODATE 20210402
+_ctmJobLogOrdered = re.compile(r'ODATE\s+(\d+)')
+
 # Ignore HTTPS Insecure Request Warnings
 if ctm_ssl_ver == 'true':
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -210,6 +506,319 @@ class CtmConnection(object):
                        exp)
 
 
+class CtmApiClient(ctm.api_client.ApiClient):
+    """
+    Automation API client of a CtmSession, sets the current session token
+    on each call and logs in again if the token was rejected
+    """
+    session = None
+
+    def call_api(self, *args, **kwargs):
+        self.default_headers['Authorization'] = 'Bearer ' + \
+            str(self.session.getToken())
+        try:
+            return super(CtmApiClient, self).call_api(*args, **kwargs)
+        except ApiException as exp:
+            if exp.status != 401:
+                raise
+            logger.info('CTM: API token rejected, login again')
+            self.session.tokenCache.invalidate()
+            self.default_headers['Authorization'] = 'Bearer ' + \
+                str(self.session.getToken(force=True))
+            return super(CtmApiClient, self).call_api(*args, **kwargs)
+
+
+class CtmSession(object):
+    """
+    Shared session of a Control-M Automation API endpoint
+
+    The token is refreshed before it expires (session/token/refresh) and
+    renewed if the endpoint rejects it, with DEFAULT.tokens.persist it is
+    shared by all processes on the host. Use getCtmSession() to get the
+    session of an endpoint.
+    :property api_client Implements the connection to the Control-M AAPI endpoint
+    """
+
+    def __init__(self,
+                 host='',
+                 port='',
+                 endpoint='/automation-api',
+                 user='',
+                 password='',
+                 ssl=True,
+                 verify_ssl=False,
+                 additional_login_header={}):
+        """
+        :param host: str: Control-M web server host name (preferred fqdn) serving the Automation API.
+        :param port: str: Control-M web server port serving the Automation API.
+        :param endpoint: str: The serving point for the AAPI (default='/automation-api')
+        :param user: str: Login user
+        :param password: str: Password for the login user
+        :param ssl: bool: If the web server uses https (default=True)
+        :param verify_ssl: bool: If the web server uses self signed certificates (default=False)
+        :param additionalLoginHeader: dict: login headers to be added to the AAPI headers
+        :return None
+        """
+        configuration = ctm.Configuration()
+        if ssl:
+            configuration.host = 'https://'
+            configuration.verify_ssl = verify_ssl
+            if not verify_ssl:
+                disable_warnings(InsecureRequestWarning)
+        else:
+            configuration.host = 'http://'
+        configuration.host = configuration.host + host + ':' + str(
+            port) + endpoint
+
+        self.url = configuration.host + '/'
+        self.user = user
+        self.password = password
+        self.verify_ssl = verify_ssl
+        self.api_client = CtmApiClient(configuration=configuration)
+        self.api_client.session = self
+        if additional_login_header is not None:
+            for header in additional_login_header.keys():
+                self.api_client.set_default_header(
+                    header, additional_login_header[header])
+        self.tokenCache = token.TokenCache(name="ctm",
+                                           login=self._login,
+                                           logout=self._logout,
+                                           refresh=self._refresh,
+                                           ttl=1800,
+                                           key=host + "_" + str(port) +
+                                           "_" + user)
+
+    def _post(self, action, data=None, authToken=None):
+        headers = {'content-type': "application/json"}
+        if authToken is not None:
+            headers['Authorization'] = 'Bearer ' + authToken
+        try:
+            response = http.post(self.url + action,
+                                 data=json.dumps(data or {}),
+                                 headers=headers,
+                                 verify=self.verify_ssl)
+        except requests.RequestException as exp:
+            logger.error('CTM: connection error occurred: %s', exp)
+            return None
+        if response.status_code != 200:
+            logger.error('CTM: API %s Status: %s', action,
+                         response.status_code)
+            return None
+        return response
+
+    def _login(self):
+        response = self._post("session/login", {
+            "username": self.user,
+            "password": self.password
+        })
+        if response is None:
+            return None
+        if _localDebugFunctions:
+            logger.debug('CTM: API Login: %s', True)
+        return response.json()["token"]
+
+    def _refresh(self, authToken):
+        response = self._post("session/token/refresh", {"token": authToken},
+                              authToken=authToken)
+        if response is None:
+            return None
+        return response.json()["token"]
+
+    def _logout(self, authToken):
+        self._post("session/logout", authToken=authToken)
+        if _localDebugAdvanced:
+            logger.debug('CTM: API Logout: %s', True)
+
+    def getToken(self, force=False):
+        return self.tokenCache.getToken(force=force)
+
+    @property
+    def logged_in(self):
+        return self.tokenCache.token is not None
+
+    def logout(self):
+        """
+        Keep the session for the next caller, closeCtmSessions() ends it,
+        at the latest at program exit
+        """
+        if _localDebugAdvanced:
+            logger.debug('CTM: API Session kept: %s', self.url)
+
+    def close(self):
+        """
+        End the session, a persisted token stays for other processes
+        """
+        self.tokenCache.close()
+
+
+_ctmSessions = {}
+_ctmSessionsLock = threading.Lock()
+
+
+def getCtmSession(host, port, user, password, ssl=True, verify_ssl=False):
+    """
+    Get the shared session of a Control-M Automation API endpoint
+
+    :param str host: Control-M web server host name
+    :param str port: Control-M web server port
+    :param str user: login user
+    :param str password: password of the login user
+    :return: session, logged in
+    :rtype: CtmSession
+    :raises ApiException: login failed
+    """
+    key = host + ":" + str(port) + ":" + user
+    with _ctmSessionsLock:
+        session = _ctmSessions.get(key)
+        if session is None:
+            session = CtmSession(
+                host=host,
+                port=port,
+                endpoint=ctm_aapi or '/automation-api',
+                user=user,
+                password=password,
+                ssl=ssl,
+                verify_ssl=verify_ssl,
+                additional_login_header={'accept': 'application/json'})
+            _ctmSessions[key] = session
+    if session.getToken() is None:
+        raise ApiException(status=401, reason="CTM: API Login failed")
+    return session
+
+
+def closeCtmSessions():
+    """
+    End all shared sessions, called at program exit
+    """
+    with _ctmSessionsLock:
+        sessions = list(_ctmSessions.values())
+        _ctmSessions.clear()
+    for session in sessions:
+        session.close()
+
+
+atexit.register(closeCtmSessions)
+
+
+class CtmApi(object):
+    """
+    AAPI service objects of an ApiClient, each one is created on first use
+    and reused by all calls of the client. Use getCtmApi() to get it.
+    """
+
+    def __init__(self, api_client):
+        self.api_client = api_client
+        self._services = {}
+
+    def _getService(self, name, factory):
+        service = self._services.get(name)
+        if service is None:
+            service = factory(api_client=self.api_client)
+            self._services[name] = service
+        return service
+
+    @property
+    def config(self):
+        """
+        :return: ConfigApi
+        """
+        return self._getService("config", ctm.api.config_api.ConfigApi)
+
+    @property
+    def run(self):
+        """
+        :return: RunApi
+        """
+        return self._getService("run", ctm.api.run_api.RunApi)
+
+    @property
+    def deploy(self):
+        """
+        :return: DeployApi
+        """
+        return self._getService("deploy", ctm.api.deploy_api.DeployApi)
+
+    @property
+    def archive(self):
+        """
+        :return: ArchiveApi
+        """
+        return self._getService("archive", ctm.ArchiveApi)
+
+    @property
+    def reporting(self):
+        """
+        :return: ReportingApi
+        """
+        return self._getService("reporting",
+                                ctm.api.reporting_api.ReportingApi)
+
+
+_ctmApisLock = threading.Lock()
+
+
+def getCtmApi(ctmApiClient):
+    """
+    Get the AAPI service objects of a client, kept on the client so they
+    are released together
+
+    :param ctmApiClient: ApiClient, e.g. from getCtmConnection().api_client
+    :return: service objects
+    :rtype: CtmApi
+    """
+    api = getattr(ctmApiClient, "ctm_api", None)
+    if api is None:
+        with _ctmApisLock:
+            api = getattr(ctmApiClient, "ctm_api", None)
+            if api is None:
+                api = CtmApi(ctmApiClient)
+                ctmApiClient.ctm_api = api
+    return api
+
+
+def ctmModel2Dict(data, none="None"):
+    """
+    Convert an AAPI response model to dict and list content
+
+    Replaces parsing str(model), which broke on values with quotes.
+    None values become "None" as callers expect from the former parsing.
+
+    :param data: AAPI model, list or dict
+    :param none: value for None
+    :return: dict or list
+    """
+    if hasattr(data, "to_dict"):
+        data = data.to_dict()
+    if isinstance(data, dict):
+        items = data.items()
+    elif isinstance(data, list):
+        items = enumerate(data)
+    elif data is None:
+        return none
+    else:
+        return data
+
+    # to_dict() returns new containers, update them in place
+    for key, value in items:
+        if value is None or isinstance(
+                value, (dict, list)) or hasattr(value, "to_dict"):
+            data[key] = ctmModel2Dict(value, none)
+    return data
+
+
+def ctmRawJson(response):
+    """
+    Parse the body of an AAPI call made with _preload_content=False
+
+    :param response: urllib3 response
+    :return: dict or list
+    """
+    try:
+        return json.loads(response.data)
+    finally:
+        response.release_conn()
+
+
 # Main function
 
 
@@ -221,9 +830,8 @@ def getCtmAgents(ctmApiClient, ctmServer):
     :return: list of named tuple: [{'key': 'value'}] access as list[0].key
     """
 
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.config_api.ConfigApi(api_client=ctmApiClient)
-    logger.debug('CTM: API object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).config
     results = ""
 
     # Call CTM AAPI
@@ -231,19 +839,120 @@ def getCtmAgents(ctmApiClient, ctmServer):
         logger.debug('CTM: API Function: %s', "get_agents")
         results = ctmCfgAapi.get_agents(server=ctmServer,
                                         _return_http_data_only=True)
-        results = str(results).replace("\n", '')
-        results = str(results).replace("'", '"')
-        results = str(results).replace("None", '"None"')
-        results = str(results).replace('"                                 "',
-                                       '')
-
-        # logger.debug('CTM: API Result:\n%s', results)
-        results = json.loads(results)
+        results = ctmModel2Dict(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
 
 
+class CtmAgentSnapshots(object):
+    """
+    Agent lists of the Control-M servers, agents by nodeid.
+    A snapshot older than the refresh interval is served while a background
+    thread downloads the list again, one download per server at a time and
+    at most one per refresh interval.
+    :property refresh Seconds before a snapshot is downloaded again
+    """
+
+    def __init__(self, refresh=300):
+        self.refresh = refresh
+        self.cache = cache.TtlCache(name="ctm_agents", ttl=3600, size=16)
+        self.indexes = {}
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def _load(self, ctmApiClient, ctmServer):
+        with self.lock:
+            self.attempts[ctmServer] = time.time()
+        data = getCtmAgents(ctmApiClient=ctmApiClient, ctmServer=ctmServer)
+        if not isinstance(data, dict):
+            # API error, keep the former snapshot
+            return None
+        snapshot = {"loaded": time.time(), "agents": data}
+        self.cache.put((ctmServer, ), snapshot)
+        logger.debug('CTM: Agent snapshot of "%s" loaded', ctmServer)
+        return snapshot
+
+    def _refresh(self, ctmApiClient, ctmServer):
+        try:
+            self._load(ctmApiClient=ctmApiClient, ctmServer=ctmServer)
+        except Exception as err:
+            logger.error('CTM: Agent snapshot of "%s" failed: %s', ctmServer,
+                         err)
+
+    def getSnapshot(self, ctmApiClient, ctmServer, stale=True):
+        """
+        Get the agent snapshot of a server
+
+        :param api_client: property from CTMConnection object
+        :param ctm_server: logical name of the ctm server
+        :param stale: serve an old snapshot while it is refreshed, else wait
+        :return: loaded epoch and agents, None if not available
+        """
+        snapshot = self.cache.get((ctmServer, ))
+        now = time.time()
+        if snapshot is not None and now - snapshot["loaded"] <= self.refresh:
+            return snapshot
+        if snapshot is None or not stale:
+            return self._load(ctmApiClient=ctmApiClient,
+                              ctmServer=ctmServer) or snapshot
+
+        with self.lock:
+            start = now - self.attempts.get(ctmServer, 0) > self.refresh
+            if start:
+                self.attempts[ctmServer] = now
+        if start:
+            threading.Thread(target=self._refresh,
+                             args=(ctmApiClient, ctmServer),
+                             name="w3rkstatt-ctm-agents",
+                             daemon=True).start()
+        return snapshot
+
+    def getAgents(self, ctmApiClient, ctmServer, stale=True):
+        """
+        Get all agents of a server, see getCtmAgents
+
+        :param api_client: property from CTMConnection object
+        :param ctm_server: logical name of the ctm server
+        :param stale: serve an old snapshot while it is refreshed, else wait
+        :return: agents as dict, empty if not available
+        """
+        snapshot = self.getSnapshot(ctmApiClient=ctmApiClient,
+                                    ctmServer=ctmServer,
+                                    stale=stale)
+        if snapshot is None:
+            return ""
+        return snapshot["agents"]
+
+    def getAgent(self, ctmApiClient, ctmServer, ctmAgent, stale=True):
+        """
+        Get an agent of a server
+
+        :param api_client: property from CTMConnection object
+        :param ctm_server: logical name of the ctm server
+        :param ctm_agent: nodeid of the agent
+        :param stale: serve an old snapshot while it is refreshed, else wait
+        :return: agent as dict, None if unknown
+        """
+        snapshot = self.getSnapshot(ctmApiClient=ctmApiClient,
+                                    ctmServer=ctmServer,
+                                    stale=stale)
+        if snapshot is None:
+            return None
+        index = self.indexes.get(ctmServer)
+        if index is None or index[0] != snapshot["loaded"]:
+            agents = {}
+            for agent in snapshot["agents"].get("agents") or []:
+                if isinstance(agent, dict):
+                    agents[agent.get("nodeid")] = agent
+            index = (snapshot["loaded"], agents)
+            self.indexes[ctmServer] = index
+        return index[1].get(ctmAgent)
+
+
+ctmAgentSnapshots = CtmAgentSnapshots(refresh=ctm_agent_refresh)
+
+
 def getCtmServers(ctmApiClient):
     """get all the Servers name and hostname in the system  # noqa: E501
 
@@ -257,20 +966,16 @@ def getCtmServers(ctmApiClient):
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.config_api.ConfigApi(api_client=ctmApiClient)
-    logger.debug('CTM: API object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).config
     results = ""
 
     # Call CTM AAPI
     try:
         logger.debug('CTM: API Function: %s', "get_servers")
         results = ctmCfgAapi.get_servers(_return_http_data_only=True)
-        results = str(results).replace("'", '"')
-        results = str(results).replace("None", '"None"')
-
+        results = ctmModel2Dict(results)
         logger.debug('CTM: API Result:\n%s', results)
-        results = json.loads(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
@@ -290,9 +995,8 @@ def getCtmServerParams(ctmApiClient, ctmServer):
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.config_api.ConfigApi(api_client=ctmApiClient)
-    logger.debug('CTM: API object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).config
     results = ""
 
     # Call CTM AAPI
@@ -300,11 +1004,8 @@ def getCtmServerParams(ctmApiClient, ctmServer):
         logger.debug('CTM: API Function: %s', "get_server_parameters")
         results = ctmCfgAapi.get_server_parameters(server=ctmServer,
                                                    _return_http_data_only=True)
-        results = str(results).replace("'", '"')
-        results = str(results).replace("None", '"None"')
-
+        results = ctmModel2Dict(results)
         logger.debug('CTM: API Result:\n%s', results)
-        results = json.loads(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
@@ -328,9 +1029,8 @@ def getCtmAgentConnectionProfile(ctmApiClient, ctmServer, ctmAgent,
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmDeployAapi = ctm.api.deploy_api.DeployApi(api_client=ctmApiClient)
-    # logger.debug('CTM: API object: %s', ctmDeployAapi)
+    # Shared AAPI service object of the client
+    ctmDeployAapi = getCtmApi(ctmApiClient).deploy
     results = ""
 
     # Call CTM AAPI
@@ -340,11 +1040,9 @@ def getCtmAgentConnectionProfile(ctmApiClient, ctmServer, ctmAgent,
             server=ctmServer,
             agent=ctmAgent,
             type=ctmAppType,
-            _return_http_data_only=True)
-        results = w3rkstatt.dTranslate4Json(data=results)
-
-        # logger.debug('CTM: API Result:\n%s', results)
-        results = json.loads(results)
+            _return_http_data_only=True,
+            _preload_content=False)
+        results = ctmRawJson(results)
     except ctm.rest.ApiException as exp:
         # logger.error('CTM: API Error: %s', exp)
         pass
@@ -366,20 +1064,18 @@ def getCtmCentralConnectionProfile(ctmApiClient, ctmAppType):
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmDeployAapi = ctm.api.deploy_api.DeployApi(api_client=ctmApiClient)
-    # logger.debug('CTM: API object: %s', ctmDeployAapi)
+    # Shared AAPI service object of the client
+    ctmDeployAapi = getCtmApi(ctmApiClient).deploy
     results = ""
 
     # Call CTM AAPI
     try:
         # logger.debug('CTM: API Function: %s', "get_deployed_connection_profiles")
         results = ctmDeployAapi.get_shared_connection_profiles(
-            type=ctmAppType, _return_http_data_only=True)
-        results = w3rkstatt.dTranslate4Json(data=results)
-
-        # logger.debug('CTM: API Result:\n%s', results)
-        results = json.loads(results)
+            type=ctmAppType,
+            _return_http_data_only=True,
+            _preload_content=False)
+        results = ctmRawJson(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
         pass
@@ -403,9 +1099,8 @@ def getDeployedAiJobtypes(ctmApiClient,
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmDeployAapi = ctm.api.deploy_api.DeployApi(api_client=ctmApiClient)
-    # logger.debug('CTM: API object: %s', ctmDeployAapi)
+    # Shared AAPI service object of the client
+    ctmDeployAapi = getCtmApi(ctmApiClient).deploy
     results = ""
     jJobTypes = ""
 
@@ -414,43 +1109,24 @@ def getDeployedAiJobtypes(ctmApiClient,
         # logger.debug('CTM: API Function: %s', "get_deployed_connection_profiles")
         results = ctmDeployAapi.get_deployed_ai_jobtypes(
             _return_http_data_only=True)
-        items = results.jobtypes
-        jJobTypes = ""
-        jJobType = ""
-        for item in items:
-            sTemp = str(item)
-            xTemp = str(sTemp).split("\n")
-            for yTemp in xTemp:
-                xLen = len(xTemp)
-                if xLen == 4:
-                    key = str(yTemp).split("'")[1]
-                    val = str(yTemp).split("'")[3]
-
-                    if "job_type_id" in key:
-                        job_type_id = val
-                    elif "job_type_name" in key:
-                        job_type_name = val
-                    elif "status" in key:
-                        job_status = val
-                    elif "description" in key:
-                        job_description = val
-
+        jJobTypes = []
+        for item in results.jobtypes:
+            jJobType = item.to_dict()
+            job_status = str(jJobType.get("status"))
             if ctmAiJobDeployStatus in job_status:
-                jJobType = '{"job_type_id":"' + job_type_id + '","job_type_name":"' + \
-                    job_type_name + '","status":"' + job_status + '"}'
-                jJobTypes = jJobType + "," + jJobTypes
+                # latest first, as listed before
+                jJobTypes.insert(
+                    0, {
+                        "job_type_id": jJobType.get("job_type_id"),
+                        "job_type_name": jJobType.get("job_type_name"),
+                        "status": job_status
+                    })
             if _localDebugAdvanced:
                 logger.debug('CTM: AI Job Type: %s', jJobType)
 
-        jJobTypes = jJobTypes[:-1]
-        jResult = '{"jobtypes":[' + jJobTypes + ']}'
-
+        results = {"jobtypes": jJobTypes}
         if _localDebugFunctions:
-            logger.debug('CTM: AI Job Types: %s', jResult)
-
-        # Format for function
-        sResult = str(jResult)
-        results = json.loads(sResult)
+            logger.debug('CTM: AI Job Types: %s', results)
 
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
@@ -474,9 +1150,8 @@ def getCtmAgentParams(ctmApiClient, ctmServer, ctmAgent):
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.config_api.ConfigApi(api_client=ctmApiClient)
-    # logger.debug('CTM: API object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).config
     results = ""
 
     # Call CTM AAPI
@@ -485,11 +1160,7 @@ def getCtmAgentParams(ctmApiClient, ctmServer, ctmAgent):
         results = ctmCfgAapi.get_agent_parameters(server=ctmServer,
                                                   agent=ctmAgent,
                                                   _return_http_data_only=True)
-        results = str(results).replace("'", '"')
-        results = str(results).replace("None", '"None"')
-
-        # logger.debug('CTM: API Result:\n%s', results)
-        results = json.loads(results)
+        results = ctmModel2Dict(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
@@ -505,10 +1176,8 @@ def getCtmJobOutput(ctmApiClient, ctmJobID, ctmJobRunId):
     :return: str
                 If the method is called asynchronously, returns the request thread.
     """
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.RunApi(api_client=ctmApiClient)
-    if _localDebugFunctions:
-        logger.debug('CTM: AAPI object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).run
 
     # Call CTM AAPI
     results = ""
@@ -544,6 +1213,194 @@ def getCtmJobOutput(ctmApiClient, ctmJobID, ctmJobRunId):
     return results
 
 
+class CtmJobOutputCapture(object):
+    """
+    Keep the first and last lines of a job output within a byte budget,
+    the complete output can be spilled to a gzip file
+    :property lines Number of lines of the complete output
+    :property size Bytes of the complete output
+    :property dropped Number of lines not kept
+    :property interrupted Output stream ended early
+    :property file Gzip file with the complete output, None without spill
+    """
+
+    def __init__(self,
+                 headLines=None,
+                 tailLines=None,
+                 maxBytes=None,
+                 spillFile=None):
+        self.headLines = ctm_output_head if headLines is None else headLines
+        self.tailLines = ctm_output_tail if tailLines is None else tailLines
+        self.maxBytes = ctm_output_bytes if maxBytes is None else maxBytes
+        self.head = []
+        self.headBytes = 0
+        self.tail = collections.deque()
+        self.tailBytes = 0
+        self.lines = 0
+        self.size = 0
+        self.dropped = 0
+        self.clipped = False
+        self.interrupted = False
+        self.partial = ""
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.file = None
+        self.spill = None
+        if spillFile:
+            # Without a writable spill folder the capture runs without file
+            try:
+                spillFolder = os.path.dirname(spillFile)
+                if spillFolder:
+                    os.makedirs(spillFolder, exist_ok=True)
+                self.spill = gzip.open(spillFile + ".tmp", "wb")
+                self.file = spillFile
+            except OSError as err:
+                logger.error('CTM: Job Output spill file "%s" failed: %s',
+                             spillFile, err)
+
+    @property
+    def truncated(self):
+        return self.dropped > 0 or self.clipped or self.interrupted
+
+    def _addLine(self, line):
+        self.lines += 1
+        budget = self.maxBytes // 2
+        size = len(line.encode("utf-8"))
+        if size > budget:
+            line = line.encode("utf-8")[:budget].decode("utf-8", "ignore")
+            size = len(line.encode("utf-8"))
+            self.clipped = True
+        if len(self.head) < self.headLines and \
+                self.headBytes + size <= budget:
+            self.head.append(line)
+            self.headBytes += size
+            return
+        self.tail.append((line, size))
+        self.tailBytes += size
+        while len(self.tail) > self.tailLines or self.tailBytes > budget:
+            self.tailBytes -= self.tail.popleft()[1]
+            self.dropped += 1
+
+    def feed(self, chunk):
+        """
+        Add a chunk of the job output
+
+        :param chunk: bytes or str
+        """
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        self.size += len(chunk)
+        if self.spill is not None:
+            self.spill.write(chunk)
+        lines = (self.partial + self.decoder.decode(chunk)).split("\n")
+        self.partial = lines.pop()
+        for line in lines:
+            self._addLine(line)
+
+    def close(self):
+        """
+        Finish the capture, complete the spill file
+        """
+        self.partial += self.decoder.decode(b"", final=True)
+        if self.partial:
+            self._addLine(self.partial)
+            self.partial = ""
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+            os.replace(self.file + ".tmp", self.file)
+
+    def getText(self):
+        """
+        Get the kept lines, a marker line replaces the dropped lines
+
+        :return: job output
+        :rtype: str
+        """
+        lines = list(self.head)
+        if self.dropped > 0:
+            lines.append("... " + str(self.dropped) + " lines truncated ...")
+        lines.extend(line for line, size in self.tail)
+        if self.interrupted:
+            lines.append("... output incomplete ...")
+        return "\n".join(lines)
+
+    def getInfo(self):
+        """
+        Get the capture summary for the alert document
+
+        :return: truncated, lines, bytes and spill file
+        :rtype: dict
+        """
+        return {
+            "truncated": self.truncated,
+            "interrupted": self.interrupted,
+            "lines": self.lines,
+            "bytes": self.size,
+            "file": self.file
+        }
+
+
+def captureCtmJobOutput(ctmApiClient,
+                        ctmJobID,
+                        ctmJobRunId,
+                        spillFile=None,
+                        archive=False):
+    """
+    Stream the output of a job into a CtmJobOutputCapture, the output is
+    never held in memory as a whole
+
+    :param api_cli: property from CTMConnection object
+    :param str job_id: The job ID (required)
+    :param int run_no: The execution number in case of multiple executions
+    :param str spill_file: gzip file for the complete output
+    :param bool archive: get the output from the workload archive
+    :return: CtmJobOutputCapture
+    """
+    capture = CtmJobOutputCapture(spillFile=spillFile)
+    if archive:
+        ctmCfgAapi = getCtmApi(ctmApiClient).archive
+        sFunction = "get_archive_job_output"
+    else:
+        ctmCfgAapi = getCtmApi(ctmApiClient).run
+        sFunction = "get_job_output"
+
+    response = None
+    try:
+        if _localDebugFunctions:
+            logger.debug('CTM: AAPI Function: %s', sFunction)
+        response = getattr(ctmCfgAapi, sFunction)(job_id=ctmJobID,
+                                                  run_no=ctmJobRunId,
+                                                  _preload_content=False)
+        for chunk in response.stream(65536):
+            capture.feed(chunk)
+    except ctm.rest.ApiException as exp:
+        logger.error('CTM: AAPI Function: %s', sFunction)
+        logger.error('CTM: AAPI Error: %s', str(exp))
+        sNote = ""
+        try:
+            jMessage = json.loads(exp.body)
+            sNote = str(
+                w3rkstatt.getJsonValue(path="$.errors.[0].message",
+                                       data=jMessage)).strip()
+        except (TypeError, ValueError):
+            pass
+        capture.feed(sNote)
+    except urllib3.exceptions.HTTPError as err:
+        # Connection reset or read timeout, keep the lines read so far
+        logger.error('CTM: AAPI Function: %s', sFunction)
+        logger.error('CTM: Job Output stream interrupted: %s', err)
+        capture.interrupted = True
+    finally:
+        if response is not None:
+            response.release_conn()
+        capture.close()
+
+    if capture.truncated:
+        logger.info('CTM: Job Output truncated: %s lines, %s bytes',
+                    capture.lines, capture.size)
+    return capture
+
+
 def getCtmArchiveJobLog(ctmApiClient, ctmJobID, ctmJobRunCounter):
     # ctm_pwd = w3rkstatt.decrypt(ctm_pwd_sec,"")
     # aapi_client = CtmConnection(host=ctm_host,port=ctm_port, ssl=ctm_ssl, verify_ssl=ctm_ssl_ver,
@@ -555,9 +1412,8 @@ def getCtmArchiveJobLog(ctmApiClient, ctmJobID, ctmJobRunCounter):
     :param api_client: property from CTMConnection object
     :return: list of named tuple: [{'key': 'value'}] access as list[0].key
     """
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.ArchiveApi(api_client=ctmApiClient)
-    logger.debug('CTM: AAPI object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).archive
 
     # Call CTM AAPI
     results = ""
@@ -581,9 +1437,8 @@ def getCtmArchiveJobOutput(ctmApiClient, ctmJobID, ctmJobRunId):
     :param api_client: property from CTMConnection object
     :return: list of named tuple: [{'key': 'value'}] access as list[0].key
     """
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.ArchiveApi(api_client=ctmApiClient)
-    logger.debug('CTM: AAPI object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).archive
 
     # Call CTM AAPI
     results = ""
@@ -612,8 +1467,8 @@ def getCtmJobLog(ctmApiClient, ctmJobID):
     :param api_client: property from CTMConnection object
     :return: list of named tuple: [{'key': 'value'}] access as list[0].key
     """
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.RunApi(api_client=ctmApiClient)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).run
 
     # Call CTM AAPI
     results = ""
@@ -657,9 +1512,8 @@ def getCtmJobStatus(ctmApiClient, ctmServer, ctmOrderID):
     :return: list of named tuple: [{'key': 'value'}] access as list[0].key
     """
 
-    # Instantiate the service aapi_client.api_client
-    # ctmCfgAapi = ctm.api.config_api.ConfigApi(api_client=ctmApiCli)
-    ctmCfgAapi = ctm.api.run_api.RunApi(api_client=ctmApiClient)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).run
     results = ""
     if ctmOrderID == "00000":
         if _localDebugFunctions:
@@ -669,10 +1523,10 @@ def getCtmJobStatus(ctmApiClient, ctmServer, ctmOrderID):
         cmtJobID = ctmServer + ":" + ctmOrderID
         try:
             results = ctmCfgAapi.get_jobs_status_by_filter(jobid=cmtJobID)
-            if len(str(results)) > 0:
+            if results is not None:
                 # Tranform to JSON, require result as dict
                 dResults = results.to_dict()
-                jResults = w3rkstatt.dTranslate4Json(data=dResults)
+                jResults = json.dumps(dResults, default=str)
                 if _localDebugFunctions:
                     logger.debug('CTM: API Function: %s', "get_job_status")
                     logger.debug('CTM: API Result: %s', results)
@@ -705,72 +1559,173 @@ def getCtmJobStatus(ctmApiClient, ctmServer, ctmOrderID):
     return jResults
 
 
-def getCtmAgentStatus(ctmApiClient, ctmAgent):
+def getCtmJobStatusBulk(ctmApiClient,
+                        ctmServer,
+                        ctmOrderIDs=None,
+                        ctmFolders=None):
+    """
+    Retrieve the status of many jobs of a server with as few queries as
+    possible. Folders are queried first, order IDs not found in them are
+    queried in batches of job IDs.
+
+    :param api_cli: property from CTMConnection object
+    :param ctm_server: logical name of the ctm server
+    :param order_ids: list of order_id of the jobs
+    :param folders: list of folder names
+    :return: dict of job status by job_id
+    """
+
+    # Shared AAPI service object of the client
+    ctmRunAapi = getCtmApi(ctmApiClient).run
+    jobStatuses = {}
+    if ctmFolders:
+        query = {
+            "server": ctmServer,
+            "folder": ",".join(sorted(set(ctmFolders)))
+        }
+        jobStatuses.update(_getCtmJobStatusQuery(ctmRunAapi, query))
+
+    jobIds = []
+    for ctmOrderID in ctmOrderIDs or []:
+        ctmJobId = ctmServer + ":" + str(ctmOrderID)
+        if ctmOrderID == "00000" or ctmJobId in jobStatuses:
+            continue
+        if ctmJobId not in jobIds:
+            jobIds.append(ctmJobId)
+
+    for iStart in range(0, len(jobIds), ctm_status_batch):
+        query = {"jobid": ",".join(jobIds[iStart:iStart + ctm_status_batch])}
+        jobStatuses.update(_getCtmJobStatusQuery(ctmRunAapi, query))
+
+    if _localDebugFunctions:
+        logger.debug('CTM: Bulk Job Status: %s jobs, %s job IDs, folders: %s',
+                     len(jobStatuses), len(jobIds), ctmFolders)
+    return jobStatuses
+
+
+def _getCtmJobStatusQuery(ctmRunAapi, query):
+    jobStatuses = {}
+    try:
+        results = ctmRunAapi.get_jobs_status_by_filter(limit=ctm_status_limit,
+                                                       **query)
+    except ctm.rest.ApiException as exp:
+        logger.error('CTM: AAPI Function: %s', "get_jobs_status_by_filter")
+        logger.error('CTM: AAPI Error: %s', str(exp))
+        return jobStatuses
+    if results is None:
+        return jobStatuses
+
+    dResults = results.to_dict()
+    for jobStatus in dResults.get("statuses") or []:
+        jobStatuses.setdefault(jobStatus.get("job_id"), jobStatus)
+    if dResults.get("returned") is not None and dResults.get(
+            "total") is not None and dResults["returned"] < dResults["total"]:
+        logger.warning('CTM: Bulk Job Status truncated: %s of %s',
+                       dResults["returned"], dResults["total"])
+    return jobStatuses
+
+
+class CtmJobStatusBatch(object):
+    """
+    Collect the jobs of pending alerts and retrieve their status with one
+    query per server, e.g. when a failed folder raises many job alerts
+    :property statuses Job status by job_id of all fetched jobs
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.statuses = {}
+
+    def add(self, ctmServer, ctmOrderID, ctmFolder=None):
+        """
+        Add a job to the next fetch
 
-    ctmAgentInfo = getCtmAgents(ctmApiClient, ctm_server)
-    # ctmAgentInfoJson = json.loads(ctmAgentInfo)
-    ctmAgentStatus = w3rkstatt.jsonExtractValues(ctmAgentInfo, "status")
-    return ctmAgentStatus
+        :param ctm_server: logical name of the ctm server
+        :param order_id: order_id of the job
+        :param folder: folder of the job, queried as a whole
+        """
+        orderIds, folders = self.pending.setdefault(ctmServer, ([], set()))
+        orderIds.append(ctmOrderID)
+        if ctmFolder:
+            folders.add(ctmFolder)
+
+    def fetch(self, ctmApiClient):
+        """
+        Retrieve the status of all pending jobs
+
+        :param api_cli: property from CTMConnection object
+        :return: dict of job status by job_id
+        """
+        pending = self.pending
+        self.pending = {}
+        for ctmServer, (orderIds, folders) in pending.items():
+            self.statuses.update(
+                getCtmJobStatusBulk(ctmApiClient=ctmApiClient,
+                                    ctmServer=ctmServer,
+                                    ctmOrderIDs=orderIds,
+                                    ctmFolders=folders))
+        return self.statuses
+
+    def get(self, ctmServer, ctmOrderID):
+        """
+        Get the status of a fetched job
+
+        :param ctm_server: logical name of the ctm server
+        :param order_id: order_id of the job
+        :return: job status as dict, None if unknown
+        """
+        return self.statuses.get(ctmServer + ":" + str(ctmOrderID))
+
+
+def getCtmAgentStatus(ctmApiClient, ctmAgent, ctmServer=None):
+    """
+    Get the status of an agent from the agent snapshot of its server
+
+    :param api_client: property from CTMConnection object
+    :param ctm_agent: nodeid of the agent
+    :param ctm_server: logical name of the ctm server, default CTM.server
+    :return: status, e.g. Available, None if the agent is unknown
+    """
+    if ctmServer is None:
+        ctmServer = ctm_server
+    ctmAgentInfo = ctmAgentSnapshots.getAgent(ctmApiClient=ctmApiClient,
+                                              ctmServer=ctmServer,
+                                              ctmAgent=ctmAgent)
+    if ctmAgentInfo is None:
+        return None
+    return ctmAgentInfo.get("status")
 
 
 def getCtmConnection():
     ctm_pwd_decrypted = w3rkstatt.decryptPwd(data=ctm_pwd,
                                              sKeyFileName=cryptoFile)
 
-    ctmApiCli = CtmConnection(
-        host=ctm_host,
-        port=ctm_port,
-        ssl=ctm_ssl,
-        verify_ssl=ctm_ssl_ver,
-        user=ctm_user,
-        password=ctm_pwd_decrypted,
-        additional_login_header={'accept': 'application/json'})
+    # Reuse the session of the endpoint, no login per call
+    ctmApiCli = getCtmSession(host=ctm_host,
+                              port=ctm_port,
+                              user=ctm_user,
+                              password=ctm_pwd_decrypted,
+                              ssl=ctm_ssl,
+                              verify_ssl=ctm_ssl_ver)
     return ctmApiCli
 
 
 def delCtmConnection(ctmApiObj):
+    # Shared sessions are kept, closeCtmSessions() ends them at program exit
     ctmApiObj.logout()
 
 
 def ctmTest(ctmApiClient):
-    ctmReportInfo = runCtmReport(ctmApiClient=ctmApiClient,
-                                 ctmReportName=ctm_rpt_jsm)
-    ctmReportID = w3rkstatt.jsonExtractSimpleValue(ctmReportInfo, "id")
-    ctmReportInfo = getCtmReportStatus(ctmApiClient=ctmApiClient,
-                                       ctmReportID=ctmReportID)
-    ctmReportStatus = w3rkstatt.jsonExtractSimpleValue(ctmReportInfo, "status")
-
-    while (ctmReportStatus == "PROCESSING") or (
-            ctmReportStatus == "PENDING") or (ctmReportStatus != "SUCCEEDED"):
-        ctmReportInfo = getCtmReportStatus(ctmApiClient=ctmApiClient,
-                                           ctmReportID=ctmReportID)
-        ctmReportStatus = w3rkstatt.jsonExtractSimpleValue(
-            ctmReportInfo, "status")
-        time.sleep(10)
-
-    # ToDo: Review loop
-    # max_attempts = 6
-    # attempts = 0
-    # sleeptime = 10 #in seconds, no reason to continuously try if network is down
-    # while attempts < max_attempts:
-    #     time.sleep(sleeptime)
-    #     try:
-    #         ctmReportInfo   = getCtmReportStatus(ctmApiClient=ctmApiClient,ctmReportID=ctmReportID)
-    #         ctmReportStatus = w3rkstatt.jsonExtractSimpleValue(ctmReportInfo,"status")
-    #         if (ctmReportStatus == "SUCCEEDED"):
-    #             break
-    #     except:
-    #         attempts += 1
-    #         logger.debug('CTM: Report Status Loop: %s', attempts)
-
-    ctmReportUrl = w3rkstatt.jsonExtractSimpleValue(ctmReportInfo, "url")
-    ctmReportData = getCtmReportData(ctmReportUrl)
-    ctmReportJson = w3rkstatt.convertCsv2Json(data=ctmReportData,
-                                              keepDuplicate="last")
-
-    logger.info('CTM Report ID: %s', ctmReportID)
-    logger.info('CTM Report Status: %s', ctmReportStatus)
-    logger.info('CTM Report Url: %s', ctmReportUrl)
+    ctmReportRunner = CtmReportRunner(ctmApiClient=ctmApiClient, cached=True)
+    ctmReport = ctmReportRunner.run(ctmReportNames=[ctm_rpt_jsm])[0]
+    ctmReportJson = None
+    if ctmReport.status == "SUCCEEDED":
+        ctmReportData = getCtmReportCache(ctm_rpt_jsm).query()
+        ctmReportJson = ctmReportData.to_json(orient='records')
+
+    logger.info('CTM Report ID: %s', ctmReport.id)
+    logger.info('CTM Report Status: %s', ctmReport.status)
+    logger.info('CTM Report Url: %s', ctmReport.url)
     logger.info('CTM Report JSON: %s', ctmReportJson)
 
     return
@@ -783,19 +1738,15 @@ def runCtmReport(ctmApiClient, ctmReportName):
     :param api_client: property from CTMConnection object
     :return: list of named tuple: [{'key': 'value'}] access as list[0].key
     """
-    # Instantiate the AAPI object
-    ctmRptAapi = ctm.api.reporting_api.ReportingApi(api_client=ctmApiClient)
-    logger.debug('CTM: API object: %s', ctmRptAapi)
+    # Shared AAPI service object of the client
+    ctmRptAapi = getCtmApi(ctmApiClient).reporting
     # RunReport | The report generation parameters
     ctmReportRun = ctm.RunReport(name=ctmReportName, format="csv")
     # Call CTM AAPI
     try:
         logger.debug('CTM: API Function: %s', "RunReport")
-        results = ctmRptAapi.run_report(body=ctmReportRun,
-                                        async_req=True,
-                                        _return_http_data_only=True)
-
-        ctmRptInfo = results.get()
+        ctmRptInfo = ctmRptAapi.run_report(body=ctmReportRun,
+                                           _return_http_data_only=True)
         ctmRptId = ctmRptInfo.report_id
         ctmRptName = ctmRptInfo.name
         ctmRptStatus = ctmRptInfo.status
@@ -824,9 +1775,8 @@ def getCtmReportStatus(ctmApiClient, ctmReportID):
     :param api_client: property from CTMConnection object
     :return: list of named tuple: [{'key': 'value'}] access as list[0].key
     """
-    # Instantiate the AAPI object
-    ctmRptAapi = ctm.api.reporting_api.ReportingApi(api_client=ctmApiClient)
-    logger.debug('CTM: API object: %s', ctmRptAapi)
+    # Shared AAPI service object of the client
+    ctmRptAapi = getCtmApi(ctmApiClient).reporting
     # Call CTM AAPI
     try:
         logger.debug('CTM: API Function: %s', "RunReport")
@@ -877,10 +1827,10 @@ def getCtmReportData(ctmReportUrl):
 
     # Execute the API call.
     try:
-        response = requests.get(url,
-                                data=payload,
-                                headers=headers,
-                                verify=False)
+        response = http.get(url,
+                            data=payload,
+                            headers=headers,
+                            verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -899,6 +1849,194 @@ def getCtmReportData(ctmReportUrl):
         # exit()
 
 
+def downloadCtmReport(ctmReportUrl, file):
+    """
+    Stream a finished report to a file, the report is never held in memory
+
+    :param str url: report url of getCtmReportStatus
+    :param str file: target file, replaced once the download completed
+    :return: file, None if the download failed
+    """
+    tmpFile = file + ".tmp"
+    try:
+        response = http.get(ctmReportUrl, stream=True)
+        try:
+            if response.status_code != 200:
+                logger.error('HTTP Response Status: %s', response.status_code)
+                return None
+            with open(tmpFile, "wb") as f:
+                for chunk in response.iter_content(chunk_size=65536):
+                    f.write(chunk)
+        finally:
+            response.close()
+        os.replace(tmpFile, file)
+    except (requests.RequestException, OSError) as e:
+        logger.error('CTM: Report download failed: %s', e)
+        return None
+    return file
+
+
+def getCtmReportFileName(ctmReportName):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", ctmReportName)
+
+
+def getCtmReportCache(ctmReportName):
+    """
+    Get the columnar cache of a report, filled by CtmReportRunner
+
+    :param str name: report name
+    :return: core_cache.TableCache
+    """
+    return cache.TableCache(name="ctm_report_" +
+                            getCtmReportFileName(ctmReportName),
+                            partition=ctm_rpt_partitions.get(ctmReportName))
+
+
+class CtmReport(object):
+    """
+    Handle of a submitted report
+    :property name Report name
+    :property id Report ID, None until submitted
+    :property status PENDING, PROCESSING, SUCCEEDED, FAILED
+    :property url Download url of the finished report
+    :property file Downloaded report file
+    """
+
+    def __init__(self, name, file=None):
+        self.name = name
+        self.file = file
+        self.id = None
+        self.status = None
+        self.url = None
+
+
+class CtmReportRunner(object):
+    """
+    Run several reports at once. Status polls back off exponentially up
+    to poll_max seconds and wait without holding a thread, AAPI calls and
+    downloads use the shared HTTP worker threads and pooled sessions.
+
+    reports = CtmReportRunner(ctmApiClient).run(["Jobs", "Services"])
+    """
+
+    def __init__(self,
+                 ctmApiClient,
+                 folder=None,
+                 poll=None,
+                 pollMax=None,
+                 timeout=None,
+                 cached=None):
+        self.ctmApiClient = ctmApiClient
+        self.cached = ctm_rpt_cache if cached is None else cached
+        self.folder = folder or ctm_rpt_folder
+        self.poll = ctm_rpt_poll if poll is None else poll
+        self.pollMax = ctm_rpt_poll_max if pollMax is None else pollMax
+        self.timeout = ctm_rpt_timeout if timeout is None else timeout
+
+    def _submit(self, ctmReportName):
+        ctmRptAapi = getCtmApi(self.ctmApiClient).reporting
+        ctmReportRun = ctm.RunReport(name=ctmReportName, format="csv")
+        return ctmRptAapi.run_report(body=ctmReportRun,
+                                     _return_http_data_only=True)
+
+    def _getStatus(self, ctmReportID):
+        ctmRptAapi = getCtmApi(self.ctmApiClient).reporting
+        return ctmRptAapi.get_report_status(report_id=ctmReportID,
+                                            _return_http_data_only=True)
+
+    def _getFile(self, ctmReport):
+        return os.path.join(
+            self.folder, "ctm_report_" + getCtmReportFileName(ctmReport.name) +
+            "_" + str(ctmReport.id) + ".csv")
+
+    async def runAsync(self, ctmReportName, file=None):
+        """
+        Submit a report, wait for it and download it
+
+        :param str name: report name
+        :param str file: target file, default in the report folder
+        :return: CtmReport
+        """
+        ctmReport = CtmReport(name=ctmReportName, file=file)
+        try:
+            await self._runAsync(ctmReport)
+        except asyncio.CancelledError:
+            raise
+        except ctm.rest.ApiException as exp:
+            logger.error('CTM: API Error: %s', exp)
+            ctmReport.status = "FAILED"
+        except Exception as err:
+            # One failing report must not discard the others
+            logger.error('CTM: Report "%s" failed: %s', ctmReportName, err)
+            ctmReport.status = "FAILED"
+        return ctmReport
+
+    async def _runAsync(self, ctmReport):
+        ctmRptInfo = await http.runAsync(self._submit,
+                                         ctmReport.name,
+                                         limit="ctm_report")
+        ctmReport.id = ctmRptInfo.report_id
+        ctmReport.status = ctmRptInfo.status
+        ctmReport.url = ctmRptInfo.url
+
+        delay = self.poll
+        deadline = time.time() + self.timeout
+        while ctmReport.status in (None, "PENDING", "PROCESSING"):
+            if time.time() > deadline:
+                logger.error('CTM: Report "%s" timed out', ctmReport.name)
+                ctmReport.status = "TIMEOUT"
+                return
+            await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            delay = min(delay * 2, self.pollMax)
+            ctmRptInfo = await http.runAsync(self._getStatus,
+                                             ctmReport.id,
+                                             limit="ctm_report")
+            ctmReport.status = ctmRptInfo.status
+            ctmReport.url = ctmRptInfo.url
+
+        logger.debug('CTM: Report "%s" status: %s', ctmReport.name,
+                     ctmReport.status)
+        if ctmReport.status == "SUCCEEDED":
+            if ctmReport.file is None:
+                ctmReport.file = self._getFile(ctmReport)
+            file = await http.runAsync(downloadCtmReport,
+                                       ctmReport.url,
+                                       ctmReport.file,
+                                       limit="ctm_report")
+            if file is None:
+                ctmReport.status = "FAILED"
+            elif self.cached:
+                ctmReportCache = getCtmReportCache(ctmReport.name)
+                await http.runAsync(ctmReportCache.store,
+                                    file=file,
+                                    keepDuplicate="last",
+                                    limit="ctm_report")
+
+    async def runAllAsync(self, ctmReportNames):
+        """
+        Run reports concurrently
+
+        :param list names: report names
+        :return: list of CtmReport in the order of names
+        """
+        return await asyncio.gather(
+            *[self.runAsync(name) for name in ctmReportNames])
+
+    def run(self, ctmReportNames):
+        """
+        Run reports concurrently from blocking code
+
+        :param list names: report names
+        :return: list of CtmReport in the order of names
+        """
+        # asyncio.run needs Python 3.7
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.runAllAsync(ctmReportNames))
+        finally:
+            loop.close()
+
+
 def getCtmHostGroupMembers(ctmApiClient, ctmServer, ctmHostGroup):
     """get hostgroup agents  # noqa: E501
 
@@ -914,10 +2052,8 @@ def getCtmHostGroupMembers(ctmApiClient, ctmServer, ctmHostGroup):
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.config_api.ConfigApi(api_client=ctmApiClient)
-    if _localDebugFunctions:
-        logger.debug('CTM: API object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).config
     results = ""
 
     # Call CTM AAPI
@@ -927,10 +2063,9 @@ def getCtmHostGroupMembers(ctmApiClient, ctmServer, ctmHostGroup):
         results = ctmCfgAapi.get_hosts_in_group(server=ctmServer,
                                                 hostgroup=ctmHostGroup,
                                                 _return_http_data_only=True)
-        results = str(results).replace("'", '"')
+        results = ctmModel2Dict(results, none=None)
         if _localDebugFunctions:
             logger.debug('CTM: API Result: %s', results)
-        results = json.loads(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
@@ -950,10 +2085,8 @@ def getCtmHostGroups(ctmApiClient, ctmServer):
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.config_api.ConfigApi(api_client=ctmApiClient)
-    if _localDebugFunctions:
-        logger.debug('CTM: API object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).config
     results = ""
 
     # Call CTM AAPI
@@ -962,10 +2095,9 @@ def getCtmHostGroups(ctmApiClient, ctmServer):
             logger.debug('CTM: API Function: %s', "get_hosts_in_group")
         results = ctmCfgAapi.get_hostgroups(server=ctmServer,
                                             _return_http_data_only=True)
-        results = str(results).replace("'", '"')
+        results = ctmModel2Dict(results, none=None)
         if _localDebugFunctions:
             logger.debug('CTM: API Result: %s', results)
-        results = json.loads(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
@@ -985,10 +2117,8 @@ def getCtmRemoteHosts(ctmApiClient, ctmServer):
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.config_api.ConfigApi(api_client=ctmApiClient)
-    if _localDebugFunctions:
-        logger.debug('CTM: API object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).config
     results = ""
 
     # Call CTM AAPI
@@ -997,10 +2127,9 @@ def getCtmRemoteHosts(ctmApiClient, ctmServer):
             logger.debug('CTM: API Function: %s', "get_remote_hosts")
         results = ctmCfgAapi.get_remote_hosts(server=ctmServer,
                                               _return_http_data_only=True)
-        results = str(results).replace("'", '"')
+        results = ctmModel2Dict(results, none=None)
         if _localDebugFunctions:
             logger.debug('CTM: API Result: %s', results)
-        results = json.loads(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
@@ -1021,10 +2150,8 @@ def getRemoteHostProperties(ctmApiClient, ctmServer, ctmRemoteHost):
                 returns the request thread.
     """
 
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.config_api.ConfigApi(api_client=ctmApiClient)
-    if _localDebugFunctions:
-        logger.debug('CTM: API object: %s', ctmCfgAapi)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).config
     results = ""
 
     # Call CTM AAPI
@@ -1035,64 +2162,56 @@ def getRemoteHostProperties(ctmApiClient, ctmServer, ctmRemoteHost):
             server=ctmServer,
             remotehost=ctmRemoteHost,
             _return_http_data_only=True)
-        results = w3rkstatt.dTranslate4Json(data=results)
+        results = ctmModel2Dict(results, none=None)
 
         if _localDebugFunctions:
             logger.debug('CTM: API Result: %s', results)
-        results = json.loads(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
 
 
-def getCtmJobInfo(ctmApiClient, ctmServer, ctmOrderID):
-    ctmJobInfo = getCtmJobStatus(ctmApiClient=ctmApiClient,
-                                 ctmServer=ctmServer,
-                                 ctmOrderID=ctmOrderID)
-    if _localQA:
-        logger.info('CMT QA Get Job Status: %s', ctmJobInfo)
+def getCtmJobInfo(ctmApiClient, ctmServer, ctmOrderID, jobStatuses=None):
+    """
+    Get the beautified status of a job
 
-    # Get counter of CTM Job Info
+    :param api_cli: property from CTMConnection object
+    :param ctm_server: logical name of the ctm server
+    :param order_id: order_id of the job
+    :param job_statuses: dict of job status by job_id, see CtmJobStatusBatch
+    :return: job info as JSON string
+    """
     ctmJobId = ctmServer + ":" + ctmOrderID
-    jPath = "$.statuses[?(@.job_id=='" + ctmJobId + "')]"
-    jData = json.loads(ctmJobInfo)
-    jRecords = int(w3rkstatt.getJsonValue(path="$.total", data=jData))
+    if jobStatuses is not None and ctmJobId in jobStatuses:
+        # Job status of a bulk lookup
+        jRecords = 1
+        jJobStatus = jobStatuses[ctmJobId]
+    else:
+        ctmJobInfo = getCtmJobStatus(ctmApiClient=ctmApiClient,
+                                     ctmServer=ctmServer,
+                                     ctmOrderID=ctmOrderID)
+        if _localQA:
+            logger.info('CMT QA Get Job Status: %s', ctmJobInfo)
+
+        # Get counter of CTM Job Info
+        jData = json.loads(ctmJobInfo)
+        jRecords = int(w3rkstatt.getJsonValue(path="$.total", data=jData))
+        jJobStatus = None
+        for jStatus in jData.get("statuses") or []:
+            if jStatus.get("job_id") == ctmJobId:
+                jJobStatus = jStatus
+                break
     sStatus = False
     iCounter = None
 
     # Assign default
     jJobInfo = '{"count":' + str(None) + '}'
 
-    if jRecords >= 1:
+    if jRecords >= 1 and jJobStatus is not None:
         sStatus = True
         iCounter = int(jRecords)
-        # Extract CTM Job Info
-        jJobInfo = w3rkstatt.getJsonValue(path=jPath, data=jData)
-        # beutify job info
-        for (key, value) in jJobInfo.items():
-            if key == "start_time":
-                if value is not None or not "None" in str(value):
-                    value = extractCtmAlertDate(data=value)
-                jJobInfo[key] = value
-            if key == "end_time":
-                if value is not None or not "None" in str(value):
-                    value = extractCtmAlertDate(data=value)
-                jJobInfo[key] = value
-            if key == "estimated_end_time":
-                if value is not None or not "None" in str(value):
-                    value = value[0]
-                    value = extractCtmAlertDate(data=value)
-                jJobInfo[key] = value
-            if key == "estimated_start_time":
-                if value is not None or not "None" in str(value):
-                    value = value[0]
-                    value = extractCtmAlertDate(data=value)
-                jJobInfo[key] = value
-            if key == "order_date":
-                if value is not None or not "None" in str(value):
-                    value = extractCtmOrderDate(data=value)
-                jJobInfo[key] = value
-
+        # Extract CTM Job Info, beutify job info
+        jJobInfo = transformCtmJobStatuses([jJobStatus])[0]
         jJobInfo["count"] = len(jJobInfo)
 
     elif jRecords == 0:
@@ -1137,25 +2256,35 @@ def getCtmJobStatusAdv(ctmApiClient, ctmServer, ctmOrderID):
     return ctmJobStatus
 
 
-def getCtmDeployedFolder(ctmApiClient, ctmServer, ctmFolder):
+def getCtmDeployedFolder(ctmApiClient, ctmServer, ctmFolder, cached=True):
     """Get deployed jobs that match the search criteria.  # noqa: E501
         Get definition of jobs and folders (in the desired format - JSON or XML) that match the requested search criteria.  # noqa: E501
         This method makes a synchronous HTTP request by default. To make an
         asynchronous HTTP request, please pass async_req=True
 
+        Successful results are kept for DEFAULT.cache.ttl.ctm_folder seconds.
+
         :param async_req bool
         :param str format: Output format (json or xml)
         :param str folder:
         :param str ctm:
         :param str server:
+        :param bool cached: use a cached folder definition if available
         :return: str
                  If the method is called asynchronously,
                  returns the request thread.
         """
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.DeployApi(api_client=ctmApiClient)
-    if _localDebugFunctions:
-        logger.debug('CTM: AAPI object: %s', ctmCfgAapi)
+    folderKey = (ctmServer, ctmFolder)
+    if cached:
+        results = folderCache.get(folderKey)
+        if results is not None:
+            if _localDebugFunctions:
+                logger.debug('CTM: Cached Folder: "%s @ %s"', ctmFolder,
+                             ctmServer)
+            return results
+
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).deploy
 
     # Call CTM AAPI
     results = ""
@@ -1163,6 +2292,8 @@ def getCtmDeployedFolder(ctmApiClient, ctmServer, ctmFolder):
         results = ctmCfgAapi.get_deployed_folders_new(format="json",
                                                       folder=ctmFolder,
                                                       server=ctmServer)
+        if results is not None:
+            folderCache.put(folderKey, results)
         if _localDebugFunctions:
             logger.debug('CTM: AAPI Function: %s', "get_deployed_folders_new")
             logger.debug('CTM: AAPI Result: %s', results)
@@ -1182,6 +2313,77 @@ def getCtmDeployedFolder(ctmApiClient, ctmServer, ctmFolder):
     return results
 
 
+class CtmFolderIndex(object):
+    """
+    Job definitions of deployed folders by job name, including sub-folders
+    :property jobs Job definition by (folder path, job name)
+    :property names Job definition by job name, first match
+    :property folders Folder definition by folder path, e.g. DCO/SUB
+    """
+
+    def __init__(self, data):
+        self.jobs = {}
+        self.names = {}
+        self.folders = {}
+        for (name, value) in data.items():
+            if isinstance(value, dict):
+                self._add(name, value)
+
+    def _add(self, path, folder):
+        self.folders[path] = folder
+        for (name, value) in folder.items():
+            if not isinstance(value, dict):
+                continue
+            sType = str(value.get("Type", ""))
+            if sType.startswith("Job"):
+                self.jobs[(path, name)] = value
+                self.names.setdefault(name, value)
+            elif "Folder" in sType:
+                self._add(path + "/" + name, value)
+
+    def get(self, ctmJob, ctmFolder=None):
+        """
+        Get the definition of a job
+
+        :param str job: job name
+        :param str folder: folder path of the job, e.g. DCO/SUB
+        :return: job definition as dict, None if unknown
+        """
+        if ctmFolder:
+            return self.jobs.get((ctmFolder, ctmJob))
+        return self.names.get(ctmJob)
+
+
+def getCtmFolderIndex(ctmApiClient, ctmServer, ctmFolder):
+    """
+    Get the job index of a deployed folder, built once per folder download
+
+    :param api_cli: property from CTMConnection object
+    :param str server: logical name of the ctm server
+    :param str folder: folder or sub-folder path
+    :return: CtmFolderIndex, None if the folder is not available
+    """
+    ctmFolder = str(ctmFolder).split("/")[0]
+
+    def loadIndex():
+        results = getCtmDeployedFolder(ctmApiClient=ctmApiClient,
+                                       ctmServer=ctmServer,
+                                       ctmFolder=ctmFolder)
+        if not isinstance(results, str):
+            return None
+        try:
+            jFolders = json.loads(w3rkstatt.dTranslate4Json(data=results))
+        except ValueError:
+            logger.error('CTM: Folder not indexed: "%s @ %s"', ctmFolder,
+                         ctmServer)
+            return None
+        if not isinstance(jFolders, dict) or "errors" in jFolders:
+            return None
+        return CtmFolderIndex(jFolders)
+
+    return folderIndexCache.get((ctmServer, ctmFolder), load=loadIndex)
+
+
 def translateCtmAlertStatus(data):
     # http://documents.bmc.com/supportu/9.0.19/help/Main_help/en-US/index.htm#45731.htm
     if "Not_Noticed" in data:
@@ -1267,34 +2469,130 @@ def extractCtmAlertType(data):
     return value
 
 
+class CtmTimestampCodec(object):
+    """
+    Convert Control-M timestamps, memoize the recent values
+    as alerts of a burst share a few seconds
+    :property size Max. memoized values per format
+    """
+
+    def __init__(self, size=4096):
+        self.size = size
+        self.memo = {}
+        for kind in self.formats:
+            self.memo[kind] = {}
+
+    @staticmethod
+    def _timestamp(data):
+        # 20200526225736 > 2020-05-26 22:57:36
+        return (data[0:4] + "-" + data[4:6] + "-" + data[6:8] + " " +
+                data[8:10] + ":" + data[10:12] + ":" + data[12:])
+
+    @staticmethod
+    def _minute(data):
+        # 202005262257 > 2020-05-26 22:57
+        return (data[0:4] + "-" + data[4:6] + "-" + data[6:8] + " " +
+                data[8:10] + ":" + data[10:12])
+
+    @staticmethod
+    def _calendar(data):
+        # 20200526225736 > 20200526
+        return data[0:8]
+
+    @staticmethod
+    def _orderDate(data):
+        # 200526 > 2020-05-26
+        return "20" + data[0:2] + "-" + data[2:4] + "-" + data[4:6]
+
+    formats = {
+        "timestamp": _timestamp.__func__,
+        "minute": _minute.__func__,
+        "calendar": _calendar.__func__,
+        "order_date": _orderDate.__func__
+    }
+
+    def decode(self, data, kind="timestamp"):
+        """
+        Convert a timestamp
+
+        :param str data: Control-M timestamp
+        :param str kind: timestamp, minute, calendar or order_date
+        :return: converted timestamp
+        :rtype: str
+        """
+        memo = self.memo[kind]
+        value = memo.get(data)
+        if value is None:
+            value = self.formats[kind](data)
+            if len(memo) >= self.size:
+                memo.clear()
+            memo[data] = value
+        return value
+
+    def decodeAll(self, data, kind="timestamp"):
+        """
+        Convert a list of timestamps, each distinct value once
+
+        :param list data: Control-M timestamps
+        :param str kind: timestamp, minute, calendar or order_date
+        :return: converted timestamps, same order
+        :rtype: list
+        """
+        values = {}
+        for entry in data:
+            if entry not in values:
+                values[entry] = self.decode(entry, kind)
+        return [values[entry] for entry in data]
+
+
+ctmTimestamps = CtmTimestampCodec(
+    size=cache.getCacheSetting("size", "ctm_timestamp", 4096))
+
+# Job status fields converted by transformCtmJobStatuses
+ctm_status_times = {
+    "start_time": ("timestamp", False),
+    "end_time": ("timestamp", False),
+    "estimated_end_time": ("timestamp", True),
+    "estimated_start_time": ("timestamp", True),
+    "order_date": ("order_date", False)
+}
+
+
+def transformCtmJobStatuses(data):
+    """
+    Beautify the times of job statuses, all statuses at once
+
+    :param list data: job statuses, e.g. of getCtmJobStatusBulk
+    :return: copies of the statuses with converted times
+    :rtype: list
+    """
+    jStatuses = [dict(jStatus) for jStatus in data]
+    for (key, (kind, estimated)) in ctm_status_times.items():
+        jRows = [jStatus for jStatus in jStatuses if key in jStatus]
+        jRows = [jStatus for jStatus in jRows if jStatus[key] is not None]
+        if estimated:
+            values = [jStatus[key][0] for jStatus in jRows]
+        else:
+            values = [jStatus[key] for jStatus in jRows]
+        for (jStatus, value) in zip(jRows,
+                                    ctmTimestamps.decodeAll(values, kind)):
+            jStatus[key] = value
+    return jStatuses
+
+
 def extractCtmAlertDate(data):
     # 2020-05-26 22:57:36
-    sYear = data[0:4]
-    sMonth = data[4:6]
-    sDay = data[6:8]
-    sHour = data[8:10]
-    sMin = data[10:12]
-    sSec = data[12:]
-    sDate = sYear + "-" + sMonth + "-" + sDay + \
-        " " + sHour + ":" + sMin + ":" + sSec
-    return sDate
+    return ctmTimestamps.decode(data, "timestamp")
 
 
 def extractCtmDate(data):
-    # 2020-05-26 22:57:36
-    sYear = data[0:4]
-    sMonth = data[4:6]
-    sDay = data[6:8]
-    sHour = data[8:10]
-    sMin = data[10:12]
-    sDate = sYear + "-" + sMonth + "-" + sDay + " " + sHour + ":" + sMin
-    return sDate
+    # 2020-05-26 22:57
+    return ctmTimestamps.decode(data, "minute")
 
 
 def extractCtmAlertCal(data):
     # 20200525
-    sDate = data[0:8]
-    return sDate
+    return ctmTimestamps.decode(data, "calendar")
 
 
 def extractCtmAlertDataCenter(data):
@@ -1306,316 +2604,466 @@ def extractCtmAlertDataCenter(data):
 
 
 def extractCtmOrderDate(data):
-    # 2020-05-26 22:57:36
-    sYear = data[0:2]
-    sMonth = data[2:4]
-    sDay = data[4:6]
-    sDate = "20" + sYear + "-" + sMonth + "-" + sDay
-    return sDate
+    # 2020-05-26
+    return ctmTimestamps.decode(data, "order_date")
+
+
+class CtmDataCenterIndex(object):
+    """
+    Data centers of the config by name, network details resolved once
+    :property hosts Host by data center name, first entry wins
+    :property first Name and host of the first data center
+    """
+
+    def __init__(self, data):
+        self.hosts = {}
+        self.first = None
+        self.network = {}
+        self.lock = threading.Lock()
+        datacenters = []
+        if isinstance(data, dict) and isinstance(data.get("CTM"), dict):
+            datacenters = data["CTM"].get("datacenter") or []
+        for entry in datacenters:
+            if not isinstance(entry, dict):
+                continue
+            if self.first is None:
+                self.first = (entry.get("name"), entry.get("host"))
+            if "host" in entry:
+                self.hosts.setdefault(str(entry.get("name")), entry["host"])
+
+    def getHost(self, name):
+        """
+        Get the host of a data center
+
+        :param str name: data center name
+        :return: host, empty if the data center is unknown
+        :rtype: str
+        """
+        return self.hosts.get(str(name), "")
+
+    def resolve(self, hostname):
+        """
+        Get IP, FQDN and domain of a host, looked up on first use
+
+        :param str hostname: host name
+        :return: ip, fqdn, domain
+        :rtype: tuple
+        """
+        network = self.network.get(hostname)
+        if network is None:
+            with self.lock:
+                network = self.network.get(hostname)
+                if network is None:
+                    network = (w3rkstatt.getHostIP(hostname=hostname),
+                               w3rkstatt.getHostFqdn(hostname=hostname),
+                               w3rkstatt.getHostDomain(hostname=hostname))
+                    self.network[hostname] = network
+        return network
+
+    def get(self, name):
+        """
+        Get host and network details of a data center
+
+        :param str name: data center name
+        :return: host, ip, fqdn, domain; None if the host is unknown
+        :rtype: dict
+        """
+        host = self.getHost(name)
+        if host is None or len(host) <= 1:
+            return None
+        (ip, fqdn, dns) = self.resolve(host)
+        return {"host": host, "ip": ip, "fqdn": fqdn, "dns": dns}
+
+
+_ctmDataCenterIndex = None
+_ctmDataCenterConfig = None
+_ctmDataCenterLock = threading.Lock()
+
+
+def _getProjectConfigStamp():
+    try:
+        stat = os.stat(w3rkstatt.getProjectConfigFileName())
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def getCtmDataCenterIndex(reload=False):
+    """
+    Get the data center index, rebuilt once the project config file changed
+
+    :param bool reload: rebuild from a fresh copy of the project config
+    :return: data center index
+    :rtype: CtmDataCenterIndex
+    """
+    global _ctmDataCenterIndex, _ctmDataCenterConfig
+    stamp = _getProjectConfigStamp()
+    index = _ctmDataCenterIndex
+    if index is not None and not reload and stamp == _ctmDataCenterConfig:
+        return index
+    with _ctmDataCenterLock:
+        if _ctmDataCenterIndex is None and not reload:
+            data = jCfgData
+        else:
+            data = w3rkstatt.getProjectConfig()
+            logger.debug('CTM Data Center: Reload from project config')
+        _ctmDataCenterIndex = CtmDataCenterIndex(data)
+        _ctmDataCenterConfig = stamp
+        return _ctmDataCenterIndex
+
+
+class CtmAlertState(object):
+    """
+    Values collected by the field handlers of trasnformtCtmAlert
+    """
+
+    def __init__(self):
+        self.alias = None
+        self.ctmJobRunId = None
+        self.ctmOrderId = None
+        self.ctmJobId = None
+        self.ctmJobScript = None
+        self.data_center_ip = None
+        self.data_center_fqdn = None
+        self.data_center_dns = None
+        self.host_name = None
+        self.host_ip = None
+        self.host_ip_fqdn = None
+        self.host_ip_dns = None
+        self.summary = None
+        self.notes = None
+        self.sAgentStatus = None
+        self.sDataCenterStatus = None
+        self.ctmUpdateDate = None
+        self.sAlertCat = None
+        self.sSystemStatus = None
+
+    def setHost(self, hostname):
+        self.host_ip = w3rkstatt.getHostIP(hostname=hostname)
+        self.host_ip_fqdn = w3rkstatt.getHostFqdn(hostname=hostname)
+        self.host_ip_dns = w3rkstatt.getHostDomain(hostname=hostname)
+
+    def setDataCenter(self, network):
+        if network is None:
+            self.data_center_ip = None
+            self.data_center_fqdn = None
+            self.data_center_dns = None
+        else:
+            self.data_center_ip = network["ip"]
+            self.data_center_fqdn = network["fqdn"]
+            self.data_center_dns = network["dns"]
+
+
+class CtmMessageClassifier(object):
+    """
+    Find the type of an alert message with one compiled pattern
+    Every rule is a lookahead, so overlapping matches are all seen
+    :property rules Message rules, the first matching rule wins
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        patterns = []
+        for (i, rule) in enumerate(rules):
+            pattern = rule["match"]
+            if not rule.get("regex"):
+                pattern = re.escape(pattern)
+            patterns.append("(?=(?P<r" + str(i) + ">" + pattern + "))")
+        self.pattern = re.compile("|".join(patterns)) if patterns else None
+
+    def classify(self, message):
+        """
+        Get the rule of a message
+
+        :param str message: alert message
+        :return: rule, None if no rule matches
+        :rtype: dict
+        """
+        if self.pattern is None:
+            return None
+        best = None
+        for match in self.pattern.finditer(message):
+            index = int(match.lastgroup[1:])
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        if best is None:
+            return None
+        return self.rules[best]
+
+
+def _getCtmAlertJobRunId(jCtmAlert):
+    return jCtmAlert.get("data_center", "") + ":" + jCtmAlert.get(
+        "order_id", "")
+
+
+def _onCtmAlertCallType(jCtmAlert, key, value, state):
+    jCtmAlert[key] = translateCtmAlertUpdateType(data=value)
+
+
+def _onCtmAlertTime(jCtmAlert, key, value, state):
+    if value is not None:
+        jCtmAlert[key] = extractCtmAlertDate(data=value)
+        state.ctmUpdateDate = extractCtmAlertCal(value)
+
+
+def _onCtmAlertMemname(jCtmAlert, key, value, state):
+    # Mainframe job type
+    if value is not None:
+        logger.debug('CTM Alert Entry: %s=%s', key, value)
+        if value == "None":
+            state.ctmJobScript = None
+        else:
+            state.ctmJobScript = value
+
+
+def _onCtmAlertXtime(jCtmAlert, key, value, state):
+    # X-Alert
+    jCtmAlert[key] = extractCtmAlertDate(data=value)
+    if key == "Xtime":
+        state.sAlertCat = "infrastructure"
+
+
+def _onCtmAlertType(jCtmAlert, key, value, state):
+    jCtmAlert[key] = extractCtmAlertType(data=value)
+
+
+def _onCtmAlertSeverity(jCtmAlert, key, value, state):
+    jCtmAlert[key] = translateCtmAlertSeverity(data=value)
+
+
+def _onCtmAlertStatus(jCtmAlert, key, value, state):
+    jCtmAlert[key] = translateCtmAlertStatus(data=value)
+
+
+def _onCtmAlertRunCounter(jCtmAlert, key, value, state):
+    if value is not None:
+        state.ctmOrderId = jCtmAlert.get("order_id", "")
+        state.ctmJobId = _getCtmAlertJobRunId(jCtmAlert)
+
+
+def _onCtmAlertDataCenter(jCtmAlert, key, value, state):
+    # get data center details from the indexed config
+    state.setDataCenter(getCtmDataCenterIndex().get(value))
+
+
+def _onCtmAlertHostId(jCtmAlert, key, value, state):
+    if value is not None and len(value) > 0:
+        state.setHost(value)
+
+
+def _onCtmAlertComponentMachine(jCtmAlert, key, value, state):
+    state.setHost(value)
+    state.alias = ctm_alert_cdmclass + ":" + value + ":" + state.host_ip_dns
+
+    dataCenters = getCtmDataCenterIndex()
+    (data_center_name, data_center_host) = dataCenters.first
+    (ip, fqdn, dns) = dataCenters.resolve(data_center_host)
+    jCtmAlert["data_center"] = data_center_name
+    state.setDataCenter({"ip": ip, "fqdn": fqdn, "dns": dns})
+
+
+def _onCtmAlertMessage(jCtmAlert, key, value, state):
+    rule = ctmMessageClassifier.classify(value)
+    sType = "generic" if rule is None else rule["type"]
+    handler = _ctmAlertMessageTypes.get(sType)
+    if handler is None:
+        logger.warning('CTM Alert: Unknown message type: "%s"', sType)
+        handler = _onCtmMessageGeneric
+    handler(jCtmAlert, value, state, rule or {})
+
+
+def _onCtmMessageAgent(jCtmAlert, value, state, rule):
+    # STATUS OF AGENT PLATFORM <host> CHANGED TO <status>
+    sTemp = value.split()
+    state.host_name = sTemp[4]
+    state.setHost(state.host_name)
+    jCtmAlert["host_id"] = state.host_name
+    state.alias = ctm_alert_cdmclass + ":" + state.host_name + ":" + \
+        state.host_ip_dns
+    state.sAgentStatus = sTemp[7]
+    state.sAlertCat = "agent"
+
+
+def _onCtmMessageDataCenter(jCtmAlert, value, state, rule):
+    # DATA CENTER <name> WAS <status>
+    sTemp = value.split()
+    state.host_name = sTemp[2]
+    state.setHost(state.host_name)
+    state.alias = ctm_alert_cdmclass + ":" + state.host_name + ":" + \
+        state.host_ip_dns
+    state.sDataCenterStatus = sTemp[4]
+    state.sAlertCat = "datacenter"
+
+
+def _onCtmMessageConfigAgent(jCtmAlert, value, state, rule):
+    sTemp = value.split()
+    state.host_name = sTemp[2]
+    state.setHost(state.host_name)
+    jCtmAlert['host_id'] = state.host_ip_fqdn
+    state.sAlertCat = "infrastructure"
+    if "not responding" in value:
+        jCtmAlert['system_status'] = "Not responding"
+    else:
+        jCtmAlert['system_status'] = "TBD"
+
+
+def _onCtmMessageJobFailed(jCtmAlert, value, state, rule):
+    state.ctmJobRunId = _getCtmAlertJobRunId(jCtmAlert)
+    job_name = jCtmAlert.get("job_name", "")
+    run_counter = jCtmAlert.get("run_counter", "")
+    if job_name is None and rule.get("type") != "job_failed":
+        state.summary = value
+        state.notes = "CTRL-M Job failed. Job ID: " + \
+            state.ctmJobRunId + " with Job Run Count: " + run_counter
+    else:
+        state.summary = "Job " + job_name + " failed"
+        state.notes = "CTRL-M Job " + job_name + " failed. Job ID: " + \
+            state.ctmJobRunId + " with Job Run Count: " + run_counter
+    state.sAlertCat = "job"
+    state.sSystemStatus = "failed"
+
+
+def _onCtmMessageGeneric(jCtmAlert, value, state, rule):
+    state.summary = value
+    state.notes = value
+    if rule.get("category") is not None:
+        state.sAlertCat = rule["category"]
+    if rule.get("status") is not None:
+        state.sSystemStatus = rule["status"]
+
+
+def _onCtmAlertComponentMessage(jCtmAlert, key, value, state):
+    state.summary = value
+    state.notes = "CTRL-M Component " + value + ". Managed by: " + \
+        state.host_ip_fqdn
+    if "Distributed Control-M/EM Configuration Agent" in value:
+        sTemp = value.split()
+        state.host_name = sTemp[5]
+        state.setHost(state.host_name)
+        jCtmAlert['host_id'] = state.host_ip_fqdn
+
+        state.alias = ctm_alert_cdmclass + ":" + state.host_name + ":" + \
+            state.host_ip_dns
+        state.sAlertCat = "infrastructure"
+        if "not responding" in value:
+            state.sSystemStatus = "Not responding"
+        else:
+            state.sSystemStatus = "TBD"
+
+
+def _onCtmAlertRunAs(jCtmAlert, key, value, state):
+    if value and "Gateway" in value:
+        state.sAlertCat = "server"
+        if "WAS DISCONNECTED" in value:
+            jCtmAlert['system_status'] = "Was Disconnected"
+        else:
+            jCtmAlert['system_status'] = "TBD"
+
+
+# Alert field handlers, called in the order of the alert fields
+_ctmAlertFields = {
+    "call_type": _onCtmAlertCallType,
+    "send_time": _onCtmAlertTime,
+    "last_time": _onCtmAlertTime,
+    "memname": _onCtmAlertMemname,
+    "Xtime": _onCtmAlertXtime,
+    "Xtime_of_last": _onCtmAlertXtime,
+    "alert_type": _onCtmAlertType,
+    "severity": _onCtmAlertSeverity,
+    "status": _onCtmAlertStatus,
+    "run_counter": _onCtmAlertRunCounter,
+    "data_center": _onCtmAlertDataCenter,
+    "host_id": _onCtmAlertHostId,
+    "Component_machine": _onCtmAlertComponentMachine,
+    "message": _onCtmAlertMessage,
+    "Message": _onCtmAlertComponentMessage,
+    "run_as": _onCtmAlertRunAs
+}
+
+# Message types of CTM.alerts.messages rules
+_ctmAlertMessageTypes = {
+    "agent": _onCtmMessageAgent,
+    "datacenter": _onCtmMessageDataCenter,
+    "config_agent": _onCtmMessageConfigAgent,
+    "job_failed": _onCtmMessageJobFailed,
+    "job_order_failed": _onCtmMessageJobFailed,
+    "generic": _onCtmMessageGeneric
+}
+
+ctmMessageClassifier = CtmMessageClassifier(ctm_alert_messages)
 
 
 def trasnformtCtmAlert(data):
-    alias = None
-    cdmclass = "BMC_ApplicationService"
-    ctmJobRunId = None
-    ctmOrderId = None
-    ctmJobId = None
-    ctmJobPlatform = None
-    ctmJobScript = None
-    data_center_ip = None
-    data_center_fqdn = None
-    data_center_dns = None
-    host_ip = None
-    host_ip_fqdn = None
-    host_ip_dns = None
-    summary = None
-    notes = None
-    sAgentStatus = None
-    sDataCenterStatus = None
-    ctmUpdateDate = None
-    sAlertCat = None
-    sSystemStatus = None
-
-    if "data_center" not in data:
-        data.update({'data_center': None})
-
-    if "host_id" not in data:
-        data.update({'host_id': None})
-
-    if "host_ip" not in data:
-        data.update({'host_ip': None})
-
-    if "host_ip_fqdn" not in data:
-        data.update({'host_ip_fqdn': None})
-
-    if "host_ip_dns" not in data:
-        data.update({'host_ip_dns': None})
-
-    if "system_status" not in data:
-        data.update({'system_status': None})
+    state = CtmAlertState()
+
+    for key in ("data_center", "host_id", "host_ip", "host_ip_fqdn",
+                "host_ip_dns", "system_status"):
+        if key not in data:
+            data.update({key: None})
 
     jCtmAlert = data
-    # ctmDataCenter = w3rkstatt.getJsonValue(path="$.data_center", data=jCtmAlert)
     for (key, value) in jCtmAlert.items():
+        handler = _ctmAlertFields.get(key)
+        if handler is not None:
+            handler(jCtmAlert, key, value, state)
 
-        if key == "call_type":
-            value = translateCtmAlertUpdateType(data=value)
-            jCtmAlert[key] = value
-        if key == "send_time":
-            data = value
-            value = extractCtmAlertDate(data=data)
-            jCtmAlert[key] = value
-            ctmUpdateDate = extractCtmAlertCal(data)
-        if key == "last_time":
-            if value is not None:
-                data = value
-                value = extractCtmAlertDate(data=data)
-                jCtmAlert[key] = value
-                ctmUpdateDate = extractCtmAlertCal(data)
-        # Mainframe job type
-        if key == "memname":
-            if value is not None:
-                logger.debug('CTM Alert Entry: %s=%s', key, value)
-                if value == "None":
-                    ctmJobScript = None
-                elif value != "None":
-                    ctmJobScript = value
-
-        # X-Alert
-        if key == "Xtime":
-            value = extractCtmAlertDate(data=value)
-            jCtmAlert[key] = value
-            sAlertCat = "infrastructure"
-        if key == "Xtime_of_last":
-            value = extractCtmAlertDate(data=value)
-            jCtmAlert[key] = value
-
-        if key == "alert_type":
-            value = extractCtmAlertType(data=value)
-            jCtmAlert[key] = value
-        if key == "severity":
-            value = translateCtmAlertSeverity(data=value)
-            jCtmAlert[key] = value
-        if key == "status":
-            value = translateCtmAlertStatus(data=value)
-            jCtmAlert[key] = value
-        if key == "run_counter":
-            if value is not None:
-                ctmDataCenter = w3rkstatt.getJsonValue(path="$.data_center",
-                                                       data=jCtmAlert)
-                ctmOrderId = w3rkstatt.getJsonValue(path="$.order_id",
-                                                    data=jCtmAlert)
-                ctmJobId = ctmDataCenter + ":" + ctmOrderId
-        if key == "data_center":
-            # get data center details from config josn
-            # $.CTM.datacenter[?(@.name=='bmcbzos')].host
-            jQl = "$.CTM.datacenter[?(@.name=='" + str(value) + "')].host"
-            data_center = w3rkstatt.getJsonValue(path=jQl, data=jCfgData)
-            if len(data_center) > 1:
-                data_center_ip = w3rkstatt.getHostIP(hostname=data_center)
-                data_center_fqdn = w3rkstatt.getHostFqdn(hostname=data_center)
-                data_center_dns = w3rkstatt.getHostDomain(hostname=data_center)
-            else:
-                data_center_ip = None
-                data_center_fqdn = None
-                data_center_dns = None
-        if key == "host_id":
-            if value is not None:
-                if len(value) > 0:
-                    host_ip = w3rkstatt.getHostIP(hostname=value)
-                    host_ip_fqdn = w3rkstatt.getHostFqdn(hostname=value)
-                    host_ip_dns = w3rkstatt.getHostDomain(hostname=value)
-
-        if key == "Component_machine":
-            host_ip = w3rkstatt.getHostIP(hostname=value)
-            host_ip_fqdn = w3rkstatt.getHostFqdn(hostname=value)
-            host_ip_dns = w3rkstatt.getHostDomain(hostname=value)
-            alias = cdmclass + ":" + value + ":" + host_ip_dns
-
-            data_center_name = jCfgData["CTM"]["datacenter"][0]["name"]
-            data_center_host = jCfgData["CTM"]["datacenter"][0]["host"]
-            jCtmAlert["data_center"] = data_center_name
-
-            data_center_ip = w3rkstatt.getHostIP(hostname=data_center_host)
-            data_center_fqdn = w3rkstatt.getHostFqdn(hostname=data_center_host)
-            data_center_dns = w3rkstatt.getHostDomain(
-                hostname=data_center_host)
-
-        if key == "message":
-            if "STATUS OF AGENT PLATFORM" in value:
-                sTemp = value.split()
-                host_name = sTemp[4]
-                host_ip = w3rkstatt.getHostIP(hostname=host_name)
-                host_ip_fqdn = w3rkstatt.getHostFqdn(hostname=host_name)
-                host_ip_dns = w3rkstatt.getHostDomain(hostname=host_name)
-                jCtmAlert["host_id"] = host_name
-                alias = cdmclass + ":" + host_name + ":" + host_ip_dns
-                sAgentStatus = sTemp[7]
-                sAlertCat = "agent"
-            elif "DATA CENTER" in value:
-                sTemp = value.split()
-                host_name = sTemp[2]
-                host_ip = w3rkstatt.getHostIP(hostname=host_name)
-                host_ip_fqdn = w3rkstatt.getHostFqdn(hostname=host_name)
-                host_ip_dns = w3rkstatt.getHostDomain(hostname=host_name)
-                alias = cdmclass + ":" + host_name + ":" + host_ip_dns
-                sDataCenterStatus = sTemp[4]
-                sAlertCat = "datacenter"             
-            elif "Distributed Control-M/EM Configuration Agent" in value:
-                sTemp = value.split()
-                host_name = sTemp[2]
-                host_ip = w3rkstatt.getHostIP(hostname=host_name)
-                host_ip_fqdn = w3rkstatt.getHostFqdn(hostname=host_name)
-                host_ip_dns = w3rkstatt.getHostDomain(hostname=host_name)
-                jCtmAlert['host_id'] = host_ip_fqdn
-
-                # alias = cdmclass + ":" + host_name + ":" + host_ip_dns
-                # sCtmComponenttatus = sTemp[4]
-                sAlertCat = "infrastructure"
-                if "not responding" in value:
-                    jCtmAlert['system_status'] = "Not responding"
-                else:
-                    jCtmAlert['system_status'] = "TBD"
-
-            elif "Ended not OK" in value:
-                ctmDataCenter = w3rkstatt.getJsonValue(path="$.data_center",
-                                                       data=jCtmAlert)
-                ctmOrderId = w3rkstatt.getJsonValue(path="$.order_id",
-                                                    data=jCtmAlert)
-                ctmJobRunId = ctmDataCenter + ":" + ctmOrderId
-                job_name = w3rkstatt.getJsonValue(path="$.job_name",
-                                                  data=jCtmAlert)
-                run_counter = w3rkstatt.getJsonValue(path="$.run_counter",
-                                                     data=jCtmAlert)
-                summary = "Job " + job_name + " failed"
-                notes = "CTRL-M Job " + job_name + " failed. Job ID: " + \
-                    ctmJobRunId + " with Job Run Count: " + run_counter
-                sAlertCat = "job"
-                sSystemStatus = "failed"
-            elif "Failed to order" in value:
-                ctmDataCenter = w3rkstatt.getJsonValue(path="$.data_center",
-                                                       data=jCtmAlert)
-                ctmOrderId = w3rkstatt.getJsonValue(path="$.order_id",
-                                                    data=jCtmAlert)
-                ctmJobRunId = ctmDataCenter + ":" + ctmOrderId
-                job_name = w3rkstatt.getJsonValue(path="$.job_name",
-                                                  data=jCtmAlert)
-                run_counter = w3rkstatt.getJsonValue(path="$.run_counter",
-                                                     data=jCtmAlert)
-
-                if job_name is None:
-                    summary = value
-                    notes = "CTRL-M Job failed. Job ID: " + \
-                        ctmJobRunId + " with Job Run Count: " + run_counter
-                else:
-                    summary = "Job " + job_name + " failed"
-                    notes = "CTRL-M Job " + job_name + " failed. Job ID: " + \
-                        ctmJobRunId + " with Job Run Count: " + run_counter
-                sAlertCat = "job"
-                sSystemStatus = "failed"
-            elif "BIM / SIM" in value:
-                ctmDataCenter = w3rkstatt.getJsonValue(path="$.data_center",
-                                                       data=jCtmAlert)
-                ctmOrderId = w3rkstatt.getJsonValue(path="$.order_id",
-                                                    data=jCtmAlert)
-                ctmJobRunId = ctmDataCenter + ":" + ctmOrderId
-                job_name = w3rkstatt.getJsonValue(path="$.job_name",
-                                                  data=jCtmAlert)
-                run_counter = w3rkstatt.getJsonValue(path="$.run_counter",
-                                                     data=jCtmAlert)
-
-                if job_name is None:
-                    summary = value
-                    notes = "CTRL-M Job failed. Job ID: " + \
-                        ctmJobRunId + " with Job Run Count: " + run_counter
-                else:
-                    summary = "Job " + job_name + " failed"
-                    notes = "CTRL-M Job " + job_name + " failed. Job ID: " + \
-                        ctmJobRunId + " with Job Run Count: " + run_counter
-                sAlertCat = "job"
-                sSystemStatus = "failed"
-            else:
-                summary = value
-                notes = value
-
-        if key == "Message":
-            summary = value
-            notes = "CTRL-M Component " + value + ". Managed by: " + host_ip_fqdn
-            if "Distributed Control-M/EM Configuration Agent" in value:
-                sTemp = value.split()
-                host_name = sTemp[5]
-                host_ip = w3rkstatt.getHostIP(hostname=host_name)
-                host_ip_fqdn = w3rkstatt.getHostFqdn(hostname=host_name)
-                host_ip_dns = w3rkstatt.getHostDomain(hostname=host_name)
-                jCtmAlert['host_id'] = host_ip_fqdn
-
-                alias = cdmclass + ":" + host_name + ":" + host_ip_dns
-                # sCtmComponenttatus = sTemp[4]
-                sAlertCat = "infrastructure"
-                if "not responding" in value:
-                    sSystemStatus = "Not responding"
-                else:
-                    sSystemStatus = "TBD"
-
-        if key == "run_as":    
-            if value and "Gateway" in value:
-                sAlertCat = "server"
-                if "WAS DISCONNECTED" in value:
-                    jCtmAlert['system_status'] = "Was Disconnected"
-                else:
-                    jCtmAlert['system_status'] = "TBD"                            
+    ctmOrderId = state.ctmOrderId
+    host_name = state.host_name
+    host_ip_fqdn = state.host_ip_fqdn
+    summary = state.summary
+    notes = state.notes
+    sSystemStatus = state.sSystemStatus
 
     if not ctmOrderId == "00000" and ctmOrderId is not None:
-        ctmDataCenter = w3rkstatt.getJsonValue(path="$.data_center",
-                                               data=jCtmAlert)
+        ctmDataCenter = jCtmAlert.get("data_center", "")
         job_uri = "https://" + ctm_host + ":" + ctm_port + "/ControlM/#Search:id=Search_2&search=" + \
-            ctmOrderId + "&date=" + ctmUpdateDate + "&controlm=" + ctmDataCenter
-        jCtmAlert["job_id"] = ctmJobId
+            ctmOrderId + "&date=" + state.ctmUpdateDate + "&controlm=" + ctmDataCenter
+        jCtmAlert["job_id"] = state.ctmJobId
         jCtmAlert["job_uri"] = job_uri
 
-    if sAgentStatus is not None:
-        ctmDataCenter = w3rkstatt.getJsonValue(path="$.data_center",
-                                               data=jCtmAlert)
-        if "UNAVAILABLE" in sAgentStatus:
+    if state.sAgentStatus is not None:
+        ctmDataCenter = jCtmAlert.get("data_center", "")
+        if "UNAVAILABLE" in state.sAgentStatus:
             jCtmAlert["severity"] = "MAJOR"
             summary = "Agent on " + host_name + " not availabble"
             notes = "CTRL-M Agent on " + host_ip_fqdn + \
                 " down or not availabble. Managed by: " + ctmDataCenter
             sSystemStatus = "unavailabble"
 
-        elif "AVAILABLE" in sAgentStatus:
+        elif "AVAILABLE" in state.sAgentStatus:
             jCtmAlert["severity"] = "OK"
             summary = "Agent on " + host_name + " availabble"
             notes = "CTRL-M Agent on " + host_ip_fqdn + \
                 " availabble. Managed by: " + ctmDataCenter
             sSystemStatus = "availabble"
 
-    if sDataCenterStatus is not None:
-        ctmDataCenter = w3rkstatt.getJsonValue(path="$.data_center",
-                                               data=jCtmAlert)
-        if "DISCONNECTED" in sDataCenterStatus:
+    if state.sDataCenterStatus is not None:
+        ctmDataCenter = jCtmAlert.get("data_center", "")
+        if "DISCONNECTED" in state.sDataCenterStatus:
             jCtmAlert["severity"] = "CRITICAL"
             summary = "Data Center " + ctmDataCenter + " was disconnected"
             notes = "CTRL-M Data Center " + ctmDataCenter + \
                 " on " + host_ip_fqdn + " down or disconnected."
             sSystemStatus = "disconnected"
-        elif "CONNECTED" in sDataCenterStatus:
+        elif "CONNECTED" in state.sDataCenterStatus:
             jCtmAlert["severity"] = "OK"
             summary = "Data Center on " + host_name + " availabble"
             notes = "CTRL-M Data Center " + ctmDataCenter + \
                 " on " + host_ip_fqdn + " availabble or connected."
             sSystemStatus = "connected"
 
-    jCtmAlert["data_center_ip"] = data_center_ip
-    jCtmAlert["data_center_fqdn"] = data_center_fqdn
-    jCtmAlert["data_center_dns"] = data_center_dns
-    jCtmAlert["host_ip"] = host_ip
+    jCtmAlert["data_center_ip"] = state.data_center_ip
+    jCtmAlert["data_center_fqdn"] = state.data_center_fqdn
+    jCtmAlert["data_center_dns"] = state.data_center_dns
+    jCtmAlert["host_ip"] = state.host_ip
     jCtmAlert["host_ip_fqdn"] = host_ip_fqdn
-    jCtmAlert["host_ip_dns"] = host_ip_dns
-    jCtmAlert["system_category"] = sAlertCat
+    jCtmAlert["host_ip_dns"] = state.host_ip_dns
+    jCtmAlert["system_category"] = state.sAlertCat
     jCtmAlert["system_status"] = sSystemStatus
-    jCtmAlert["system_class"] = alias
-    jCtmAlert["job_script"] = ctmJobScript
+    jCtmAlert["system_class"] = state.alias
+    jCtmAlert["job_script"] = state.ctmJobScript
 
     # CTM Agent issues
     jCtmAlert["message_summary"] = summary
@@ -1683,71 +3131,91 @@ def transformCtmJobOutput(data):
     return jData
 
 
-def transformCtmJobLog(data):
-    lgo = []
-    log_list = []
-    jValue = {}
-    s = "\n"
-    xList = [s for s in data.splitlines(True) if s.strip("\r\n")]
-    yList = list(map(str.strip, xList))
-    sJobLogStatus = False
+def iterCtmJobLogLines(data, separator="\n"):
+    """
+    Split a job log into lines without copying it into a list
 
-    i = 0
-    # Extract Data from line
-    # 12:48:07 2-Apr-2021  ORDERED JOB:24; DAILY FORCED, ODATE 20210402   	5065
-    for item in yList:
-        log_data = {}
+    :param str data: job log
+    :param str separator: line separator, \\n for an escaped job log
+    :return: generator of str
+    """
+    start = 0
+    while True:
+        end = data.find(separator, start)
+        if end < 0:
+            yield data[start:]
+            return
+        yield data[start:end]
+        start = end + len(separator)
 
-        sTemp = re.split(r'\s{2,}', item)
-        sTime = item.split()[0]
-        sDate = item.split()[1]
-        sMessage = sTemp[1].split("\t")[0]
-        sCtmCode = item.split("\t")[1]
 
-        if sCtmCode == "5100":
-            xTemp = sMessage.split()
-            log_data['oscompstat'] = xTemp[4].replace(".", "")
-            log_data['run_count'] = xTemp[6]
-            log_data['ended'] = extractCtmAlertDate(
-                data=xTemp[2].replace(".", ""))
+def iterCtmJobLog(lines, runCounter=None, escaped=False):
+    """
+    Parse job log lines in a single pass
 
+    12:48:07 2-Apr-2021  ORDERED JOB:24; DAILY FORCED, ODATE 20210402   \t5065
+
+    :param lines: iterable of log lines, e.g. a file or a response stream
+    :param str runCounter: stop after the 5100 entry of this run
+    :param bool escaped: tabs are escaped as \\t, see getCtmJobLog
+    :return: generator of dict with time, date, message, code and the
+             fields of 5100 (ended) and 5065 (ordered) entries
+    """
+    pattern = _ctmJobLogEscaped if escaped else _ctmJobLogLine
+    for line in lines:
+        line = line.strip()
+        if len(line) < 2 or line.startswith("Event Time"):
+            continue
+        match = pattern.match(line)
+        if match is None:
+            continue
+        (sTime, sDate, sMessage, sCtmCode) = match.groups()
+        sCtmCode = sCtmCode or ""
+
+        log_data = {}
+        if sCtmCode == "5100":
+            ended = _ctmJobLogEnded.match(sMessage)
+            if ended is not None:
+                log_data['oscompstat'] = ended.group(2).replace(".", "")
+                log_data['run_count'] = ended.group(3)
+                log_data['ended'] = extractCtmAlertDate(
+                    data=ended.group(1).replace(".", ""))
         log_data['time'] = sTime
         log_data['date'] = sDate
         log_data['message'] = sMessage
         log_data['code'] = sCtmCode
+        if sCtmCode == "5065":
+            ordered = _ctmJobLogOrdered.search(sMessage)
+            if ordered is not None:
+                log_data['odate'] = ordered.group(1)
+        yield log_data
+
+        if runCounter is not None and log_data.get('run_count') == runCounter:
+            return
+
 
+def transformCtmJobLog(data):
+    log_list = []
+    i = 0
+    for log_data in iterCtmJobLog(iterCtmJobLogLines(data)):
         log_wrapper = {}
         log_wrapper['entry-' + str(i).zfill(4)] = log_data
         log_list.append(log_wrapper)
         i += 1
 
     # Convert event data to the JSON format required by the API.
-    jData = json.dumps(log_list)
     if i == 0:
-        sJobLogStatus = None
-        jData = '{"count":0,"status":' + str(sJobLogStatus) + ',"entries":[]}'
+        jData = {"count": 0, "status": None, "entries": []}
     else:
-        sJobLogStatus = True
-        jData = '{"count":' + str(i) + ',"status":' + \
-            str(sJobLogStatus) + ',"entries":[' + str(jData) + ']}'
+        jData = {"count": i, "status": True, "entries": [log_list]}
 
-    # json_data = json.dumps(log_list)
-    jStatus = w3rkstatt.jsonValidator(data=jData)
-    if jStatus:
-        jData = json.loads(jData)
-        return jData
-    else:
-        jData = '{"count":1,"status":' + \
-            str(sJobLogStatus) + ',"entries":[' + str(jData) + ']}'
-        sData = w3rkstatt.dTranslate4Json(data=jData)
-        return sData
+    return json.dumps(jData)
 
 
 def transformCtmJobLogMini(data, runCounter):
-    ctmJobRunCounter = runCounter.strip("0")
+    ctmJobRunCounter = runCounter.lstrip("0")
     log_list = []
-    jValue = {}
-    s = "\n"
+    log_failed = {}
 
     if data.startswith('b"'):
         start = data.find('b"') + 2
@@ -1756,101 +3224,34 @@ def transformCtmJobLogMini(data, runCounter):
     else:
         pData = data
 
-    pList = pData.split("\\n")
-    # xList = [s for s in pData.splitlines(True) if s.strip("\r\n")]
-    # yList = list(map(str.strip, xList))
     sJobLogStatus = False
-
     i = 0
-    # Extract Data from line
-    # 12:48:07 2-Apr-2021  ORDERED JOB:24; DAILY FORCED, ODATE 20210402   	5065
-    for item in pList:
-        log_data = {}
-        # Event Time
-
-        if (len(item) > 1 and not item.startswith("Event Time")):
-            sTemp = re.split(r'\s{2,}', item)
-            sTime = item.split()[0]
-            sDate = item.split()[1]
-
-            sMessage = sTemp[1]
-
-            # Get CTM Output Code
-            lTemp = len(sTemp)
-            if lTemp == 3:
-                sCodeTmp = sTemp[2]
-                if len(sCodeTmp) > 1:
-                    sCtmCode = sCodeTmp.split("\\t")[1]
-            else:
-                sCodeTmp = sMessage.split("\\t")
-                if len(sCodeTmp) > 1:
-                    sCtmCode = sCodeTmp[1]
-                    sMessage = sCodeTmp[0]
-
-            if "'" in sMessage:
-                sMessage = sMessage.replace("'", "--")
-
-            if "Failed to get job log" in sMessage:
-                # Build JSON
-                # log_wrapper = {}
-                # log_wrapper['entry-' + str(i).zfill(4)] = sMessage
-                # log_list.append(log_wrapper)
-
-                # construct json string
-                if i == 0:
-                    sEntry = '"entry-' + \
-                        str(i).zfill(4) + '":"' + sMessage + '"'
-                else:
-                    sEntry = sEntry + ',"entry-' + \
-                        str(i).zfill(4) + '":"' + sMessage + '"'
-
-                i += 1
-            else:
-                sJobLogStatus = True
-                if sCtmCode == "5100":
-                    xTemp = sMessage.split()
-                    zTemp = xTemp[6]
-                    if zTemp == ctmJobRunCounter:
-                        log_data['oscompstat'] = xTemp[4].replace(".", "")
-                        log_data['run_count'] = xTemp[6]
-                        log_data['ended'] = extractCtmAlertDate(
-                            data=xTemp[2].replace(".", ""))
-                        log_data['time'] = sTime
-                        log_data['date'] = sDate
-                        log_data['message'] = sMessage
-                        log_data['code'] = sCtmCode
-
-                        # Build JSON
-                        log_wrapper = {}
-                        log_wrapper['entry-' + str(i).zfill(4)] = log_data
-                        log_list.append(log_wrapper)
-
-                    i += 1
-                else:
-                    log_data['time'] = sTime
-                    log_data['date'] = sDate
-                    log_data['message'] = sMessage
-                    log_data['code'] = sCtmCode
-                    # Build JSON
-                    log_wrapper = {}
-                    log_wrapper['entry-' + str(i).zfill(4)] = log_data
-                    log_list.append(log_wrapper)
-
-                    i += 1
+    # Entries of previous runs and the ended entry of the requested run
+    for log_data in iterCtmJobLog(iterCtmJobLogLines(pData, "\\n"),
+                                  runCounter=ctmJobRunCounter,
+                                  escaped=True):
+        sMessage = log_data['message']
+        if "'" in sMessage:
+            log_data['message'] = sMessage.replace("'", "--")
+
+        if "Failed to get job log" in sMessage:
+            log_failed['entry-' + str(i).zfill(4)] = log_data['message']
+        else:
+            sJobLogStatus = True
+            if log_data['code'] != "5100" or log_data.get(
+                    'run_count') == ctmJobRunCounter:
+                log_wrapper = {}
+                log_wrapper['entry-' + str(i).zfill(4)] = log_data
+                log_list.append(log_wrapper)
+        i += 1
 
     # custom json in case no access to CTM API
     if sJobLogStatus:
-        xData = json.dumps(log_list)
-        jData = '{"count":' + str(i) + ',"status":' + \
-            str(sJobLogStatus) + ',"entries":[' + str(xData) + ']}'
+        jData = {"count": i, "status": True, "entries": [log_list]}
     else:
-        xData = '{' + sEntry + '}'
-        jData = '{"count":' + str(i) + ',"status":' + \
-            str(sJobLogStatus) + ',"entries":[' + str(xData) + ']}'
-
-    sData = w3rkstatt.dTranslate4Json(data=jData)
+        jData = {"count": i, "status": False, "entries": [log_failed]}
 
-    return sData
+    return json.dumps(jData)
 
 
 def updateCtmAlertCore(ctmApiClient,
@@ -1872,20 +3273,18 @@ def updateCtmAlertCore(ctmApiClient,
     sCtmAlertData = '{"alertIds":[' + ctmAlertIDs + '],"urgency":"' + \
         ctmAlertUrgency + '","comment":"' + ctmAlertComment + '"}'
     sCtmAlertData = json.loads(sCtmAlertData)
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.run_api.RunApi(api_client=ctmApiClient)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).run
     results = ""
 
     # Call CTM AAPI
     try:
         results = ctmCfgAapi.update_alert(body=sCtmAlertData,
                                           _return_http_data_only=True)
-        results = str(results).replace("'", '"')
-        results = str(results).replace("None", '"None"')
+        results = ctmModel2Dict(results)
         if _localDebugFunctions:
             logger.debug('CTM: API Function: %s', "update_alert")
             logger.debug('CTM: API Result:\n%s', results)
-        results = json.loads(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
@@ -1907,20 +3306,18 @@ def updateCtmAlertStatus(ctmApiClient, ctmAlertIDs, ctmAlertStatus="Reviewed"):
     sCtmAlertData = '{"alertIds":[' + ctmAlertIDs + \
         '],"status":"' + ctmAlertStatus + '"}'
     sCtmAlertData = json.loads(sCtmAlertData)
-    # Instantiate the AAPI object
-    ctmCfgAapi = ctm.api.run_api.RunApi(api_client=ctmApiClient)
+    # Shared AAPI service object of the client
+    ctmCfgAapi = getCtmApi(ctmApiClient).run
     results = ""
 
     # Call CTM AAPI
     try:
         results = ctmCfgAapi.update_alert_status(body=sCtmAlertData,
                                                  _return_http_data_only=True)
-        results = str(results).replace("'", '"')
-        results = str(results).replace("None", '"None"')
+        results = ctmModel2Dict(results)
         if _localDebugFunctions:
             logger.debug('CTM: API Function: %s', "update_alert_status")
             logger.debug('CTM: API Result:\n%s', results)
-        results = json.loads(results)
     except ctm.rest.ApiException as exp:
         logger.error('CTM: API Error: %s', exp)
     return results
@@ -2059,289 +3456,232 @@ def simplifyCtmJson(data):
     return dParameters
 
 
+_ctmPathSegment = re.compile(r"\{([^}]*)\}|\[(\d+)\]|([^.\[\]{}]+)")
+_ctmPathRequired = object()
+
+
+def splitCtmPath(path, root=None):
+    """
+    Split a path of an alert document into keys, list indexes and getters
+    of keys taken from another path, e.g.
+    $.jobConfig[0].entries[0].{$.jobInfo[0].entries[0].folder}.CreatedBy
+
+    :param str path: path, relative to root if it does not start with $
+    :param str root: path of the relative paths
+    :return: keys
+    :rtype: list
+    """
+    if not path.startswith("$"):
+        path = (root or "$") + "." + path
+    keys = []
+    for (dynamic, index, key) in _ctmPathSegment.findall(path[1:]):
+        if dynamic:
+            keys.append(compileCtmPath(dynamic, root=root, default=None))
+        elif index:
+            keys.append(int(index))
+        else:
+            keys.append(key)
+    return keys
+
+
+def compileCtmPath(path, root=None, default=_ctmPathRequired):
+    """
+    Compile a path of an alert document into a getter, see splitCtmPath
+
+    :param path: path or keys of splitCtmPath
+    :param str root: path of the relative paths
+    :param default: value of missing paths, if not set raise the error
+    :return: getter taking the alert document
+    :rtype: func
+    """
+    keys = path
+    if isinstance(path, str):
+        keys = splitCtmPath(path, root=root)
+
+    if default is _ctmPathRequired and not any(map(callable, keys)):
+        if len(keys) == 0:
+            return lambda data: data
+        if len(keys) == 2:
+            (k0, k1) = keys
+            return lambda data: data[k0][k1]
+
+        def getPath(data):
+            for key in keys:
+                data = data[key]
+            return data
+
+        return getPath
+
+    def getPathDefault(data):
+        value = data
+        try:
+            for key in keys:
+                if callable(key):
+                    key = key(data)
+                value = value[key]
+        except (KeyError, IndexError, TypeError):
+            if default is _ctmPathRequired:
+                raise
+            return default
+        return value
+
+    return getPathDefault
+
+
+def _transformBhomCdmClass(value):
+    # BMC_ApplicationService:agent01:local > BMC_ApplicationService
+    return value.split(':')[0]
+
+
+def _transformBhomStrip(value):
+    # None placeholders are kept as they are
+    if value and not value.startswith("None"):
+        value = value.strip()
+    return value
+
+
+CTM_BHOM_TRANSFORMS = {
+    "cdmclass": _transformBhomCdmClass,
+    "strip": _transformBhomStrip,
+    "str": str
+}
+
+
+class CtmBhomMapping(object):
+    """
+    BHOM event fields of the alert categories, compiled once.
+    Constants are part of an event template, plain fields of the same
+    parent are read with one itemgetter, other fields with their getter.
+    :property categories Template, conditions and steps by category
+    """
+
+    def __init__(self, mapping):
+        self.categories = {}
+        for (category, spec) in mapping.items():
+            self.categories[category] = self._compileCategory(
+                spec.get("fields") or [],
+                spec.get("root") or "$")
+
+    def _compileCategory(self, fields, root):
+        # A target mapped twice keeps its first position and last field
+        targets = {}
+        for field in fields:
+            targets[field["target"]] = field
+
+        template = {}
+        conditions = {}
+        groups = {}
+        steps = []
+        for (target, field) in targets.items():
+            template[target] = None
+            condition = field.get("when")
+            if condition is not None and condition not in conditions:
+                conditions[condition] = compileCtmPath(condition, root=root)
+            plain = not field.get("transform") and not field.get("format")
+            if "source" not in field and plain and condition is None:
+                template[target] = field.get("value")
+                continue
+            if "source" in field and plain and "default" not in field:
+                keys = splitCtmPath(field["source"], root=root)
+                if len(keys) > 0 and not any(map(callable, keys)):
+                    group = (tuple(keys[:-1]), condition)
+                    if group not in groups:
+                        groups[group] = ([], [])
+                        steps.append((condition, group))
+                    groups[group][0].append(target)
+                    groups[group][1].append(keys[-1])
+                    continue
+            steps.append(
+                (condition, (target, self._compileField(field, root))))
+
+        compiled = []
+        for (condition, step) in steps:
+            if step in groups:
+                (names, keys) = groups[step]
+                compiled.append(
+                    (condition, tuple(names),
+                     self._compileGroup(compileCtmPath(list(step[0])),
+                                        keys), True))
+            else:
+                compiled.append((condition, step[0], step[1], False))
+        return (template, list(conditions.items()), compiled)
+
+    @staticmethod
+    def _compileGroup(parent, keys):
+        if len(keys) == 1:
+            key = keys[0]
+            return lambda data: (parent(data)[key], )
+        values = operator.itemgetter(*keys)
+        return lambda data: values(parent(data))
+
+    def _compileField(self, field, root):
+        if "source" in field:
+            getter = compileCtmPath(field["source"],
+                                    root=root,
+                                    default=field.get("default",
+                                                      _ctmPathRequired))
+        else:
+            value = field.get("value")
+            getter = lambda data: value
+        for name in field.get("transform") or []:
+            getter = self._chain(getter, CTM_BHOM_TRANSFORMS[name])
+        if field.get("format"):
+            getter = self._chain(getter, field["format"].format)
+        return getter
+
+    @staticmethod
+    def _chain(getter, transform):
+        return lambda data: transform(getter(data))
+
+    def apply(self, data, category):
+        """
+        Map an alert document to a BHOM event, fields of a condition are
+        set if the count at its path is > 0
+
+        :param dict data: enriched alert document
+        :param str category: infrastructure, job or core
+        :return: event data
+        :rtype: dict
+        """
+        (template, conditions, steps) = self.categories.get(category) or \
+            self.categories["core"]
+        passed = {}
+        for (condition, getter) in conditions:
+            passed[condition] = int(getter(data)) > 0
+
+        event_data = template.copy()
+        for (condition, target, getter, group) in steps:
+            if condition is not None and not passed[condition]:
+                for name in (target if group else (target, )):
+                    del event_data[name]
+            elif group:
+                event_data.update(zip(target, getter(data)))
+            else:
+                event_data[target] = getter(data)
+        return event_data
+
+
+ctmBhomMapping = CtmBhomMapping(ctm_bhom_mapping)
+
+
 def transformCtmBHOM(data, category):
-    json_ctm_data = json.loads(data)
-    json_data = {}
-    event_data = {}
-
-    if category == "infrastructure":
-        event_data['severity'] = 'WARNING'
-        event_data['CLASS'] = 'CTMX_EVENT'
-        event_data['msg'] = json_ctm_data["infraAlert"][0]["message_summary"]
-        event_data['details'] = json_ctm_data["infraAlert"][0]["message_notes"]
-
-        event_data['source_identifier'] = json_ctm_data["infraAlert"][0][
-            "host_id"]
-        event_data['source_hostname'] = json_ctm_data["infraAlert"][0][
-            "host_id"]
-        event_data['source_address'] = json_ctm_data["infraAlert"][0][
-            "host_ip"]
-
-        event_data['alias'] = json_ctm_data["infraAlert"][0]["system_class"]
-        event_data['status'] = 'OPEN'
-        event_data['priority'] = 'PRIORITY_3'
-        event_data['location'] = json_ctm_data["infraAlert"][0]["data_center"]
-        event_data['instancename'] = json_ctm_data["infraAlert"][0]["host_id"]
-        event_data['cdmclass'] = json_ctm_data["infraAlert"][0][
-            "system_class"].split(':')[0]
-        event_data['componentalias'] = json_ctm_data["infraAlert"][0][
-            "system_class"]
-        event_data['system_category'] = json_ctm_data["infraAlert"][0][
-            "system_category"]
-        event_data['system_status'] = json_ctm_data["infraAlert"][0][
-            "system_status"]
-
-        # Control-M server name
-        event_data['ctmDataCenter'] = json_ctm_data["infraAlert"][0][
-            "data_center"]
-        # Alert update type 'I' Insert - new alert 'U' Update existing alert
-        event_data['ctmUpdateType'] = json_ctm_data["infraAlert"][0][
-            "call_type"]
-        # Control-M server name
-        event_data['ctmDataCenter'] = json_ctm_data["infraAlert"][0][
-            "data_center"]
-
-        event_data['xctmCallType'] = json_ctm_data["infraAlert"][0][
-            "call_type"]
-        event_data['xctmCompMachine'] = json_ctm_data["infraAlert"][0][
-            "Component_machine"]
-        event_data['xctmCompName'] = json_ctm_data["infraAlert"][0][
-            "Component_name"]
-        event_data['xctmCompType'] = json_ctm_data["infraAlert"][0][
-            "Component_type"]
-        event_data['xctmCounter'] = json_ctm_data["infraAlert"][0]["Counter"]
-        event_data['xctmKey1'] = json_ctm_data["infraAlert"][0]["Key1"]
-        event_data['xctmKey2'] = json_ctm_data["infraAlert"][0]["Key2"]
-        event_data['xctmKey3'] = json_ctm_data["infraAlert"][0]["Key3"]
-        event_data['xctmKey4'] = json_ctm_data["infraAlert"][0]["Key4"]
-        event_data['xctmKey5'] = json_ctm_data["infraAlert"][0]["Key5"]
-        event_data['xctmMessage'] = json_ctm_data["infraAlert"][0]["Message"]
-        event_data['xctmMessageId'] = json_ctm_data["infraAlert"][0][
-            "Message_id"]
-        event_data['xctmNote'] = json_ctm_data["infraAlert"][0]["Note"]
-        event_data['xctmSerial'] = json_ctm_data["infraAlert"][0]["Serial"]
-        event_data['xctmStatus'] = json_ctm_data["infraAlert"][0]["Status"]
-        event_data['xctmXSeverity'] = json_ctm_data["infraAlert"][0][
-            "Xseverity"]
-        event_data['xctmXTime'] = json_ctm_data["infraAlert"][0]["Xtime"]
-        event_data['xctmXTimeOFLast'] = json_ctm_data["infraAlert"][0][
-            "Xtime_of_last"]
-
-        # The BHOM create event call expects a list of events,
-        # even for just a single event.
-        event_list = []
-
-        # Add the event to the list
-        event_list.append(event_data)
-
-        # Convert event data to the JSON format required by the API.
-        json_data = json.dumps(event_list)
-        logger.debug('BHOM: event json payload: %s', json_data)
-
-    elif category == "job":
-
-        ctmjobInfoCount = int(json_ctm_data["jobInfo"][0]["count"])
-        ctmjobConfigCount = int(json_ctm_data["jobConfig"][0]["count"])
-
-        if ctmjobInfoCount > 0:
-            ctmFolder = json_ctm_data["jobInfo"][0]["entries"][0]["folder"]
-            # Job folder
-            event_data['ctmFolder'] = json_ctm_data["jobInfo"][0]["entries"][
-                0]["folder"]
-            # Job folder ID
-            event_data['ctmFolderID'] = json_ctm_data["jobInfo"][0]["entries"][
-                0]["folder_id"]
-            # Job hold status
-            event_data['ctmJobHeld'] = json_ctm_data["jobInfo"][0]["entries"][
-                0]["held"]
-            # Job Type
-            event_data['ctmJobType'] = json_ctm_data["jobInfo"][0]["entries"][
-                0]["type"]
-            # Job Schedule
-            event_data['ctmJobCyclic'] = json_ctm_data["jobInfo"][0][
-                "entries"][0]["cyclic"]
-
-        if ctmjobConfigCount > 0:
-            # The user who runs the job
-            #event_data['ctmOwner'] = json_ctm_data["jobConfig"][0]["entries"][
-            #    0][ctmFolder]["CreatedBy"]
-            
-            event_data['ctmOwner'] = json_ctm_data.get("jobConfig", [{}])[0].get("entries", [{}])[0].get(ctmFolder, {}).get("CreatedBy")
-
-        event_data['severity'] = json_ctm_data["jobAlert"][0]["severity"]
-        event_data['CLASS'] = 'CTM_JOB'
-        event_data['msg'] = json_ctm_data["jobAlert"][0]["message_summary"]
-        event_data['details'] = json_ctm_data["jobAlert"][0]["message_notes"]
-
-        event_data['source_identifier'] = json_ctm_data["jobAlert"][0][
-            "host_id"]
-        event_data['source_hostname'] = json_ctm_data["jobAlert"][0]["host_id"]
-        event_data['source_address'] = json_ctm_data["jobAlert"][0]["host_ip"]
-
-        event_data['alias'] = 'BMC_ComputerSystem:' \
-            + json_ctm_data["jobAlert"][0]["host_id"]
-        event_data['status'] = 'OPEN'
-        event_data['priority'] = 'PRIORITY_3'
-        event_data['location'] = json_ctm_data["jobAlert"][0]["data_center"]
-        event_data['instancename'] = json_ctm_data["jobAlert"][0]["host_id"]
-        event_data['cdmclass'] = 'BMC_ComputerSystem'
-        event_data['componentalias'] = 'BMC_ComputerSystem:' \
-            + json_ctm_data["jobAlert"][0]["host_id"]
-        event_data['system_category'] = json_ctm_data["jobAlert"][0][
-            "system_category"]
-        event_data['system_status'] = json_ctm_data["jobAlert"][0][
-            "system_status"]
-
-        # Alert update type 'I' Insert - new alert 'U' Update existing alert
-        event_data['ctmUpdateType'] = json_ctm_data["jobAlert"][0]["call_type"]
-        # Alert id Unique alert identifier
-        event_data['ctmAlertId'] = json_ctm_data["jobAlert"][0]["alert_id"]
-        # Control-M server name
-        event_data['ctmDataCenter'] = json_ctm_data["jobAlert"][0][
-            "data_center"]
-        # Job member name
-        event_data['ctmMemName'] = json_ctm_data["jobAlert"][0]["memname"]
-        # Job order id
-        event_data['ctmOrderId'] = json_ctm_data["jobAlert"][0]["order_id"]
-        # Alert severity 'R' - regular 'U' - urgent 'V' - very urgent
-        event_data['ctmSeverity'] = json_ctm_data["jobAlert"][0]["severity"]
-        # representation = date; # Alert creation time (YYYYMMDDhhmmss)
-        event_data['ctmTime'] = json_ctm_data["jobAlert"][0]["send_time"]
-        # Alert status (Not_Noticed, Noticed or Handled)
-        event_data['ctmStatus'] = json_ctm_data["jobAlert"][0]["status"]
-        # Job node id
-        event_data['ctmNodeId'] = json_ctm_data["jobAlert"][0]["host_id"]
-        # Job name
-        event_data['ctmJobName'] = json_ctm_data["jobAlert"][0]["job_name"]
-        # Alert message
-        event_data['ctmMessage'] = json_ctm_data["jobAlert"][0]["message"]
-        # Job application name
-        event_data['ctmApplication'] = json_ctm_data["jobAlert"][0][
-            "application"]
-        # Job sub application name
-        event_data['ctmSubApplication'] = json_ctm_data["jobAlert"][0][
-            "sub_application"]
-        # Alert type B - BIM alert type R or empty - regular alert type
-        event_data['ctmAlertType'] = json_ctm_data["jobAlert"][0]["alert_type"]
-        # Closed from Control-M/Enterprise Manager Y - yes N or empty - no
-        event_data['ctmClosedFromEM'] = json_ctm_data["jobAlert"][0][
-            "closed_from_em"]
-        # Remedy ticket number
-        event_data['ctmTicketNumber'] = json_ctm_data["jobAlert"][0][
-            "ticket_number"]
-        # Job's run counter
-        event_data['ctmRunCounter'] = json_ctm_data["jobAlert"][0][
-            "run_counter"]
-        # Last updated by, user name
-        event_data['ctmUser'] = "TBD"
-        # representation = date; # Last time the alert was updated (YYYYMMDDhhmmss)
-        event_data['ctmUpdateTime'] = json_ctm_data["jobAlert"][0]["send_time"]
-        # Alert notes
-        event_data['ctmNotes'] = json_ctm_data["jobAlert"][0]["notes"]
-        # Job ID
-        event_data['ctmJobID'] = json_ctm_data["jobAlert"][0]["job_id"]
-
-        # The BHOM create event call expects a list of events,
-        # even for just a single event.
-        event_list = []
-
-        # Add the event to the list
-        event_list.append(event_data)
-
-        # Convert event data to the JSON format required by the API.
-        json_data = json.dumps(event_list)
-        logger.debug('BHOM: event json payload: %s', json_data)
-    else:
-        event_data['severity'] = json_ctm_data["coreAlert"][0]["severity"]
-        event_data['CLASS'] = 'CTM_EVENT'
-        event_data['msg'] = json_ctm_data["coreAlert"][0]["message_summary"]
-        event_data['details'] = json_ctm_data["coreAlert"][0]["message_notes"]
-
-        event_data['source_identifier'] = json_ctm_data["coreAlert"][0][
-            "host_id"]
-        event_data['source_hostname'] = json_ctm_data["coreAlert"][0][
-            "host_id"]
-        event_data['source_address'] = json_ctm_data["coreAlert"][0]["host_ip"]
-
-        event_data['alias'] = json_ctm_data["coreAlert"][0]["system_class"]
-        event_data['status'] = 'OPEN'
-        event_data['priority'] = 'PRIORITY_3'
-        event_data['location'] = json_ctm_data["coreAlert"][0]["data_center"]
-        event_data['instancename'] = json_ctm_data["coreAlert"][0]["host_id"]
-               
-        cdmclass =  json_ctm_data["coreAlert"][0]["system_class"].split(':')[0]
-        if cdmclass and not cdmclass.startswith("None"):
-                cdmclass = cdmclass.strip()
-                
-        event_data['cdmclass'] = cdmclass
-                
-        event_data['componentalias'] = json_ctm_data["coreAlert"][0][
-            "system_class"]
-        event_data['system_category'] = json_ctm_data["coreAlert"][0][
-            "system_category"]
-        event_data['system_status'] = json_ctm_data["coreAlert"][0][
-            "system_status"]
-
-        # Alert update type 'I' Insert - new alert 'U' Update existing alert
-        event_data['ctmUpdateType'] = json_ctm_data["coreAlert"][0][
-            "call_type"]
-        # Alert id Unique alert identifier
-        event_data['ctmAlertId'] = json_ctm_data["coreAlert"][0]["alert_id"]
-        # Control-M server name
-        event_data['ctmDataCenter'] = json_ctm_data["coreAlert"][0][
-            "data_center"]
-        # Job member name
-        event_data['ctmMemName'] = json_ctm_data["coreAlert"][0]["memname"]
-        # Job order id
-        event_data['ctmOrderId'] = json_ctm_data["coreAlert"][0]["order_id"]
-        # Alert severity 'R' - regular 'U' - urgent 'V' - very urgent
-        event_data['ctmSeverity'] = json_ctm_data["coreAlert"][0]["severity"]
-        # representation = date; # Alert creation time (YYYYMMDDhhmmss)
-        event_data['ctmTime'] = json_ctm_data["coreAlert"][0]["send_time"]
-        # Alert status (Not_Noticed, Noticed or Handled)
-        event_data['ctmStatus'] = json_ctm_data["coreAlert"][0]["status"]
-        # Job node id
-        event_data['ctmNodeId'] = json_ctm_data["coreAlert"][0]["host_id"]
-        # Job name
-        event_data['ctmJobName'] = json_ctm_data["coreAlert"][0]["job_name"]
-        # Alert message
-        event_data['ctmMessage'] = json_ctm_data["coreAlert"][0]["message"]
-        # Job application name
-        event_data['ctmApplication'] = json_ctm_data["coreAlert"][0][
-            "application"]
-        # Job sub application name
-        event_data['ctmSubApplication'] = json_ctm_data["coreAlert"][0][
-            "sub_application"]
-        # Alert type B - BIM alert type R or empty - regular alert type
-        event_data['ctmAlertType'] = json_ctm_data["coreAlert"][0][
-            "alert_type"]
-        # Closed from Control-M/Enterprise Manager Y - yes N or empty - no
-        event_data['ctmClosedFromEM'] = json_ctm_data["coreAlert"][0][
-            "closed_from_em"]
-        # Remedy ticket number
-        event_data['ctmTicketNumber'] = json_ctm_data["coreAlert"][0][
-            "ticket_number"]
-        # Job's run counter
-        event_data['ctmRunCounter'] = json_ctm_data["coreAlert"][0][
-            "run_counter"]
-        # Last updated by, user name
-        event_data['ctmUser'] = "TBD"
-        # representation = date; # Last time the alert was updated (YYYYMMDDhhmmss)
-        event_data['ctmUpdateTime'] = json_ctm_data["coreAlert"][0][
-            "send_time"]
-        # Alert notes
-        event_data['ctmNotes'] = json_ctm_data["coreAlert"][0]["notes"]
-
-        # The BHOM create event call expects a list of events,
-        # even for just a single event.
-        event_list = []
-
-        # Add the event to the list
-        event_list.append(event_data)
-
-        # Convert event data to the JSON format required by the API.
-        json_data = json.dumps(event_list)
-        logger.debug('BHOM: event json payload: %s', json_data)
+    """
+    Translate an enriched alert document into a BHOM event list
+
+    :param data: alert document, dict or JSON string
+    :param category: infrastructure, job or core
+    :return: BHOM events as JSON string
+    """
+    if isinstance(data, str):
+        data = json.loads(data)
+
+    # The BHOM create event call expects a list of events,
+    # even for just a single event.
+    event_list = [ctmBhomMapping.apply(data, category)]
+
+    # Convert event data to the JSON format required by the API.
+    json_data = json.dumps(event_list)
+    logger.debug('BHOM: event json payload: %s', json_data)
 
     return json_data
 
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# Filename: core_http.py
+"""
+(c) 2026 Rafael Ulhoa
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+The above copyright notice and this permission notice (including the next paragraph) shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+https://opensource.org/licenses/GPL-3.0
+# SPDX-License-Identifier: GPL-3.0-or-later
+For information on SDPX, https://spdx.org/licenses/GPL-3.0-or-later.html
+
+w3rkstatt Python shared HTTP sessions
+One pooled keep-alive session per host, shared by all connectors
+
+Change Log
+Date (YMD)    Name                  What
+--------      ------------------    ------------------------
+20261019      Rafael Ulhoa          Initial Development
+20261019      Rafael Ulhoa          Hedged calls of alternative sources
+20261019      Rafael Ulhoa          Python 3.6 compatible async calls
+
+"""
+
+import os
+import sys
+import time
+import logging
+import asyncio
+import weakref
+import functools
+import threading
+import requests
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlparse
+
+# handle dev environment vs. production
+try:
+    import w3rkstatt as w3rkstatt
+except:
+    # fix import issues for modules
+    sys.path.append(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    from src import w3rkstatt as w3rkstatt
+
+# Get configuration from bmcs_core.json
+jCfgData = w3rkstatt.getProjectConfig()
+
+
+def _getHttpSetting(key, default):
+    value = w3rkstatt.getJsonValue(path="$.DEFAULT.http." + key,
+                                   data=jCfgData)
+    if value == "" or value is None:
+        return default
+    return value
+
+
+# Timeouts in seconds, retries apply to idempotent methods only
+http_connect_timeout = float(_getHttpSetting("connect_timeout", 10))
+http_read_timeout = float(_getHttpSetting("read_timeout", 60))
+http_retries = int(_getHttpSetting("retries", 3))
+http_backoff = float(_getHttpSetting("backoff_factor", 0.5))
+http_pool_connections = int(_getHttpSetting("pool_connections", 4))
+http_pool_maxsize = int(_getHttpSetting("pool_maxsize", 10))
+
+# Async calls: worker threads of all backends, requests in flight per backend
+http_async_workers = int(_getHttpSetting("async_workers", 64))
+http_async_limit = int(_getHttpSetting("async_limit", 16))
+
+# Hedged calls: worker threads of their own, not shared with async calls
+http_hedge_workers = int(_getHttpSetting("hedge_workers", 8))
+
+HTTP_IDEMPOTENT_METHODS = frozenset(
+    ["GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"])
+HTTP_RETRY_STATUS = (502, 503, 504)
+
+# Assign module defaults
+_modVer = "20.26.10.00"
+_localDebug = False
+logger = logging.getLogger(__name__)
+epoch = time.time()
+
+_sessions = {}
+_sessionsLock = threading.Lock()
+_lastResponse = threading.local()
+_asyncExecutor = None
+_hedgeExecutor = None
+_asyncLimits = weakref.WeakKeyDictionary()
+
+
+def _getRetry():
+    # urllib3 < 1.26 names the option method_whitelist
+    kwargs = {
+        "total": http_retries,
+        "connect": http_retries,
+        "read": http_retries,
+        "status": http_retries,
+        "backoff_factor": http_backoff,
+        "status_forcelist": HTTP_RETRY_STATUS,
+        "raise_on_status": False
+    }
+    try:
+        return Retry(allowed_methods=HTTP_IDEMPOTENT_METHODS, **kwargs)
+    except TypeError:
+        return Retry(method_whitelist=HTTP_IDEMPOTENT_METHODS, **kwargs)
+
+
+def getHostKey(url):
+    '''
+    Get the connection pool key of an url
+
+    :param str url: a given url
+    :return: scheme://host:port
+    :rtype: str
+    :raises ValueError: N/A
+    :raises TypeError: N/A
+    '''
+    sUrl = urlparse(url)
+    return sUrl.scheme + "://" + sUrl.netloc.lower()
+
+
+def createSession():
+    '''
+    Create a keep-alive session with pooled connections and retries
+
+    :return: session
+    :rtype: requests.Session
+    :raises ValueError: N/A
+    :raises TypeError: N/A
+    '''
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=http_pool_connections,
+                          pool_maxsize=max(http_pool_maxsize,
+                                           http_async_limit),
+                          max_retries=_getRetry())
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def getSession(url):
+    '''
+    Get the shared session of the host of an url
+
+    :param str url: a given url
+    :return: session
+    :rtype: requests.Session
+    :raises ValueError: N/A
+    :raises TypeError: N/A
+    '''
+    key = getHostKey(url)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessionsLock:
+            session = _sessions.get(key)
+            if session is None:
+                session = createSession()
+                _sessions[key] = session
+                if _localDebug:
+                    logger.debug('HTTP: New session for: %s', key)
+    return session
+
+
+def closeSessions():
+    '''
+    Close all shared sessions and their connection pools
+    '''
+    global _asyncExecutor, _hedgeExecutor
+    with _sessionsLock:
+        for key in list(_sessions):
+            _sessions.pop(key).close()
+        if _asyncExecutor is not None:
+            _asyncExecutor.shutdown(wait=False)
+            _asyncExecutor = None
+        if _hedgeExecutor is not None:
+            _hedgeExecutor.shutdown(wait=False)
+            _hedgeExecutor = None
+
+
+def request(method, url, **kwargs):
+    '''
+    Send a request through the shared session of the host
+
+    Same arguments as requests.request, timeout defaults to the
+    configured connect and read timeouts and verify defaults to False.
+
+    :param str method: http method
+    :param str url: a given url
+    :return: response
+    :rtype: requests.Response
+    :raises requests.RequestException: see requests
+    '''
+    kwargs.setdefault("timeout", (http_connect_timeout, http_read_timeout))
+    kwargs.setdefault("verify", False)
+    _lastResponse.status = None
+    response = getSession(url).request(method, url, **kwargs)
+    _lastResponse.status = response.status_code
+    return response
+
+
+def getLastStatus():
+    '''
+    Get the status code of the last request sent by the current thread
+
+    Connectors return parsed content only, callers use this to react
+    on e.g. an expired token (401).
+
+    :return: http status code, None if the request failed
+    :rtype: int
+    '''
+    return getattr(_lastResponse, "status", None)
+
+
+def get(url, **kwargs):
+    '''
+    Send a GET request, retried on connection errors and 502/503/504
+
+    :param str url: a given url
+    :return: response
+    :rtype: requests.Response
+    '''
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    '''
+    Send a POST request, only retried if the connection could not be opened
+
+    :param str url: a given url
+    :return: response
+    :rtype: requests.Response
+    '''
+    return request("POST", url, **kwargs)
+
+
+def put(url, **kwargs):
+    '''
+    Send a PUT request, retried on connection errors and 502/503/504
+
+    :param str url: a given url
+    :return: response
+    :rtype: requests.Response
+    '''
+    return request("PUT", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    '''
+    Send a DELETE request, retried on connection errors and 502/503/504
+
+    :param str url: a given url
+    :return: response
+    :rtype: requests.Response
+    '''
+    return request("DELETE", url, **kwargs)
+
+
+def _getAsyncExecutor():
+    global _asyncExecutor
+    if _asyncExecutor is None:
+        with _sessionsLock:
+            if _asyncExecutor is None:
+                _asyncExecutor = ThreadPoolExecutor(
+                    max_workers=http_async_workers,
+                    thread_name_prefix="w3rkstatt-http")
+    return _asyncExecutor
+
+
+def _getHedgeExecutor():
+    # A hedge waiting on a shared worker thread must not wait for calls
+    # queued behind it on the same pool
+    global _hedgeExecutor
+    if _hedgeExecutor is None:
+        with _sessionsLock:
+            if _hedgeExecutor is None:
+                _hedgeExecutor = ThreadPoolExecutor(
+                    max_workers=http_hedge_workers,
+                    thread_name_prefix="w3rkstatt-hedge")
+    return _hedgeExecutor
+
+
+def getRunningLoop():
+    '''
+    Get the event loop of the running coroutine
+
+    asyncio.get_running_loop needs Python 3.7, inside a coroutine
+    asyncio.get_event_loop returns the same loop on Python 3.6
+
+    :return: event loop
+    '''
+    try:
+        return asyncio.get_running_loop()
+    except AttributeError:
+        return asyncio.get_event_loop()
+
+
+def _getAsyncLimit(loop, name):
+    # asyncio semaphores are bound to the event loop they are used in
+    limits = _asyncLimits.get(loop)
+    if limits is None:
+        limits = {}
+        _asyncLimits[loop] = limits
+    limit = limits.get(name)
+    if limit is None:
+        limit = asyncio.Semaphore(http_async_limit)
+        limits[name] = limit
+    return limit
+
+
+async def runAsync(func, *args, limit="default", **kwargs):
+    '''
+    Await a blocking connector function
+
+    The call runs on the shared worker threads and uses the same pooled
+    sessions as blocking calls, at most async_limit calls per backend
+    are in flight.
+
+    :param func func: connector function
+    :param str limit: backend name the concurrency limit applies to
+    :return: result of func
+    '''
+    loop = getRunningLoop()
+    async with _getAsyncLimit(loop, limit):
+        return await loop.run_in_executor(
+            _getAsyncExecutor(), functools.partial(func, *args, **kwargs))
+
+
+def hedge(calls, valid=None, delay=0.0, timeout=None, discard=None):
+    '''
+    Query alternative sources of the same data, the first valid answer wins
+
+    The first call starts at once, each further call after delay seconds
+    or as soon as all started calls failed. Calls not started yet are
+    cancelled once a valid answer arrived, running calls finish on the
+    hedge worker threads and their answer is handed to discard.
+
+    :param list calls: functions without arguments, preferred source first
+    :param func valid: check of an answer, default any answer without error
+    :param float delay: seconds before the next source is queried
+    :param float timeout: max. seconds to wait for a valid answer
+    :param func discard: clean up of an answer that is not returned
+    :return: first valid answer, else the last answer, None if all failed
+    '''
+
+    def _discard(future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            discard(future.result())
+        except Exception as err:
+            logger.error('HTTP: Hedged call discard failed: %s', err)
+
+    executor = _getHedgeExecutor()
+    queue = list(calls)
+    started = []
+    pending = set()
+    answer = None
+    deadline = None if timeout is None else time.monotonic() + timeout
+    nextStart = time.monotonic()
+    try:
+        while queue or pending:
+            now = time.monotonic()
+            if queue and (now >= nextStart or not pending):
+                future = executor.submit(queue.pop(0))
+                started.append(future)
+                pending.add(future)
+                nextStart = now + delay
+                continue
+            wait = None
+            if queue:
+                wait = max(0.0, nextStart - now)
+            if deadline is not None:
+                if now >= deadline:
+                    logger.error('HTTP: Hedged call timed out after %s s',
+                                 timeout)
+                    break
+                wait = deadline - now if wait is None else min(
+                    wait, deadline - now)
+            done, pending = futures.wait(pending,
+                                         timeout=wait,
+                                         return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                err = future.exception()
+                if err is not None:
+                    logger.error('HTTP: Hedged call failed: %s', err)
+                    continue
+                answer = future
+                if valid is None or valid(future.result()):
+                    return future.result()
+    finally:
+        for future in started:
+            if future is answer or future.cancel() or discard is None:
+                continue
+            future.add_done_callback(_discard)
+    if answer is None:
+        return None
+    return answer.result()
@@ -26,6 +26,9 @@ Date (YMD)    Name                  What
 --------      ------------------    ------------------------
 20210513      Volker Scheithauer    Tranfer Development from other projects
 20210527      Volker Scheithauer    Update UAT
+20261019      Rafael Ulhoa          Use shared pooled HTTP sessions
+20261019      Rafael Ulhoa          Cache authentication tokens
+20261019      Rafael Ulhoa          Add async connector variants
 """
 
 import os
@@ -47,11 +50,15 @@ import jsonpath_rw_ext as jp
 # handle dev environment vs. production
 try:
     import w3rkstatt as w3rkstatt
+    import core_http as http
+    import core_token as token
 except:
     # fix import issues for modules
     sys.path.append(
         os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
     from src import w3rkstatt as w3rkstat
+    from src import core_http as http
+    from src import core_token as token
 
 # Get configuration from bmcs_core.json
 # jCfgFile     = os.path.join( w3rkstatt.getCurrentFolder(), "bmcs_core.json")
@@ -173,10 +180,10 @@ def authenticate():
 
     # Execute the API call.
     try:
-        response = requests.post(url,
-                                 data=payload,
-                                 headers=headers,
-                                 verify=False)
+        response = http.post(url,
+                             data=payload,
+                             headers=headers,
+                             verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -221,10 +228,10 @@ def logout(token):
 
     # Execute the API call.
     try:
-        response = requests.post(url,
-                                 data=payload,
-                                 headers=headers,
-                                 verify=False)
+        response = http.post(url,
+                             data=payload,
+                             headers=headers,
+                             verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -280,7 +287,7 @@ def apiGet(form, headers, entry=""):
 
     # Execute the API call.
     try:
-        response = requests.get(url, headers=headers, verify=False)
+        response = http.get(url, headers=headers, verify=False)
 
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
@@ -351,12 +358,12 @@ def apiPost(form, headers, body="", fields=""):
     # Execute the API call.
     try:
         if len(request_body) < 0:
-            response = requests.get(url, headers=headers, verify=False)
+            response = http.get(url, headers=headers, verify=False)
         else:
-            response = requests.post(url,
-                                     data=payload,
-                                     headers=headers,
-                                     verify=False)
+            response = http.post(url,
+                                 data=payload,
+                                 headers=headers,
+                                 verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
 
@@ -645,6 +652,47 @@ def extractChangeState(change):
     return status
 
 
+# Async variants, share pools and limits with the blocking calls
+
+
+async def authenticateAsync():
+    '''
+    Login to ITSM without blocking the event loop, see authenticate
+    '''
+    return await http.runAsync(authenticate, limit="itsm")
+
+
+async def createIncidentAsync(token, data):
+    '''
+    Create an ITSM incident without blocking the event loop, see createIncident
+    '''
+    return await http.runAsync(createIncident, token, data,
+                               limit="itsm")
+
+
+async def createChangeAsync(token, data):
+    '''
+    Create an ITSM change without blocking the event loop, see createChange
+    '''
+    return await http.runAsync(createChange, token, data,
+                               limit="itsm")
+
+
+async def getChangeAsync(token, change):
+    '''
+    Get ITSM change details without blocking the event loop, see getChange
+    '''
+    return await http.runAsync(getChange, token, change,
+                               limit="itsm")
+
+
+# Shared ITSM token, AR-JWT tokens expire after one hour by default
+tokenCache = token.TokenCache(name="itsm",
+                              login=authenticate,
+                              logout=logout,
+                              ttl=3600)
+
+
 if __name__ == "__main__":
     logging.basicConfig(filename=logFile,
                         filemode='w',
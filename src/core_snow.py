@@ -27,8 +27,13 @@ Date (YMD)    Name                  What
 --------      ------------------    ------------------------
 20201001      Volker Scheithauer    Initial Development
 20220701      Volker Scheithauer    Migrate to W3rkstatt project
+20261019      Rafael Ulhoa          Use shared pooled HTTP sessions
+20261019      Rafael Ulhoa          Cache decrypted credentials
+20261019      Rafael Ulhoa          Add async connector variants
+20261019      Rafael Ulhoa          Decrypt password once, no token cache
 """
 import w3rkstatt
+import core_http as http
 import os
 import json
 import logging
@@ -101,6 +106,23 @@ if snow_ssl_ver == False:
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
+# SNOW uses basic authentication, the password is decrypted once and kept
+# in memory only, session cookies are kept by the shared HTTP session
+_snowPwd = None
+
+
+def getSnowPassword():
+    '''
+    Decrypt the SNOW password on first use and reuse it afterwards
+
+    :return: decrypted password
+    :rtype: str
+    '''
+    global _snowPwd
+    if _snowPwd is None:
+        _snowPwd = w3rkstatt.decryptPwd(data=snow_pwd_sec)
+    return _snowPwd
+
 # Versioned URL: /api/now/{api_version}/table/{tableName}/{sys_id}
 # Default URL: /api/now/table/{tableName}/{sys_id}
 
@@ -123,7 +145,7 @@ def snowAppGet(application, action="", namespace="now"):
     :raises ValueError: N/A
     :raises TypeError: N/A    
     '''
-    snow_pwd = w3rkstatt.decryptPwd(data=snow_pwd_sec)
+    snow_pwd = getSnowPassword()
     if snow_api_ver == "latest":
         snow_url = snow_protocol + snow_host + ":" + \
             snow_port + "/api/" + namespace + "/" + application
@@ -145,7 +167,7 @@ def snowAppGet(application, action="", namespace="now"):
 
     # Execute the API call.
     try:
-        response = requests.get(url, auth=(
+        response = http.get(url, auth=(
             snow_user, snow_pwd), headers=headers, verify=False)
 
     except requests.RequestException as e:
@@ -208,7 +230,7 @@ def snowAppPost(application, item, body="", action="", namespace="now"):
     :raises ValueError: N/A
     :raises TypeError: N/A    
     '''
-    snow_pwd = w3rkstatt.decryptPwd(data=snow_pwd_sec)
+    snow_pwd = getSnowPassword()
     if snow_api_ver == "latest":
         snow_url = snow_protocol + snow_host + ":" + \
             snow_port + "/api/" + namespace + "/" + application
@@ -245,10 +267,10 @@ def snowAppPost(application, item, body="", action="", namespace="now"):
     # Execute the API call.
     try:
         if len(request_body) < 0:
-            response = requests.get(url, auth=(
+            response = http.get(url, auth=(
                 snow_user, snow_pwd), headers=headers, verify=False)
         else:
-            response = requests.post(url, auth=(
+            response = http.post(url, auth=(
                 snow_user, snow_pwd), data=payload, headers=headers, verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
@@ -333,6 +355,34 @@ def getSnowOrderScStatus(sc_number):
     return sReqApproval
 
 
+# Async variants, share pools and limits with the blocking calls
+
+
+async def snowAppGetAsync(application, action="", namespace="now"):
+    '''
+    Get ServiceNow data without blocking the event loop, see snowAppGet
+    '''
+    return await http.runAsync(snowAppGet, application, action, namespace,
+                               limit="snow")
+
+
+async def snowAppPostAsync(application,
+                           item,
+                           body="",
+                           action="",
+                           namespace="now"):
+    '''
+    Post ServiceNow data without blocking the event loop, see snowAppPost
+    '''
+    return await http.runAsync(snowAppPost,
+                               application,
+                               item,
+                               body,
+                               action,
+                               namespace,
+                               limit="snow")
+
+
 if __name__ == "__main__":
     logging.basicConfig(filename=logFile, filemode='w', level=logging.DEBUG,
                         format='%(asctime)s - %(levelname)s # %(message)s', datefmt='%d-%b-%y %H:%M:%S')
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# Filename: core_token.py
+"""
+(c) 2026 Rafael Ulhoa
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+The above copyright notice and this permission notice (including the next paragraph) shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+https://opensource.org/licenses/GPL-3.0
+# SPDX-License-Identifier: GPL-3.0-or-later
+For information on SDPX, https://spdx.org/licenses/GPL-3.0-or-later.html
+
+w3rkstatt Python authentication token cache
+Keep connector tokens until they expire, optionally shared between processes
+
+Change Log
+Date (YMD)    Name                  What
+--------      ------------------    ------------------------
+20261019      Rafael Ulhoa          Initial Development
+20261019      Rafael Ulhoa          Token refresh, one token file per endpoint
+
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import base64
+import atexit
+import logging
+import threading
+
+# handle dev environment vs. production
+try:
+    import w3rkstatt as w3rkstatt
+    import core_http as http
+except:
+    # fix import issues for modules
+    sys.path.append(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    from src import w3rkstatt as w3rkstatt
+    from src import core_http as http
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    import msvcrt
+    fcntl = None
+
+# Get configuration from bmcs_core.json
+jCfgData = w3rkstatt.getProjectConfig()
+cfgFolder = w3rkstatt.getJsonValue(path="$.DEFAULT.config_folder",
+                                   data=jCfgData)
+cryptoFile = w3rkstatt.getJsonValue(path="$.DEFAULT.crypto_file",
+                                    data=jCfgData)
+
+# Token files are shared by all processes of the same host
+token_persist = w3rkstatt.getJsonValue(path="$.DEFAULT.tokens.persist",
+                                       data=jCfgData) is True
+token_folder = w3rkstatt.getJsonValue(path="$.DEFAULT.tokens.folder",
+                                      data=jCfgData) or cfgFolder
+token_margin = int(
+    w3rkstatt.getJsonValue(path="$.DEFAULT.tokens.refresh_margin",
+                           data=jCfgData) or 300)
+
+# Assign module defaults
+_modVer = "20.26.10.00"
+_localDebug = False
+logger = logging.getLogger(__name__)
+epoch = time.time()
+
+
+def getTokenTtl(name, default):
+    '''
+    Get the configured token lifetime of a backend
+
+    :param str name: backend name, e.g. itsm
+    :param int default: lifetime in seconds if not configured
+    :return: lifetime in seconds
+    :rtype: int
+    '''
+    value = w3rkstatt.getJsonValue(path="$.DEFAULT.tokens.ttl." + name,
+                                   data=jCfgData)
+    if value == "" or value is None:
+        return default
+    return int(value)
+
+
+def getJwtExpiry(token):
+    '''
+    Get the expiry of a JSON web token
+
+    :param str token: JWT
+    :return: expiry as epoch, None if the token has no exp claim
+    :rtype: float
+    '''
+    try:
+        payload = str(token).split(".")[1]
+        payload = payload + "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class FileLock(object):
+    '''
+    Exclusive lock on a file, shared by processes of the same host
+    '''
+
+    def __init__(self, file):
+        self.file = file
+        self.handle = None
+
+    def __enter__(self):
+        self.handle = open(self.file, "a+")
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_EX)
+        else:
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if fcntl is not None:
+            fcntl.flock(self.handle.fileno(), fcntl.LOCK_UN)
+        else:
+            self.handle.seek(0)
+            msvcrt.locking(self.handle.fileno(), msvcrt.LK_UNLCK, 1)
+        self.handle.close()
+        self.handle = None
+        return False
+
+
+class TokenCache(object):
+    '''
+    Cache the authentication token of a backend
+
+    The token is renewed once it is within the refresh margin of its expiry,
+    JWT tokens use their exp claim, other tokens the configured lifetime.
+    With persist the token is stored encrypted in a locked file, so short
+    lived processes on the same host reuse one login.
+
+    itsmTokens = token.TokenCache(name="itsm", login=authenticate, logout=logout)
+    change = itsmTokens.call(getChange, change="CRQ000000000001")
+    '''
+
+    def __init__(self,
+                 name,
+                 login,
+                 logout=None,
+                 ttl=3600,
+                 persist=None,
+                 refresh=None,
+                 key=None):
+        '''
+        :param str name: backend name, used for config and token file
+        :param func login: function returning a new token or None
+        :param func logout: function taking a token to end its session
+        :param int ttl: lifetime in seconds if the token has no expiry
+        :param bool persist: share the token via file, default from config
+        :param func refresh: function taking a token, returning a new one or None
+        :param str key: endpoint of the backend, if there can be several
+        '''
+        self.name = name
+        self.login = login
+        self.logout = logout
+        self.refresh = refresh
+        self.ttl = getTokenTtl(name, ttl)
+        if persist is None:
+            persist = token_persist
+        self.persist = persist and len(token_folder) > 0
+        fileName = name
+        if key:
+            fileName = name + "." + re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+        self.file = os.path.join(token_folder, "token." + fileName + ".json")
+        self.token = None
+        self.expires = 0
+        self.lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _isValid(self, expires):
+        return expires - token_margin > time.time()
+
+    def _getExpiry(self, token):
+        expires = getJwtExpiry(token)
+        maxExpires = time.time() + self.ttl
+        if expires is None or expires > maxExpires:
+            expires = maxExpires
+        return expires
+
+    def _readFile(self):
+        try:
+            with open(self.file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            token = w3rkstatt.decrypt(data=data["token"],
+                                      sKeyFileName=cryptoFile)
+            return token, float(data["expires"])
+        except (OSError, KeyError, TypeError, ValueError):
+            return None, 0
+
+    def _writeFile(self, token, expires):
+        content = {
+            "name": self.name,
+            "expires": expires,
+            "token": w3rkstatt.encrypt(data=token, sKeyFileName=cryptoFile)
+        }
+        w3rkstatt.writeJsonFile(file=self.file, content=content, compact=True)
+
+    def _renew(self, stale, force=False):
+        # Another process may have renewed the token already
+        if self.persist:
+            token, expires = self._readFile()
+            if token is not None and token != stale and self._isValid(
+                    expires):
+                return token, expires
+
+        # Extend the session of a token that has not been rejected
+        token = None
+        refreshed = False
+        if stale is not None and not force and self.refresh is not None:
+            token = self.refresh(stale)
+            refreshed = token is not None
+        if token is None:
+            token = self.login()
+        if token is None:
+            return None, 0
+        expires = self._getExpiry(token)
+        if self.persist:
+            self._writeFile(token, expires)
+        elif stale is not None and not refreshed and self.logout is not None:
+            self.logout(stale)
+        if _localDebug:
+            logger.debug('Token: "%s" renewed, expires: %s', self.name,
+                         expires)
+        return token, expires
+
+    def getToken(self, force=False):
+        '''
+        Get a valid token, login only if needed
+
+        :param bool force: renew even if the cached token looks valid
+        :return: token
+        :rtype: str
+        '''
+        with self.lock:
+            if not force and self.token is not None and self._isValid(
+                    self.expires):
+                return self.token
+
+            stale = self.token
+            if self.persist:
+                with FileLock(self.file + ".lock"):
+                    if not force and stale is None:
+                        token, expires = self._readFile()
+                        if token is not None and self._isValid(expires):
+                            self.token, self.expires = token, expires
+                            return self.token
+                    self.token, self.expires = self._renew(stale, force)
+            else:
+                self.token, self.expires = self._renew(stale, force)
+            return self.token
+
+    def invalidate(self):
+        '''
+        Drop the cached token, e.g. after the backend rejected it
+        '''
+        with self.lock:
+            self.expires = 0
+
+    def call(self, func, *args, **kwargs):
+        '''
+        Call a connector function with a token, retry once on 401
+
+        :param func func: connector function with a token argument
+        :return: result of func, None if no token could be obtained
+        '''
+        authToken = self.getToken()
+        if authToken is None:
+            logger.error('Token: "%s" login failed', self.name)
+            return None
+        result = func(*args, token=authToken, **kwargs)
+        if http.getLastStatus() == 401:
+            logger.info('Token: "%s" rejected, login again', self.name)
+            self.invalidate()
+            authToken = self.getToken(force=True)
+            if authToken is None:
+                logger.error('Token: "%s" login failed', self.name)
+                return None
+            result = func(*args, token=authToken, **kwargs)
+        return result
+
+    async def callAsync(self, func, *args, **kwargs):
+        '''
+        Await a connector function with a token, see call
+
+        :param func func: connector function with a token argument
+        :return: result of func, None if no token could be obtained
+        '''
+        return await http.runAsync(self.call,
+                                   func,
+                                   *args,
+                                   limit=self.name,
+                                   **kwargs)
+
+    def close(self):
+        '''
+        End the session of a process local token
+        '''
+        with self.lock:
+            token = self.token
+            self.token = None
+            self.expires = 0
+        if token is not None and not self.persist and self.logout is not None:
+            try:
+                self.logout(token)
+            except Exception as err:
+                logger.error('Token: "%s" logout failed: %s', self.name, err)
@@ -26,6 +26,9 @@ Change Log
 Date (YMD)    Name                  What
 --------      ------------------    ------------------------
 20210513      Volker Scheithauer    Tranfer Development from other projects
+20261019      Rafael Ulhoa          Use shared pooled HTTP sessions
+20261019      Rafael Ulhoa          Cache authentication tokens
+20261019      Rafael Ulhoa          Add async connector variants
 
 
 See also: https://realpython.com/python-send-email/
@@ -39,10 +42,14 @@ import sys, getopt
 # handle dev environment vs. production 
 try:
     import w3rkstatt as w3rkstatt
+    import core_http as http
+    import core_token as token
 except:
     # fix import issues for modules
     sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
     from src import w3rkstatt as w3rkstat
+    from src import core_http as http
+    from src import core_token as token
 
 # Define global variables from w3rkstatt.ini file
 # Get configuration from bmcs_core.json
@@ -131,7 +138,7 @@ def authenticate():
 
   # Execute the API call.
   try:
-    response = requests.post(url, data=payload, headers=headers, verify=False)
+    response = http.post(url, data=payload, headers=headers, verify=False)
   except requests.RequestException as e:
     logger.error('HTTP Response Error: %s', e)
 
@@ -171,7 +178,7 @@ def createEvent(token,event_data):
     logger.debug('HTTP Payload: %s', payload)
 
   try:
-    response = requests.post(url, data=payload, headers=headers, verify=False)
+    response = http.post(url, data=payload, headers=headers, verify=False)
   except requests.RequestException as e:
     logger.error('HTTP Response Error: %s', e)
 
@@ -213,7 +220,7 @@ def updateEvent(token,event_data):
     logger.debug('HTTP Payload: %s', payload)
 
   try:
-    response = requests.put(url, data=payload, headers=headers, verify=False)
+    response = http.put(url, data=payload, headers=headers, verify=False)
   except requests.RequestException as e:
     logger.error('HTTP Response Error: %s', e)
 
@@ -267,7 +274,7 @@ def searchEvent(token,tsimEventIdentifier,tsimEventValue):
     logger.debug('HTTP Payload: %s', payload)
 
   try:
-    response = requests.post(url, json=payload, headers=headers, verify=False)
+    response = http.post(url, json=payload, headers=headers, verify=False)
   except requests.RequestException as e:
     logger.error('HTTP Response Error: %s', e)
 
@@ -350,7 +357,7 @@ def searchCI(token,tsimCiIdentifier,tsimCiValue):
     logger.debug('HTTP Payload: %s', payload)
 
   try:
-    response = requests.post(url, json=payload, headers=headers, verify=False)
+    response = http.post(url, json=payload, headers=headers, verify=False)
   except requests.RequestException as e:
     logger.error('HTTP Response Error: %s', e)
 
@@ -391,7 +398,7 @@ def searchCIAdvanced(token,tsimCiSearchFilter):
     logger.debug('HTTP Payload: %s', payload)
 
   try:
-    response = requests.post(url, data=payload, headers=headers, verify=False)
+    response = http.post(url, data=payload, headers=headers, verify=False)
   except requests.RequestException as e:
     logger.error('HTTP Response Error: %s', e)
 
@@ -435,7 +442,7 @@ def createCI(token,data,ciType="CI"):
     logger.debug('HTTP Payload: %s', payload)
 
   try:
-    response = requests.post(url, data=payload, headers=headers, verify=False)
+    response = http.post(url, data=payload, headers=headers, verify=False)
   except requests.RequestException as e:
     logger.error('HTTP Response Error: %s', e)
 
@@ -457,6 +464,28 @@ def createCI(token,data,ciType="CI"):
     
 
 
+# Async variants, share pools and limits with the blocking calls
+
+
+async def authenticateAsync():
+  '''
+  Login to TSIM without blocking the event loop, see authenticate
+  '''
+  return await http.runAsync(authenticate, limit="tsim")
+
+
+async def createEventAsync(token,event_data):
+  '''
+  Create a TSIM event without blocking the event loop, see createEvent
+  '''
+  return await http.runAsync(createEvent, token, event_data,
+                             limit="tsim")
+
+
+# Shared TSIM token
+tokenCache = token.TokenCache(name="tsim", login=authenticate, ttl=3600)
+
+
 if __name__ == "__main__":
     logging.basicConfig(filename=logFile, filemode='w', level=logging.DEBUG , format='%(asctime)s - %(levelname)s # %(message)s', datefmt='%d-%b-%y %H:%M:%S')
     logger.info('TSIM: start event management')
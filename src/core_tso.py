@@ -26,6 +26,9 @@ Change Log
 Date (YMD)    Name                  What
 --------      ------------------    ------------------------
 20210527      Volker Scheithauer    Tranfer Development from other projects
+20261019      Rafael Ulhoa          Use shared pooled HTTP sessions
+20261019      Rafael Ulhoa          Cache authentication tokens
+20261019      Rafael Ulhoa          Add async connector variants
 
 """
 
@@ -49,11 +52,15 @@ import jsonpath_rw_ext as jp
 # handle dev environment vs. production
 try:
     import w3rkstatt as w3rkstatt
+    import core_http as http
+    import core_token as token
 except:
     # fix import issues for modules
     sys.path.append(os.path.dirname(
         os.path.dirname(os.path.realpath(__file__))))
     from src import w3rkstatt as w3rkstat
+    from src import core_http as http
+    from src import core_token as token
 
 # Get configuration from bmcs_core.json
 # jCfgFile     = os.path.join( w3rkstatt.getCurrentFolder(), "bmcs_core.json")
@@ -146,7 +153,7 @@ def authenticate():
 
     # Execute the API call.
     try:
-        response = requests.post(
+        response = http.post(
             url, data=payload, headers=headers, verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
@@ -200,7 +207,7 @@ def logout(data):
 
     # Execute the API call.
     try:
-        response = requests.post(
+        response = http.post(
             url, data=payload, headers=headers, verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
@@ -250,9 +257,9 @@ def apiGet(api, headers, body=""):
     # Execute the API call.
     try:
         if len(request_body) < 0:
-            response = requests.get(url, headers=headers, verify=False)
+            response = http.get(url, headers=headers, verify=False)
         else:
-            response = requests.get(
+            response = http.get(
                 url, data=payload, headers=headers, verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
@@ -312,9 +319,9 @@ def apiPost(api, headers, body=""):
     # Execute the API call.
     try:
         if len(request_body) < 0:
-            response = requests.get(url, headers=headers, verify=False)
+            response = http.get(url, headers=headers, verify=False)
         else:
-            response = requests.post(
+            response = http.post(
                 url, data=payload, headers=headers, verify=False)
     except requests.RequestException as e:
         logger.error('HTTP Response Error: %s', e)
@@ -520,13 +527,36 @@ def executeProcess(process, data=""):
         logger.debug('TSO Process Name: %s', process)
         logger.debug('TSO Process Data: %s', data)
 
-    authToken = authenticate()
-    response = executeTsoProcess(token=authToken, process=process, data=data)
+    response = tokenCache.call(executeTsoProcess, process=process, data=data)
     response = w3rkstatt.jsonTranslateValues(data=response)
-    logout(authToken)
     return response
 
 
+# Async variants, share pools and limits with the blocking calls
+
+
+async def authenticateAsync():
+    '''
+    Login to TSO without blocking the event loop, see authenticate
+    '''
+    return await http.runAsync(authenticate, limit="tso")
+
+
+async def executeTsoProcessAsync(token, process, data=""):
+    '''
+    Execute a TSO workflow without blocking the event loop, see executeTsoProcess
+    '''
+    return await http.runAsync(executeTsoProcess, token, process, data,
+                               limit="tso")
+
+
+# Shared TSO token, logged out at process exit unless persisted
+tokenCache = token.TokenCache(name="tso",
+                              login=authenticate,
+                              logout=logout,
+                              ttl=1800)
+
+
 if __name__ == "__main__":
     logging.basicConfig(filename=logFile, filemode='a', level=logging.DEBUG,
                         format='%(asctime)s - %(levelname)s # %(message)s', datefmt='%d-%b-%y %H:%M:%S')
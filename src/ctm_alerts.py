@@ -27,6 +27,13 @@ Date (YMD)    Name                  What
 20210527      Volker Scheithauer    Tranfer Development from other projects
 20220715      Volker Scheithauer    BMC Helix Operation Management Integration
 20240503      Volker Scheithauer    Fix CTM Alert conversion to json
+20261019      Rafael Ulhoa          Atomic alert file writes
+20261019      Rafael Ulhoa          Reuse cached BHOM token
+20261019      Rafael Ulhoa          Retry BHOM assign, note on rejected token
+20261019      Rafael Ulhoa          Job config from the folder index
+20261019      Rafael Ulhoa          Size capped job output capture
+20261019      Rafael Ulhoa          Hedged live and archive job log, output
+20261019      Rafael Ulhoa          Fetch job log, output in hedged mode
 
 """
 
@@ -48,6 +55,7 @@ try:
     import w3rkstatt as w3rkstatt
     import core_ctm as ctm
     import core_bhom as bhom
+    import core_http as http
 except:
     # fix import issues for modules
     sys.path.append(
@@ -55,6 +63,7 @@ except:
     from src import w3rkstatt as w3rkstatt
     from src import core_ctm as ctm
     from src import core_bhom as bhom
+    from src import core_http as http
 
 # Get configuration from bmcs_core.json
 jCfgData = w3rkstatt.getProjectConfig()
@@ -79,6 +88,29 @@ ctm_job_log_level = w3rkstatt.getJsonValue(path="$.CTM.jobs.log_level",
                                            data=jCfgData)
 ctm_job_detail_level = w3rkstatt.getJsonValue(path="$.CTM.jobs.detail_level",
                                               data=jCfgData)
+# Job output: full, capped (first and last lines, optional gzip spill file)
+ctm_job_output_capture = w3rkstatt.getJsonValue(
+    path="$.CTM.jobs.output.capture", data=jCfgData) or "full"
+ctm_job_output_spill = w3rkstatt.getJsonValue(
+    path="$.CTM.jobs.output.spill", data=jCfgData) is True
+ctm_job_output_folder = w3rkstatt.getJsonValue(
+    path="$.CTM.jobs.output.spill_folder", data=jCfgData) or logFolder
+
+# Job log & output source: live, hedged (live and archive, first answer wins)
+ctm_job_fetch = w3rkstatt.getJsonValue(path="$.CTM.jobs.fetch.mode",
+                                       data=jCfgData) or "live"
+ctm_job_fetch_delay = float(
+    w3rkstatt.getJsonValue(path="$.CTM.jobs.fetch.archive_delay",
+                           data=jCfgData) or 0.5)
+ctm_job_fetch_timeout = float(
+    w3rkstatt.getJsonValue(path="$.CTM.jobs.fetch.timeout", data=jCfgData)
+    or 60)
+
+# Alert file output: compact json, durability none/file/dir
+json_compact = w3rkstatt.getJsonValue(path="$.DEFAULT.json_files.compact",
+                                      data=jCfgData) is True
+json_durability = w3rkstatt.getJsonValue(
+    path="$.DEFAULT.json_files.durability", data=jCfgData) or "file"
 
 ctmCoreData = None
 ctmJobData = None
@@ -233,11 +265,74 @@ def getCtmJobRunLog(ctmApiClient, data):
     return sCtmJobLog
 
 
+def getCtmArchiveJobRunLog(ctmApiClient, data):
+    ctmJobRunCounter = w3rkstatt.getJsonValue(path="$.run_counter", data=data)
+    sLogData = getCtmArchiveJobLog(ctmApiClient, data)
+
+    # Based on config, extract level of details
+    if ctm_job_log_level == "full":
+        jCtmJobLog = ctm.transformCtmJobLog(data=sLogData)
+    else:
+        jCtmJobLog = ctm.transformCtmJobLogMini(data=sLogData,
+                                                runCounter=ctmJobRunCounter)
+    return str(jCtmJobLog)
+
+
+def isCtmJobLogValid(data):
+    try:
+        return json.loads(data)["status"] is True
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def isCtmJobOutputValid(data):
+    return isinstance(data, dict) and data.get("status") is True
+
+
+def getCtmJobLogHedged(ctmApiClient, data):
+    # Live and archive log, archive after a short delay, first valid wins
+    if _localDebugFunctions:
+        logger.debug('Function = "%s" ', "getCtmJobLogHedged")
+    return http.hedge(
+        [lambda: getCtmJobRunLog(ctmApiClient, data),
+         lambda: getCtmArchiveJobRunLog(ctmApiClient, data)],
+        valid=isCtmJobLogValid,
+        delay=ctm_job_fetch_delay,
+        timeout=ctm_job_fetch_timeout)
+
+
+def discardCtmJobOutput(data):
+    # Spill file of a capped capture that lost the hedged fetch
+    try:
+        sSpillFile = data["capture"]["file"]
+    except (KeyError, TypeError):
+        return
+    if sSpillFile is not None and os.path.isfile(sSpillFile):
+        os.remove(sSpillFile)
+
+
+def getCtmJobOutputHedged(ctmApiClient, data):
+    # Live and archive output, archive after a short delay, first valid wins
+    if _localDebugFunctions:
+        logger.debug('Function = "%s" ', "getCtmJobOutputHedged")
+    return http.hedge(
+        [lambda: getCtmJobRunOutput(ctmApiClient, data),
+         lambda: getCtmArchiveJobRunOutput(ctmApiClient, data)],
+        valid=isCtmJobOutputValid,
+        delay=ctm_job_fetch_delay,
+        timeout=ctm_job_fetch_timeout,
+        discard=discardCtmJobOutput)
+
+
 def getCtmJobLog(ctmApiClient, data):
     # Get CTM job log after 30 sec - wait for archive server to have log
     if _localDebugFunctions:
         logger.debug('Function = "%s" ', "getCtmJobLog")
         logger.debug('CMT Job Log: First attempt to retrieve data')
+    if ctm_job_fetch == "hedged":
+        sCtmJobLog = getCtmJobLogHedged(ctmApiClient, data)
+        if isCtmJobLogValid(sCtmJobLog):
+            return sCtmJobLog
     time.sleep(2)
     sCtmJobLog = getCtmJobRunLog(ctmApiClient, data)
 
@@ -259,30 +354,32 @@ def getCtmJobLog(ctmApiClient, data):
 
 def getCtmJobConfig(ctmApiClient, data):
     jCtmJobInfo = data
-    ctmFolderInfo = getCtmFolder(ctmApiClient=ctmApiClient, data=jCtmJobInfo)
-    jCtmFolderInfo = json.loads(ctmFolderInfo)
-    iCtmFolderInfo = w3rkstatt.getJsonValue(path="$.count",
-                                            data=jCtmFolderInfo)
-    sStatus = w3rkstatt.getJsonValue(path="$.status", data=jCtmFolderInfo)
-
-    if ctm_job_detail_level == "full" or iCtmFolderInfo == 1:
-        jCtmJobDetail = ctmFolderInfo
-        sCtmJobDetail = w3rkstatt.dTranslate4Json(data=jCtmJobDetail)
-    else:
+    if ctm_job_detail_level == "mini":
         if _localDebugData:
             logger.debug('Function = "%s" ', "getCtmJobConfig")
             logger.debug('CMT Job Config: "%s"', jCtmJobInfo)
-        if sStatus:
-            jCtmJobName = w3rkstatt.getJsonValue(path="$.name",
-                                                 data=jCtmJobInfo)
-            jCtmFolderName = w3rkstatt.getJsonValue(path="$.folder",
-                                                    data=jCtmJobInfo)
-            jQl = "$." + str(jCtmFolderName) + "." + str(jCtmJobName)
-            jData = json.loads(ctmFolderInfo)
-            jCtmJobDetail = w3rkstatt.getJsonValue(path=jQl, data=jData)
-            sCtmJobDetail = w3rkstatt.dTranslate4Json(data=jCtmJobDetail)
-        else:
-            sCtmJobDetail = ctmFolderInfo
+        jCtmJobEntry = jCtmJobInfo["entries"][0]
+        jCtmJobName = jCtmJobEntry["name"]
+        ctmFolderIndex = ctm.getCtmFolderIndex(
+            ctmApiClient=ctmApiClient,
+            ctmServer=jCtmJobEntry["ctm"],
+            ctmFolder=jCtmJobEntry["folder"])
+        jCtmJobDetail = None
+        if ctmFolderIndex is not None:
+            jCtmJobDetail = ctmFolderIndex.get(
+                ctmJob=jCtmJobName, ctmFolder=jCtmJobEntry["folder"])
+        if jCtmJobDetail is not None:
+            jData = {
+                "count": 1,
+                "status": True,
+                "entries": [{
+                    jCtmJobName: jCtmJobDetail
+                }]
+            }
+            return json.dumps(jData)
+
+    ctmFolderInfo = getCtmFolder(ctmApiClient=ctmApiClient, data=jCtmJobInfo)
+    sCtmJobDetail = w3rkstatt.dTranslate4Json(data=ctmFolderInfo)
 
     return sCtmJobDetail
 
@@ -311,6 +408,11 @@ def getCtmJobRunOutput(ctmApiClient, data):
         logger.info('CTM Get Job Run Output: "%s # %s"', ctmJobID,
                     ctmJobRunCounter)
 
+    if ctm_job_output_capture == "capped":
+        return getCtmJobOutputCapped(ctmApiClient=ctmApiClient,
+                                     ctmJobID=ctmJobID,
+                                     ctmJobRunCounter=ctmJobRunCounter)
+
     value = ctm.getCtmJobOutput(ctmApiClient=ctmApiClient,
                                 ctmJobID=ctmJobID,
                                 ctmJobRunId=ctmJobRunCounter)
@@ -324,11 +426,47 @@ def getCtmJobRunOutput(ctmApiClient, data):
     return ctmJobOutput
 
 
+def getCtmJobOutputCapped(ctmApiClient,
+                          ctmJobID,
+                          ctmJobRunCounter,
+                          archive=False):
+    # Keep first and last lines, point to the spill file if truncated
+    sSpillFile = None
+    if ctm_job_output_spill:
+        sSpillFile = os.path.join(
+            ctm_job_output_folder, "ctm_output_" +
+            str(ctmJobID).replace(":", "_") + "_" + str(ctmJobRunCounter) +
+            ("_archive" if archive else "") + "_" + str(int(time.time())) +
+            ".log.gz")
+
+    capture = ctm.captureCtmJobOutput(ctmApiClient=ctmApiClient,
+                                      ctmJobID=ctmJobID,
+                                      ctmJobRunId=ctmJobRunCounter,
+                                      spillFile=sSpillFile,
+                                      archive=archive)
+    ctmJobOutput = ctm.transformCtmJobOutput(data=capture.getText())
+    if capture.truncated:
+        ctmJobOutput["capture"] = capture.getInfo()
+    elif capture.file is not None:
+        # Complete output is part of the alert document
+        os.remove(capture.file)
+
+    if _localDebugFunctions or _localDebugData:
+        logger.debug('CMT Job Output Capture: %s', capture.getInfo())
+    return ctmJobOutput
+
+
 def getCtmArchiveJobRunOutput(ctmApiClient, data):
     ctmData = data
     ctmJobID = w3rkstatt.getJsonValue(path="$.job_id", data=ctmData)
     ctmJobRunCounter = w3rkstatt.getJsonValue(path="$.run_counter",
                                               data=ctmData)
+    if ctm_job_output_capture == "capped":
+        return getCtmJobOutputCapped(ctmApiClient=ctmApiClient,
+                                     ctmJobID=ctmJobID,
+                                     ctmJobRunCounter=ctmJobRunCounter,
+                                     archive=True)
+
     value = ctm.getCtmArchiveJobOutput(ctmApiClient=ctmApiClient,
                                        ctmJobID=ctmJobID,
                                        ctmJobRunId=ctmJobRunCounter)
@@ -343,8 +481,12 @@ def getCtmJobOutput(ctmApiClient, data):
     if _localDebugFunctions:
         logger.debug('Function = "%s" ', "getCtmJobOutput")
         logger.debug('CMT Job Output: First attempt to retrieve data')
-    time.sleep(2)
-    jCtmJobOutput = getCtmJobRunOutput(ctmApiClient, data)
+    jCtmJobOutput = None
+    if ctm_job_fetch == "hedged":
+        jCtmJobOutput = getCtmJobOutputHedged(ctmApiClient, data)
+    if not isCtmJobOutputValid(jCtmJobOutput):
+        time.sleep(2)
+        jCtmJobOutput = getCtmJobRunOutput(ctmApiClient, data)
     ctmStatus = w3rkstatt.getJsonValue(path="$.status", data=jCtmJobOutput)
 
     if ctmStatus != True:
@@ -438,7 +580,9 @@ def analyzeAlert4Job(ctmApiClient, raw, data):
                 sCtmJobInfo = getCtmJobInfo(ctmApiClient=ctmApiClient,
                                             data=jCtmAlert)
 
-                if _FutureUse:
+                # Job log & output are experimental, hedged fetch mode
+                # retrieves them without the fixed retry waits
+                if _FutureUse or ctm_job_fetch == "hedged":
                     # Get job output
                     sCtmJobOutput = getCtmJobOutput(ctmApiClient=ctmApiClient,
                                                     data=jCtmAlert)
@@ -573,7 +717,10 @@ def writeAlertFile(data, alert, type="job"):
         fileName = fileType + \
             alert.zfill(8) + "-" + str(epoch).replace(".", "") + ".json"
         filePath = w3rkstatt.concatPath(path=data_folder, folder=fileName)
-        fileRsp = w3rkstatt.writeJsonFile(file=filePath, content=fileContent)
+        fileRsp = w3rkstatt.writeJsonFile(file=filePath,
+                                          content=fileContent,
+                                          compact=json_compact,
+                                          durability=json_durability)
         fileStatus = w3rkstatt.getFileStatus(path=filePath)
 
         if _localDebugFunctions:
@@ -877,16 +1024,20 @@ if __name__ == "__main__":
                 jBhomEvent = ctm.transformCtmBHOM(data=ctmAlertDataFinal,
                                                   category=ctmAlertCat)
 
-                # future enhancements -> keep token for 24 hours
-                authToken = bhom.authenticate()
+                # token is cached until it expires, see DEFAULT.tokens
+                authToken = bhom.tokenCache.getToken()
                 if authToken != None:
-                    bhom_event_id = bhom.createEvent(token=authToken,
-                                                     event_data=jBhomEvent)
+                    # Calls are repeated once with a new token on 401
+                    bhom_event_id = bhom.tokenCache.call(
+                        bhom.createEvent, event_data=jBhomEvent)
+                    if bhom_event_id is None:
+                        # Login failed after the token was rejected
+                        bhom_event_id = "BHOM-0000"
                     time.sleep(10)
                     bhom_assigned_user = w3rkstatt.getJsonValue(
                         path="$.BHOM.user", data=jCfgData)
-                    bhom.assignEvent(
-                        token=authToken,
+                    bhom.tokenCache.call(
+                        bhom.assignEvent,
                         event_id=bhom_event_id,
                         assigned_user=bhom_assigned_user,
                         event_note="Control-M Alert Integration via: " +
@@ -894,9 +1045,10 @@ if __name__ == "__main__":
 
                     time.sleep(10)
                     bhom_event_note = ctmAlertDataFinal
-                    bhom.addNoteEvent(token=authToken,
-                                      event_id=bhom_event_id,
-                                      event_note=bhom_event_note)
+                    bhom.tokenCache.call(bhom.addNoteEvent,
+                                         event_id=bhom_event_id,
+                                         event_note=bhom_event_note)
+                    authToken = bhom.tokenCache.getToken()
 
                 if _localDebugBHOM:
                     logger.debug('CTM BHOM: Event      : %s', jBhomEvent)
@@ -26,6 +26,12 @@ Change Log
 Date (YMD)    Name                  What
 --------      ------------------    ------------------------
 20210709      Volker Scheithauer    Inital Code
+20261019      Rafael Ulhoa          Write info files atomic and in batches
+20261019      Rafael Ulhoa          Agent list from the agent snapshot
+20261019      Rafael Ulhoa          Parallel discovery on a bounded thread pool
+20261019      Rafael Ulhoa          Incremental discovery against the previous inventory state
+20261019      Rafael Ulhoa          Agent hostgroups and remote hosts from dict indexes instead of pandas
+20261019      Rafael Ulhoa          Discovery workers without initializer, closed after errors
 
 """
 
@@ -44,6 +50,8 @@ except:
 import time, logging
 import sys, getopt, platform, argparse
 import os, json
+import threading, hashlib
+from concurrent import futures
 from collections import OrderedDict 
 import pandas as pd
 from io import StringIO
@@ -62,6 +70,22 @@ data_folder = w3rkstatt.getJsonValue(path="$.DEFAULT.data_folder",data=jCfgData)
 ctm_host    = w3rkstatt.getJsonValue(path="$.CTM.host",data=jCfgData)
 ctm_port    = w3rkstatt.getJsonValue(path="$.CTM.port",data=jCfgData)
 
+# Info file output: compact json, durability none/file/dir, files per flush
+json_compact    = w3rkstatt.getJsonValue(path="$.DEFAULT.json_files.compact",data=jCfgData) is True
+json_durability = w3rkstatt.getJsonValue(path="$.DEFAULT.json_files.durability",data=jCfgData) or "file"
+json_batch_size = int(w3rkstatt.getJsonValue(path="$.DEFAULT.json_files.batch_size",data=jCfgData) or 0)
+jsonBatch       = None
+
+# Discovery fan-out: worker threads, concurrent calls per Control-M server, progress log interval in seconds
+disco_workers      = int(w3rkstatt.getJsonValue(path="$.CTM.discovery.workers",data=jCfgData) or 16)
+disco_server_limit = int(w3rkstatt.getJsonValue(path="$.CTM.discovery.server_limit",data=jCfgData) or 8)
+disco_progress     = float(w3rkstatt.getJsonValue(path="$.CTM.discovery.progress",data=jCfgData) or 10)
+
+# Incremental discovery: reuse agent details and memberships of the previous run until they are older than ttl seconds
+disco_incremental  = w3rkstatt.getJsonValue(path="$.CTM.discovery.incremental",data=jCfgData) is True
+disco_ttl          = int(w3rkstatt.getJsonValue(path="$.CTM.discovery.ttl",data=jCfgData) or 86400)
+discoState         = None
+
 # Assign module defaults
 _localDebug = False
 _localDebugAdv = False
@@ -83,8 +107,266 @@ hostFqdn = w3rkstatt.getHostFqdn(hostName)
 domain   = w3rkstatt.getHostDomain(hostFqdn)
 sUuid    = w3rkstatt.sUuid
 
+class DiscoProgress(object):
+    '''
+    Log done, rate and time left of a discovery step every interval seconds
+    '''
+
+    def __init__(self,name,total,interval=None):
+        '''
+        :param str name: discovery step
+        :param int total: number of calls
+        :param float interval: seconds between log entries, default from config
+        '''
+        if interval is None:
+            interval = disco_progress
+        self.name     = name
+        self.total    = total
+        self.interval = interval
+        self.done     = 0
+        self.started  = time.time()
+        self.reported = self.started
+        self.lock     = threading.Lock()
+
+    def add(self,count=1):
+        with self.lock:
+            self.done = self.done + count
+            now = time.time()
+            if now - self.reported < self.interval and self.done < self.total:
+                return
+            self.reported = now
+            done    = self.done
+        elapsed = now - self.started
+        rate    = done / elapsed if elapsed > 0 else 0.0
+        eta     = (self.total - done) / rate if rate > 0 else 0.0
+        logger.info('CTM Discovery "%s": %s/%s done, %.1f/s, %.0fs left', self.name, done, self.total, rate, eta)
+
+class DiscoFanOut(object):
+    '''
+    Run discovery calls on a bounded thread pool
+
+    Results keep the order of the input, so the info files do not depend
+    on which call returns first. Calls for one Control-M server share a
+    semaphore of server_limit slots. Calls made from a worker run inline,
+    a worker waiting for the pool it runs on could block it.
+
+    fanOut  = DiscoFanOut(workers=16,serverLimit=8)
+    results = fanOut.map(func=getInfo,items=agents,server=lambda agent: "abc",name="agents")
+    '''
+
+    def __init__(self,workers,serverLimit):
+        '''
+        :param int workers: global limit of concurrent calls
+        :param int serverLimit: limit of concurrent calls per Control-M server
+        '''
+        self.workers     = max(1,workers)
+        self.serverLimit = max(1,serverLimit)
+        self.executor    = None
+        self.limits      = {}
+        self.lock        = threading.Lock()
+        self.local       = threading.local()
+
+    def _getExecutor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = futures.ThreadPoolExecutor(max_workers=self.workers,thread_name_prefix="disco")
+            return self.executor
+
+    def _getLimit(self,server):
+        with self.lock:
+            limit = self.limits.get(server)
+            if limit is None:
+                limit = threading.BoundedSemaphore(self.serverLimit)
+                self.limits[server] = limit
+            return limit
+
+    def _call(self,func,item,server,progress):
+        # Mark the worker thread, nested map calls run inline
+        self.local.worker = True
+        try:
+            if server is None:
+                return func(item)
+            with self._getLimit(server):
+                return func(item)
+        finally:
+            if progress is not None:
+                progress.add()
+
+    def map(self,func,items,server=None,name=None):
+        '''
+        Call func for each item in parallel
+
+        :param func func: function taking one item
+        :param list items: input items
+        :param func server: function returning the Control-M server of an item, None for no server limit
+        :param str name: discovery step for progress log, None for no progress log
+        :return: results in order of items
+        :rtype: list
+        '''
+        items = list(items)
+        if getattr(self.local,"worker",False) or len(items) < 2:
+            return [func(item) for item in items]
+
+        progress = None
+        if name is not None:
+            progress = DiscoProgress(name=name,total=len(items))
+        executor = self._getExecutor()
+        jobs = []
+        for item in items:
+            sServer = None
+            if server is not None:
+                sServer = server(item)
+            jobs.append(executor.submit(self._call,func,item,sServer,progress))
+        try:
+            return [job.result() for job in jobs]
+        finally:
+            for job in jobs:
+                job.cancel()
+
+    def close(self):
+        '''
+        Stop the worker threads
+        '''
+        with self.lock:
+            executor = self.executor
+            self.executor = None
+            self.limits = {}
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+discoFanOut = DiscoFanOut(workers=disco_workers,serverLimit=disco_server_limit)
+
+class DiscoState(object):
+    '''
+    Inventory state of the previous discovery run
+
+    Keeps the agent details (parameters and connection profiles), the
+    hostgroup and remote host members per server and the content hash of
+    every info file. An incremental run only fetches details of agents that
+    are new, changed or older than ttl and skips files whose hash did not
+    change. A full run fetches everything and writes a new state.
+
+    state = DiscoState(folder=data_folder,ttl=86400,incremental=True)
+    state.load()
+    ...
+    state.save()
+    '''
+
+    fileName = "ctm.inventory.state.json"
+    version  = 1
+
+    def __init__(self,folder,ttl,incremental):
+        '''
+        :param str folder: info file folder
+        :param int ttl: seconds until agent details and members are fetched again
+        :param bool incremental: reuse the previous state
+        '''
+        self.folder      = folder
+        self.file        = w3rkstatt.concatPath(path=folder,folder=self.fileName)
+        self.ttl         = ttl
+        self.incremental = incremental
+        self.previous    = {"servers":{},"agents":{},"files":{}}
+        self.current     = {"version":self.version,"epoch":epoch,"servers":{},"agents":{},"files":{}}
+
+    def load(self):
+        '''
+        Read the state of the previous run, a missing or invalid state starts empty
+
+        :return: status
+        :rtype: boolean
+        '''
+        if not self.incremental or not w3rkstatt.getFileStatus(path=self.file):
+            return False
+        try:
+            jState = w3rkstatt.getFileJson(file=self.file)
+        except (OSError, ValueError) as err:
+            logger.error('CTM Discovery state "%s" invalid: %s', self.file, err)
+            return False
+        if not isinstance(jState,dict) or jState.get("version") != self.version:
+            return False
+        for key in ("servers","agents","files"):
+            self.previous[key] = jState.get(key) or {}
+        return True
+
+    def save(self):
+        '''
+        Write the state of this run
+
+        :return: status
+        :rtype: boolean
+        '''
+        return w3rkstatt.writeJsonFile(file=self.file,content=self.current,compact=True,durability=json_durability)
+
+    def _isFresh(self,fetched):
+        return time.time() - float(fetched or 0) < self.ttl
+
+    def getServerData(self,ctmServer,key,names):
+        '''
+        Get members of the previous run if the list of names did not change
+
+        :param str ctmServer: Control-M server
+        :param str key: hostgroups or remote
+        :param list names: names of this run
+        :return: entry with names, data and fetched, None if it has to be fetched
+        :rtype: dict
+        '''
+        if not self.incremental:
+            return None
+        xEntry = self.previous["servers"].get(ctmServer,{}).get(key)
+        if xEntry is None or xEntry.get("names") != names or not self._isFresh(xEntry.get("fetched")):
+            return None
+        return xEntry
+
+    def setServerData(self,ctmServer,key,entry):
+        self.current["servers"].setdefault(ctmServer,{})[key] = entry
+
+    def getAgentDetails(self,ctmServer,ctmAgent,fingerprint):
+        '''
+        Get agent details of the previous run if the agent did not change
+
+        :param str ctmServer: Control-M server
+        :param str ctmAgent: agent nodeid
+        :param str fingerprint: hash of agent status, version and job types
+        :return: entry with fingerprint, parameters, profiles and fetched, None if it has to be fetched
+        :rtype: dict
+        '''
+        if not self.incremental:
+            return None
+        xEntry = self.previous["agents"].get(ctmServer + "/" + ctmAgent)
+        if xEntry is None or xEntry.get("fingerprint") != fingerprint or not self._isFresh(xEntry.get("fetched")):
+            return None
+        return xEntry
+
+    def setAgentDetails(self,ctmServer,ctmAgent,entry):
+        self.current["agents"][ctmServer + "/" + ctmAgent] = entry
+
+    def isFileChanged(self,name,file,content):
+        '''
+        Record the content hash of an info file
+
+        :param str name: info file key, stable between runs
+        :param str file: info file name of this run
+        :param dict content: file content
+        :return: False if an incremental run can keep the file of the previous run
+        :rtype: boolean
+        '''
+        sHash  = hashlib.sha256(w3rkstatt.encodeJson(content,compact=json_compact).encode("utf-8")).hexdigest()
+        xEntry = self.previous["files"].get(name)
+        if self.incremental and xEntry is not None and xEntry.get("hash") == sHash and w3rkstatt.getFileStatus(path=w3rkstatt.concatPath(path=self.folder,folder=xEntry.get("file"))):
+            self.current["files"][name] = xEntry
+            return False
+        self.current["files"][name] = {"file":file,"hash":sHash}
+        return True
+
+def getAgentFingerprint(ctmServerFqdn,ctmAgent,ctmAiJobTypes,ctmAppTypes):
+    # Agent details depend on agent status, version and the job types with connection profiles
+    lJobTypes = [str(xJobType.get("job_type_id")) for xJobType in ctmAiJobTypes["jobtypes"]]
+    sData = json.dumps([ctmServerFqdn,ctmAgent.get("status"),ctmAgent.get("version"),ctmAgent.get("operating_system"),lJobTypes,list(ctmAppTypes)],sort_keys=True,default=str)
+    return hashlib.sha256(sData.encode("utf-8")).hexdigest()
+
 def getCtmAgents(ctmApiClient,ctmServer):
-    jCtmAgents = ctm.getCtmAgents(ctmApiClient,ctmServer)
+    # Agent snapshot of the server, downloaded again once it is older than CTM.agents.refresh
+    jCtmAgents = ctm.ctmAgentSnapshots.getAgents(ctmApiClient=ctmApiClient,ctmServer=ctmServer,stale=False)
 
     return jCtmAgents
 
@@ -155,7 +437,7 @@ def getCtmServersAdv(ctmApiClient):
 
     return jCtmServers    
 
-def writeInfoFile(file,content):
+def writeInfoFile(file,content,name=None):
     fileStatus = False
     fileContent = json.loads(content)
     fileJsonStatus = w3rkstatt.jsonValidator(data=content)
@@ -163,8 +445,14 @@ def writeInfoFile(file,content):
     if fileJsonStatus:
         fileName    = file
         filePath    = w3rkstatt.concatPath(path=data_folder,folder=fileName)
-        fileRsp     = w3rkstatt.writeJsonFile(file=filePath,content=fileContent)  
-        fileStatus  = w3rkstatt.getFileStatus(path=filePath)
+        if discoState is not None and not discoState.isFileChanged(name=name or fileName,file=fileName,content=fileContent):
+            # Unchanged since the previous run, keep its file
+            filePath = w3rkstatt.concatPath(path=data_folder,folder=discoState.current["files"][name or fileName]["file"])
+        elif jsonBatch is not None:
+            fileStatus = jsonBatch.add(file=filePath,content=fileContent)
+        else:
+            fileRsp    = w3rkstatt.writeJsonFile(file=filePath,content=fileContent,compact=json_compact,durability=json_durability)
+            fileStatus = w3rkstatt.getFileStatus(path=filePath)
     else:
         filePath = ""
 
@@ -195,7 +483,7 @@ def writeHostGroupsInfoFile(ctmServer,data):
 
 def writeInventoryInfoFile(data):
     filename = "ctm.inventory." + str(epoch).replace(".","") + ".json"
-    filePath = writeInfoFile(file=filename,content=data) 
+    filePath = writeInfoFile(file=filename,content=data,name="ctm.inventory.json") 
     return filePath 
     
 def writeJobTypesInfoFile(data):
@@ -221,10 +509,13 @@ def getCentralConnectionProfiles(ctmApiClient,jobTypes):
     sCtmAppTypes = jobTypes      
     jConnProfiles = ""         
 
-    for appType in sCtmAppTypes:
+    def getProfiles(appType):
         if _localDebug: 
             logger.debug(' - Action: %s : %s',"Get Connection Profile",appType)
-        jProfiles = ctm.getCtmCentralConnectionProfile(ctmApiClient=ctmApiClient,ctmAppType=appType)
+        return ctm.getCtmCentralConnectionProfile(ctmApiClient=ctmApiClient,ctmAppType=appType)
+
+    lProfiles = discoFanOut.map(func=getProfiles,items=sCtmAppTypes)
+    for appType, jProfiles in zip(sCtmAppTypes,lProfiles):
         jProfilesLen = len(jProfiles)
         if jProfilesLen > 0:
             logger.debug(' - Action: %s : %s',"Found Connection Profile",appType)
@@ -248,11 +539,12 @@ def getLocalConnectionProfiles(ctmApiClient,ctmServer,ctmAgent,ctmAppType):
     sCtmAppTypes = ctmAppType      
     jConnProfiles = ""                    
 
-    for appType in sCtmAppTypes:
-        if _localDebug: 
-            pass
+    def getProfiles(appType):
         logger.debug(' - Action: %s : %s',"Get Connection Profile",appType)
-        jProfiles = ctm.getCtmAgentConnectionProfile(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmAgent=ctmAgent,ctmAppType=appType)
+        return ctm.getCtmAgentConnectionProfile(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmAgent=ctmAgent,ctmAppType=appType)
+
+    lProfiles = discoFanOut.map(func=getProfiles,items=sCtmAppTypes,server=lambda appType: ctmServer)
+    for appType, jProfiles in zip(sCtmAppTypes,lProfiles):
         jProfilesLen = len(jProfiles)
         if jProfilesLen > 0:
             logger.debug(' - Action: %s : %s',"Found Connection Profile",appType)
@@ -273,13 +565,15 @@ def getLocalConnectionProfiles(ctmApiClient,ctmServer,ctmAgent,ctmAppType):
 def getCentralConnectionProfilesAi(ctmApiClient,jobTypes):
     appTypes = jobTypes["jobtypes"]
     jConnProfiles = ""
-    for appType in appTypes:
-        job_type_name = appType["job_type_name"]
-        job_type_id = appType["job_type_id"]
-        appTypeAi = "ApplicationIntegrator:" + job_type_name
+    def getProfiles(appType):
+        appTypeAi = "ApplicationIntegrator:" + appType["job_type_name"]
         if _localDebug: 
             logger.debug(' - Action: %s : %s',"Get Connection Profile",appTypeAi)
-        jProfiles = ctm.getCtmCentralConnectionProfile(ctmApiClient=ctmApiClient,ctmAppType=appTypeAi)
+        return ctm.getCtmCentralConnectionProfile(ctmApiClient=ctmApiClient,ctmAppType=appTypeAi)
+
+    lProfiles = discoFanOut.map(func=getProfiles,items=appTypes,name="central profiles")
+    for appType, jProfiles in zip(appTypes,lProfiles):
+        job_type_id = appType["job_type_id"]
         jProfilesLen = len(jProfiles)
         if jProfilesLen > 0:
             logger.debug(' - Action: %s : %s',"Found Connection Profile",job_type_id)
@@ -300,14 +594,14 @@ def getCentralConnectionProfilesAi(ctmApiClient,jobTypes):
 def getLocalConnectionProfilesAi(ctmApiClient,ctmServer,ctmAgent,ctmAppType):
     appTypes = ctmAppType["jobtypes"]
     jConnProfiles = ""
-    for appType in appTypes:
-        job_type_name = appType["job_type_name"]
-        job_type_id = appType["job_type_id"]
-        appTypeAi = "ApplicationIntegrator:" + job_type_name
-        if _localDebug: 
-            pass
+    def getProfiles(appType):
+        appTypeAi = "ApplicationIntegrator:" + appType["job_type_name"]
         logger.debug(' - Action: %s : %s',"Get Connection Profile",appTypeAi)
-        jProfiles = ctm.getCtmAgentConnectionProfile(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmAgent=ctmAgent,ctmAppType=appTypeAi)
+        return ctm.getCtmAgentConnectionProfile(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmAgent=ctmAgent,ctmAppType=appTypeAi)
+
+    lProfiles = discoFanOut.map(func=getProfiles,items=appTypes,server=lambda appType: ctmServer)
+    for appType, jProfiles in zip(appTypes,lProfiles):
+        job_type_id = appType["job_type_id"]
         jProfilesLen = len(jProfiles)
         if jProfilesLen > 0:
             logger.debug(' - Action: %s : %s',"Found Connection Profile",job_type_id)
@@ -325,20 +619,22 @@ def getLocalConnectionProfilesAi(ctmApiClient,ctmServer,ctmAgent,ctmAppType):
    
     return sConnProfile
 
-def getHostGroups(ctmApiClient,ctmServer):
-    # Get HostGroups
+def getHostGroups(ctmApiClient,ctmServer,ctmHostGroups=None):
+    # Get HostGroups, names of a previous call can be passed in
     sHostGroupList = '{"groups":[]}'
-    jCtmHostGroups = ctm.getCtmHostGroups(ctmApiClient=ctmApiClient,ctmServer=ctmServer)
+    jCtmHostGroups = ctmHostGroups
+    if jCtmHostGroups is None:
+        jCtmHostGroups = ctm.getCtmHostGroups(ctmApiClient=ctmApiClient,ctmServer=ctmServer)
     iCtmHostGroups = len(jCtmHostGroups)
     lHostGroup = ""
     if iCtmHostGroups > 0:
         sjCtmHostGroups = str(jCtmHostGroups)
         j = 0
-        for sHostGroupName in jCtmHostGroups:
+        lHostGroupMembers = discoFanOut.map(func=lambda sHostGroupName: ctm.getCtmHostGroupMembers(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmHostGroup=sHostGroupName),items=jCtmHostGroups,server=lambda sHostGroupName: ctmServer,name="hostgroups " + ctmServer)
+        for sHostGroupName, jHostGroupMembers in zip(jCtmHostGroups,lHostGroupMembers):
             sCtmGroupId  = str(j).zfill(4)
             sHostGroupMembers = ""
             
-            jHostGroupMembers = ctm.getCtmHostGroupMembers(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmHostGroup=sHostGroupName)
             iHostGroupMembers = len(jHostGroupMembers)
             i = 0
             for sHostGroupMember in jHostGroupMembers:
@@ -360,33 +656,43 @@ def getHostGroups(ctmApiClient,ctmServer):
     jHostGroupList = json.loads(sHostGroupList)
     return jHostGroupList
 
+def getAgentMembershipIndex(records,key):
+    # Values of key per agent in order of the records, e.g. hostgroups per agent
+    dAgentIndex = {}
+    for xRecord in records:
+        sAgent = xRecord.get("agent")
+        if sAgent is not None:
+            dAgentIndex.setdefault(sAgent,[]).append(xRecord.get(key))
+    return dAgentIndex
+
+def getAgentHostGroupsIndex(ctmHostGroups):
+    # Hostgroups per agent, build once per server
+    return getAgentMembershipIndex(records=ctmHostGroups.get("groups",[]),key="group")
+
 def getAgentHostGroupsMembership(ctmHostGroups,ctmAgent="*"):
-    jHostGroupList = ctmHostGroups 
-    # Load Control-M Hostgroup into panda dataframe
-    df = pd.json_normalize(jHostGroupList,record_path=['groups'])
+    lHostGroupList = ctmHostGroups.get("groups",[])
 
-    if df.empty:
-        logger.error('Empty dataframe, no agent records')  
+    if not any(lHostGroupList):
+        logger.error('Empty hostgroup list, no agent records')  
         jCtmAgents = {}
     else:
-        dfCtmAgents = df.groupby('agent')['group'].apply(list).reset_index(name='groups')
-        jCtmAgents = dfCtmAgents.to_json(orient ='records')
-
-        # Get matching agent via panda dataframe
+        dAgentGroups = getAgentHostGroupsIndex(ctmHostGroups)
         if ctmAgent != "*":
-            xCtmAgentGroups = df.loc[df['agent'] == ctmAgent]
-            yCtmAgentGroups = xCtmAgentGroups.groupby('agent')['group'].apply(list).reset_index(name='groups')
-            zCtmAgentGroups = yCtmAgentGroups.to_json(orient ='records')
-            jCtmAgents = zCtmAgentGroups
+            lAgents = [ctmAgent] if ctmAgent in dAgentGroups else []
+        else:
+            lAgents = sorted(dAgentGroups)
+        jCtmAgents = json.dumps([{"agent":sAgent,"groups":dAgentGroups[sAgent]} for sAgent in lAgents])
     if _localDebug: 
-        logger.debug('CTM Panda records:\n %s', jCtmAgents)  
+        logger.debug('CTM Agent hostgroups:\n %s', jCtmAgents)  
     return jCtmAgents
 
-def getCtmRemoteHosts(ctmApiClient,ctmServer):
-    # Get Remote Hosts
+def getCtmRemoteHosts(ctmApiClient,ctmServer,ctmRemoteHosts=None):
+    # Get Remote Hosts, names of a previous call can be passed in
     sRemoteHostsList = "{}"
     sRemoteHostList = ""
-    jRemoteHosts = ctm.getCtmRemoteHosts(ctmApiClient=ctmApiClient,ctmServer=ctmServer)
+    jRemoteHosts = ctmRemoteHosts
+    if jRemoteHosts is None:
+        jRemoteHosts = ctm.getCtmRemoteHosts(ctmApiClient=ctmApiClient,ctmServer=ctmServer)
     iRemoteHosts = len(jRemoteHosts)
     if iRemoteHosts > 1:  
         sRemoteHosts = str(jRemoteHosts)
@@ -394,9 +700,9 @@ def getCtmRemoteHosts(ctmApiClient,ctmServer):
         
         
         j = 0
-        for xRemoteHost in jRemoteHosts:
+        lRemoteHostProperties = discoFanOut.map(func=lambda xRemoteHost: ctm.getRemoteHostProperties(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmRemoteHost=xRemoteHost),items=jRemoteHosts,server=lambda xRemoteHost: ctmServer,name="remote hosts " + ctmServer)
+        for xRemoteHost, jRemoteHostProperties in zip(jRemoteHosts,lRemoteHostProperties):
             sCtmHostId  = str(j).zfill(4)
-            jRemoteHostProperties = ctm.getRemoteHostProperties(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmRemoteHost=xRemoteHost)
 
             jCtmAgents = jRemoteHostProperties["agents"]
             iCtmAgents = len(jCtmAgents)
@@ -426,26 +732,24 @@ def getCtmRemoteHosts(ctmApiClient,ctmServer):
 
     return jRemoteHostFinal
 
+def getAgentRemoteHostsIndex(ctmRemoteHosts):
+    # Remote hosts per agent, build once per server
+    return getAgentMembershipIndex(records=ctmRemoteHosts.get("remote",[]),key="host")
+
 def getAgentRemoteHosts(ctmRemoteHosts,ctmAgent="*"):
-    jRemoteHostList = ctmRemoteHosts 
-    # Load Control-M Hostgroup into panda dataframe
-    df = pd.json_normalize(jRemoteHostList,record_path=['remote'])
+    lRemoteHostList = ctmRemoteHosts.get("remote",[])
 
-    if df.empty:
-        logger.error('Empty dataframe, no remote hosts records')  
+    if not any(lRemoteHostList):
+        logger.error('Empty remote host list, no remote hosts records')  
         jCtmAgents = {}
     else:
-        dfCtmAgents = df.groupby('agent')['host'].apply(list).reset_index(name='host')
-        jCtmAgents = dfCtmAgents.to_json(orient ='records')
-
-        # Get matching agent via panda dataframe
+        dAgentHosts = getAgentRemoteHostsIndex(ctmRemoteHosts)
         if ctmAgent != "*":
-            xCtmAgentGroups = df.loc[df['agent'] == ctmAgent]
-            yCtmAgentGroups = xCtmAgentGroups.groupby('agent')['host'].apply(list).reset_index(name='hosts')
-            zCtmAgentGroups = yCtmAgentGroups.to_json(orient ='records')
-            jCtmAgents = zCtmAgentGroups
+            jCtmAgents = json.dumps([{"agent":ctmAgent,"hosts":dAgentHosts[ctmAgent]}] if ctmAgent in dAgentHosts else [])
+        else:
+            jCtmAgents = json.dumps([{"agent":sAgent,"host":dAgentHosts[sAgent]} for sAgent in sorted(dAgentHosts)])
     if _localDebug:  
-        logger.debug('CTM Panda records:\n %s', jCtmAgents)  
+        logger.debug('CTM Agent remote hosts:\n %s', jCtmAgents)  
     return jCtmAgents
 
 def getServerRemoteHosts(ctmRemoteHosts,ctmServer):
@@ -469,7 +773,104 @@ def getServerRemoteHosts(ctmRemoteHosts,ctmServer):
     return values
 
 
-def discoCtm():
+def getAgentInfo(ctmApiClient,ctmServer,ctmServerFqdn,ctmAgent,ctmAgentRemoteHosts,ctmAgentHostGroups,ctmAiJobTypes,ctmAppTypes,iCtmAgent=1,iCtmAgents=1,ctmState=None):
+    # Agent info of one Control-M agent, returns agent name, info, info file content and agent details
+    # Remote hosts and hostgroups come from the per server indexes, see getAgentRemoteHostsIndex
+    # Details of an unchanged agent are taken from the previous run in ctmState
+    sParam = w3rkstatt.dTranslate4Json(data=ctmAgent)
+    jParam = json.loads(sParam)
+    if _localDebug: 
+        logger.debug('CTM Agent "%s": %s', str(iCtmAgent), sParam)
+
+    sAgentName       = str(w3rkstatt.getJsonValue(path="$.nodeid",data=jParam))
+    sAgentStatus     = str(w3rkstatt.getJsonValue(path="$.status",data=jParam))
+    sAgentVersion    = str(w3rkstatt.getJsonValue(path="$.version",data=jParam))
+    sAgentOS         = str(w3rkstatt.getJsonValue(path="$.operating_system",data=jParam))
+    sConnProfile     = ""
+    logger.debug('CTM Agent "%s/%s" Status: %s = %s', iCtmAgent, iCtmAgents, sAgentName, sAgentStatus)
+
+    # Get CTM Agent Remote Hosts
+    lAgentRemoteHosts = ctmAgentRemoteHosts.get(sAgentName)
+    if lAgentRemoteHosts:
+        sAgentRemoteHosts = w3rkstatt.dTranslate4Json(data=str(lAgentRemoteHosts)) 
+    else:
+        sAgentRemoteHosts = "[]"
+
+    # Get CTM Agent Hostgroup Membership
+    lAgentHostGroupsMembership = ctmAgentHostGroups.get(sAgentName)
+    if lAgentHostGroupsMembership:
+        sAgentHostGroupsMembership = w3rkstatt.dTranslate4Json(data=str(lAgentHostGroupsMembership))             
+    else:
+        sAgentHostGroupsMembership = "[]"    
+
+    # Get Control-M agent info of active agent               
+    xAgentDetails = None
+    if sAgentStatus == "Available":     
+        sAgentFingerprint = getAgentFingerprint(ctmServerFqdn=ctmServerFqdn,ctmAgent=jParam,ctmAiJobTypes=ctmAiJobTypes,ctmAppTypes=ctmAppTypes)
+        if ctmState is not None:
+            xAgentDetails = ctmState.getAgentDetails(ctmServer=ctmServer,ctmAgent=sAgentName,fingerprint=sAgentFingerprint)
+
+    if xAgentDetails is not None:
+        logger.debug(' - Action: %s', "Reuse Details")
+        dCtmAgentParams = xAgentDetails["parameters"]
+        jCtmLocalConnectionProfiles = xAgentDetails["profiles"]
+    elif sAgentStatus == "Available":
+         # Get CTM Agent Parameters
+        logger.debug(' - Action: %s', "Get Parameters")
+        jCtmAgentParams = ctm.getCtmAgentParams(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmAgent=sAgentName)
+        dCtmAgentParams = ctm.simplifyCtmJson(data=jCtmAgentParams)
+
+        # Get CTM Agent Connection Profiles
+        # Base Application and Application Integrator Job Type based connection profile
+        jCtmLocalConnectionProfilesAi   = getLocalConnectionProfilesAi(ctmApiClient,ctmServer=ctmServer,ctmAgent=sAgentName,ctmAppType=ctmAiJobTypes)
+        jCtmLocalConnectionProfilesBase = getLocalConnectionProfiles(ctmApiClient=ctmApiClient,ctmServer=ctmServer,ctmAgent=sAgentName,ctmAppType=ctmAppTypes)
+        jCtmLocalConnectionProfilesBaseTemp = str(jCtmLocalConnectionProfilesBase).lstrip('{')[:-1]
+        jCtmLocalConnectionProfilesAiTemp   = str(jCtmLocalConnectionProfilesAi).lstrip('{')[:-1]
+        jCtmLocalConnectionProfiles = '"profiles":{'  + jCtmLocalConnectionProfilesBaseTemp + ',' +  jCtmLocalConnectionProfilesAiTemp + '}'            
+        xAgentDetails = {"fingerprint":sAgentFingerprint,"parameters":dCtmAgentParams,"profiles":jCtmLocalConnectionProfiles,"fetched":time.time()}
+
+    # Get Control-M agent info of active agent               
+    if sAgentStatus == "Available":     
+
+        jAgentInfo = '{"name":"' + sAgentName + '",'
+        jAgentInfo = jAgentInfo + '"nodeid":"' + sAgentName + '",'
+        jAgentInfo = jAgentInfo + '"status":"' + sAgentStatus + '",'
+        jAgentInfo = jAgentInfo + '"hostgroups":' + sAgentHostGroupsMembership + ','
+        jAgentInfo = jAgentInfo + '"remote":' + sAgentRemoteHosts + ','
+        jAgentInfo = jAgentInfo + '"version":"' + sAgentVersion + '",'
+        jAgentInfo = jAgentInfo + '"operating_system":"' + sAgentOS + '",'   
+        jAgentInfo = jAgentInfo + '"server_name":"' + ctmServer + '",'   
+        jAgentInfo = jAgentInfo + '"server_fqdn":"' + ctmServerFqdn + '",'   
+        jAgentInfo = jAgentInfo + '"parameters":' + dCtmAgentParams + ','
+
+        # Add to local CTM agent info
+        jAgentInfo = jAgentInfo + jCtmLocalConnectionProfiles + '}'
+        jAgentInfo = w3rkstatt.dTranslate4Json(data=jAgentInfo)              
+
+
+    else:
+        jAgentInfo = '{"name":"' + sAgentName + '",'
+        jAgentInfo = jAgentInfo + '"nodeid":"' + sAgentName + '",'
+        jAgentInfo = jAgentInfo + '"status":"' + sAgentStatus + '",'
+        jAgentInfo = jAgentInfo + '"hostgroups":' + sAgentHostGroupsMembership + ','
+        jAgentInfo = jAgentInfo + '"remote":' + sAgentRemoteHosts + ','
+        jAgentInfo = jAgentInfo + '"version":"' + sAgentVersion + '",'
+        jAgentInfo = jAgentInfo + '"operating_system":"' + sAgentOS + '",'  
+        jAgentInfo = jAgentInfo + '"server_name":"' + ctmServer + '",'   
+        jAgentInfo = jAgentInfo + '"server_fqdn":"' + ctmServerFqdn + '"}'  
+    if _localDebug: 
+        logger.debug('CTM Agent Info: %s', jAgentInfo)
+
+    # Status file content for the agent
+    jAgentFile = w3rkstatt.dTranslate4Json(data=jAgentInfo)
+
+    return sAgentName, jAgentInfo, jAgentFile, xAgentDetails
+
+def discoCtm(incremental=None):
+    global jsonBatch, discoState
+    # Full or incremental run, default CTM.discovery.incremental
+    if incremental is None:
+        incremental = disco_incremental
     # CTM Login
     try:
         ctmApiObj    = ctm.getCtmConnection()
@@ -482,194 +883,166 @@ def discoCtm():
 
 
     if _ctmActiveApi:
-        jCtmServers =  getCtmServers(ctmApiClient=ctmApiClient)
-        jCtmAgentList = {}
-        yCtmAgentList = ""
-        iCtmServers = int(len(jCtmServers))
-
-        # Get CTM Job Types and
-        jCtmAiJobTypes      = ctm.getDeployedAiJobtypes(ctmApiClient=ctmApiClient,ctmAiJobDeployStatus="ready to deploy")
-        jCtmAiJobTypesDraft = ctm.getDeployedAiJobtypes(ctmApiClient=ctmApiClient,ctmAiJobDeployStatus="draft")
-        sCtmAppTypes        = ["Hadoop","Database","FileTransfer","Informatica","SAP","AWS","Azure"]
-
-        # Count CTM AI job types
-        iCtmAiJobTypes      = len(jCtmAiJobTypes['jobtypes'])
-        iCtmAiJobTypesDraft = len(jCtmAiJobTypesDraft['jobtypes'])
-        iCtmAppTypes        = len(sCtmAppTypes)
-        sCtmAiJobTypes      = '{"r2d":"' + str(iCtmAiJobTypes) + '","draft":"' + str(iCtmAiJobTypesDraft) + '","apps":"' + str(iCtmAppTypes)  + '"}'
-
-        # Get CTM Shared Connection Profiles
-        jCtmCentralConnectionProfilesBase     = getCentralConnectionProfiles(ctmApiClient=ctmApiClient,jobTypes=sCtmAppTypes)
-        jCtmCentralConnectionProfilesAi       = getCentralConnectionProfilesAi(ctmApiClient=ctmApiClient,jobTypes=jCtmAiJobTypes)
-        jCtmCentralConnectionProfilesBaseTemp = str(jCtmCentralConnectionProfilesBase).lstrip('{')[:-1]
-        jCtmCentralConnectionProfilesAiTemp   = str(jCtmCentralConnectionProfilesAi).lstrip('{')[:-1]
-        jCtmCentralConnectionProfiles = '{"shared":{'  + jCtmCentralConnectionProfilesBaseTemp + ',' +  jCtmCentralConnectionProfilesAiTemp + '}}'
-
-
-        # Write Control-M AI JobTypes File
-        filePath    = writeJobTypesInfoFile(data=jCtmAiJobTypes)
-        filePath    = writeJobTypesDraftInfoFile(data=jCtmAiJobTypesDraft)        
-        filePath    = writeSharedConnectionProfilesInfoFile(data=jCtmCentralConnectionProfiles)
+        # Collect info files and write them in flush cycles
+        jsonBatch = w3rkstatt.JsonFileBatch(compact=json_compact,durability=json_durability,size=json_batch_size)
+        try:
+            discoState = DiscoState(folder=data_folder,ttl=disco_ttl,incremental=incremental)
+            if discoState.load():
+                logger.info('CTM Discovery: incremental, previous state "%s"', discoState.file)
+            jCtmServers =  getCtmServers(ctmApiClient=ctmApiClient)
+            jCtmAgentList = {}
+            yCtmAgentList = ""
+            iCtmServers = int(len(jCtmServers))
+
+            # Get CTM Job Types and
+            jCtmAiJobTypes      = ctm.getDeployedAiJobtypes(ctmApiClient=ctmApiClient,ctmAiJobDeployStatus="ready to deploy")
+            jCtmAiJobTypesDraft = ctm.getDeployedAiJobtypes(ctmApiClient=ctmApiClient,ctmAiJobDeployStatus="draft")
+            sCtmAppTypes        = ["Hadoop","Database","FileTransfer","Informatica","SAP","AWS","Azure"]
+
+            # Count CTM AI job types
+            iCtmAiJobTypes      = len(jCtmAiJobTypes['jobtypes'])
+            iCtmAiJobTypesDraft = len(jCtmAiJobTypesDraft['jobtypes'])
+            iCtmAppTypes        = len(sCtmAppTypes)
+            sCtmAiJobTypes      = '{"r2d":"' + str(iCtmAiJobTypes) + '","draft":"' + str(iCtmAiJobTypesDraft) + '","apps":"' + str(iCtmAppTypes)  + '"}'
+
+            # Get CTM Shared Connection Profiles
+            jCtmCentralConnectionProfilesBase     = getCentralConnectionProfiles(ctmApiClient=ctmApiClient,jobTypes=sCtmAppTypes)
+            jCtmCentralConnectionProfilesAi       = getCentralConnectionProfilesAi(ctmApiClient=ctmApiClient,jobTypes=jCtmAiJobTypes)
+            jCtmCentralConnectionProfilesBaseTemp = str(jCtmCentralConnectionProfilesBase).lstrip('{')[:-1]
+            jCtmCentralConnectionProfilesAiTemp   = str(jCtmCentralConnectionProfilesAi).lstrip('{')[:-1]
+            jCtmCentralConnectionProfiles = '{"shared":{'  + jCtmCentralConnectionProfilesBaseTemp + ',' +  jCtmCentralConnectionProfilesAiTemp + '}}'
+
+
+            # Write Control-M AI JobTypes File
+            filePath    = writeJobTypesInfoFile(data=jCtmAiJobTypes)
+            filePath    = writeJobTypesDraftInfoFile(data=jCtmAiJobTypesDraft)        
+            filePath    = writeSharedConnectionProfilesInfoFile(data=jCtmCentralConnectionProfiles)
         
 
-        for xCtmServer in jCtmServers:
-            sCtmServerName = xCtmServer["name"]
-            sCtmServerFQDN = xCtmServer["host"]
-            logger.debug('CTM Server: %s', sCtmServerName)      
-
-            # Get Control-M Server Parameters
-            jCtmServerParameters = ctm.getCtmServerParams(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName)
-            iCtmServerParameters = len(jCtmServerParameters)
-            if iCtmServerParameters > 0:
-                sCtmServerParameters = w3rkstatt.dTranslate4Json(data=jCtmServerParameters)
-            else:
-                # Mainframe has no data
-                sCtmServerParameters = "[]"
-
-            # Get Remote Hosts
-            jCtmRemoteHosts = getCtmRemoteHosts(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName)
-            sCtmRemoteHosts = w3rkstatt.dTranslate4Json(data=jCtmRemoteHosts)   
-            filePath      = writeRemoteHostsInfoFile(ctmServer=sCtmServerName,data=sCtmRemoteHosts)
-
-            jCtmServerRemoteHosts = json.loads(getServerRemoteHosts(ctmRemoteHosts=jCtmRemoteHosts,ctmServer=sCtmServerName))
-            iCtmServerRemoteHosts = len(jCtmServerRemoteHosts)
-            if iCtmServerRemoteHosts > 1:
-                sServerRemoteHosts = str(jCtmServerRemoteHosts)
-                sServerRemoteHosts = w3rkstatt.dTranslate4Json(data=sServerRemoteHosts) 
-            else:
-                sServerRemoteHosts = "[]"            
+            # Server data first, then the agents of all servers on the thread pool
+            lCtmServerData = []
+            lCtmAgentTasks = []
+            for xCtmServer in jCtmServers:
+                sCtmServerName = xCtmServer["name"]
+                sCtmServerFQDN = xCtmServer["host"]
+                logger.debug('CTM Server: %s', sCtmServerName)      
+
+                # Get Control-M Server Parameters
+                jCtmServerParameters = ctm.getCtmServerParams(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName)
+                iCtmServerParameters = len(jCtmServerParameters)
+                if iCtmServerParameters > 0:
+                    sCtmServerParameters = w3rkstatt.dTranslate4Json(data=jCtmServerParameters)
+                else:
+                    # Mainframe has no data
+                    sCtmServerParameters = "[]"
+
+                # Get Remote Hosts, members of an unchanged list are reused until they are older than CTM.discovery.ttl
+                lCtmRemoteHosts = ctm.getCtmRemoteHosts(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName)
+                xCtmRemoteHosts = discoState.getServerData(ctmServer=sCtmServerName,key="remote",names=lCtmRemoteHosts)
+                if xCtmRemoteHosts is None:
+                    xCtmRemoteHosts = {"names":lCtmRemoteHosts,"data":getCtmRemoteHosts(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName,ctmRemoteHosts=lCtmRemoteHosts),"fetched":time.time()}
+                discoState.setServerData(ctmServer=sCtmServerName,key="remote",entry=xCtmRemoteHosts)
+                jCtmRemoteHosts = xCtmRemoteHosts["data"]
+                sCtmRemoteHosts = w3rkstatt.dTranslate4Json(data=jCtmRemoteHosts)   
+                filePath      = writeRemoteHostsInfoFile(ctmServer=sCtmServerName,data=sCtmRemoteHosts)
+
+                jCtmServerRemoteHosts = json.loads(getServerRemoteHosts(ctmRemoteHosts=jCtmRemoteHosts,ctmServer=sCtmServerName))
+                iCtmServerRemoteHosts = len(jCtmServerRemoteHosts)
+                if iCtmServerRemoteHosts > 1:
+                    sServerRemoteHosts = str(jCtmServerRemoteHosts)
+                    sServerRemoteHosts = w3rkstatt.dTranslate4Json(data=sServerRemoteHosts) 
+                else:
+                    sServerRemoteHosts = "[]"            
             
             
-            # Get Control-M Agents
-            jCtmAgents = getCtmAgents(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName)
-            xCtmAgents = w3rkstatt.getJsonValue(path="$.agents",data=jCtmAgents)
-
-            # Get Control-M Hostgroups
-            jCtmHostGroups = getHostGroups(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName)
-            sCtmHostGroups = w3rkstatt.dTranslate4Json(data=jCtmHostGroups)   
-            filePath     = writeHostGroupsInfoFile(ctmServer=sCtmServerName,data=sCtmHostGroups)
+                # Get Control-M Agents
+                jCtmAgents = getCtmAgents(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName)
+                xCtmAgents = w3rkstatt.getJsonValue(path="$.agents",data=jCtmAgents)
+
+                # Get Control-M Hostgroups, members of an unchanged list are reused until they are older than CTM.discovery.ttl
+                lCtmHostGroups = ctm.getCtmHostGroups(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName)
+                xCtmHostGroups = discoState.getServerData(ctmServer=sCtmServerName,key="hostgroups",names=lCtmHostGroups)
+                if xCtmHostGroups is None:
+                    xCtmHostGroups = {"names":lCtmHostGroups,"data":getHostGroups(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName,ctmHostGroups=lCtmHostGroups),"fetched":time.time()}
+                discoState.setServerData(ctmServer=sCtmServerName,key="hostgroups",entry=xCtmHostGroups)
+                jCtmHostGroups = xCtmHostGroups["data"]
+                sCtmHostGroups = w3rkstatt.dTranslate4Json(data=jCtmHostGroups)   
+                filePath     = writeHostGroupsInfoFile(ctmServer=sCtmServerName,data=sCtmHostGroups)
             
-            # Sample Debug data
-            # xCtmAgents = [{'hostgroups': 'None', 'nodeid': 'vw-aus-ctm-wk01.adprod.bmc.com', 'operating_system': 'Microsoft Windows Server 2016  (Build 14393)', 'status': 'Available', 'version': '9.0.20.000'}]
-            xCtmAgentsInfo = ""
-            if "None" in xCtmAgents:
-                iCtmAgents = 0
-                xCtmAgentsInfo = {}
-            else:
-                iCtmAgents = len(xCtmAgents)
-
-            if iCtmAgents > 0:
-                iCtmAgent = 1
-                for xAgent in xCtmAgents:
-                    
-                    sParam = w3rkstatt.dTranslate4Json(data=xAgent)
-                    jParam = json.loads(sParam)
-                    if _localDebug: 
-                        logger.debug('CTM Agent "%s": %s', str(iCtmAgent), sParam)
-
-                    sAgentName       = str(w3rkstatt.getJsonValue(path="$.nodeid",data=jParam))
-                    sAgentStatus     = str(w3rkstatt.getJsonValue(path="$.status",data=jParam))
-                    sAgentVersion    = str(w3rkstatt.getJsonValue(path="$.version",data=jParam))
-                    sAgentOS         = str(w3rkstatt.getJsonValue(path="$.operating_system",data=jParam))
-                    sConnProfile     = ""
-                    logger.debug('CTM Agent "%s/%s" Status: %s = %s', iCtmAgent, iCtmAgents, sAgentName, sAgentStatus)
-
-                    # Get CTM Agent Remote Hosts
-                    jAgentRemoteHosts = json.loads(getAgentRemoteHosts(jCtmRemoteHosts,ctmAgent=sAgentName))
-                    iAgentRemoteHosts = len(jAgentRemoteHosts)
-                    if iAgentRemoteHosts == 1:
-                        lAgentRemoteHosts = jAgentRemoteHosts[0]
-                        sAgentRemoteHosts = str(w3rkstatt.getJsonValue(path="$.hosts",data=lAgentRemoteHosts))
-                        sAgentRemoteHosts = w3rkstatt.dTranslate4Json(data=sAgentRemoteHosts) 
-                    else:
-                        sAgentRemoteHosts = "[]"
-
-                    # Get CTM Agent Hostgroup Membership
-                    jAgentHostGroupsMembership = json.loads(getAgentHostGroupsMembership(ctmHostGroups=jCtmHostGroups,ctmAgent=sAgentName))
-                    iAgentHostGroupsMembership = len(jAgentHostGroupsMembership)
-                    if iAgentHostGroupsMembership == 1:
-                        lAgentHostGroupsMembership = jAgentHostGroupsMembership[0]   
-                        sAgentHostGroupsMembership = str(w3rkstatt.getJsonValue(path="$.groups",data=lAgentHostGroupsMembership))
-                        sAgentHostGroupsMembership = w3rkstatt.dTranslate4Json(data=sAgentHostGroupsMembership)             
-                    else:
-                        sAgentHostGroupsMembership = "[]"    
-
-                    # Get Control-M agent info of active agent               
-                    if sAgentStatus == "Available":     
-                         # Get CTM Agent Parameters
-                        logger.debug(' - Action: %s', "Get Parameters")
-                        jCtmAgentParams = ctm.getCtmAgentParams(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName,ctmAgent=sAgentName)
-                        dCtmAgentParams = ctm.simplifyCtmJson(data=jCtmAgentParams)
-                       
-                        jAgentInfo = '{"name":"' + sAgentName + '",'
-                        jAgentInfo = jAgentInfo + '"nodeid":"' + sAgentName + '",'
-                        jAgentInfo = jAgentInfo + '"status":"' + sAgentStatus + '",'
-                        jAgentInfo = jAgentInfo + '"hostgroups":' + sAgentHostGroupsMembership + ','
-                        jAgentInfo = jAgentInfo + '"remote":' + sAgentRemoteHosts + ','
-                        jAgentInfo = jAgentInfo + '"version":"' + sAgentVersion + '",'
-                        jAgentInfo = jAgentInfo + '"operating_system":"' + sAgentOS + '",'   
-                        jAgentInfo = jAgentInfo + '"server_name":"' + sCtmServerName + '",'   
-                        jAgentInfo = jAgentInfo + '"server_fqdn":"' + sCtmServerFQDN + '",'   
-                        jAgentInfo = jAgentInfo + '"parameters":' + dCtmAgentParams + ','
-
-                        # Get CTM Agent Connection Profiles
-                        # Base Application and Application Integrator Job Type based connection profile
-                        jCtmLocalConnectionProfilesAi   = getLocalConnectionProfilesAi(ctmApiClient,ctmServer=sCtmServerName,ctmAgent=sAgentName,ctmAppType=jCtmAiJobTypes)
-                        jCtmLocalConnectionProfilesBase = getLocalConnectionProfiles(ctmApiClient=ctmApiClient,ctmServer=sCtmServerName,ctmAgent=sAgentName,ctmAppType=sCtmAppTypes)
-                        jCtmLocalConnectionProfilesBaseTemp = str(jCtmLocalConnectionProfilesBase).lstrip('{')[:-1]
-                        jCtmLocalConnectionProfilesAiTemp   = str(jCtmLocalConnectionProfilesAi).lstrip('{')[:-1]
-                        jCtmLocalConnectionProfiles = '"profiles":{'  + jCtmLocalConnectionProfilesBaseTemp + ',' +  jCtmLocalConnectionProfilesAiTemp + '}'            
-
-                        # Add to local CTM agent info
-                        jAgentInfo = jAgentInfo + jCtmLocalConnectionProfiles + '}'
-                        jAgentInfo = w3rkstatt.dTranslate4Json(data=jAgentInfo)              
-                        
-                                               
-                    else:
-                        jAgentInfo = '{"name":"' + sAgentName + '",'
-                        jAgentInfo = jAgentInfo + '"nodeid":"' + sAgentName + '",'
-                        jAgentInfo = jAgentInfo + '"status":"' + sAgentStatus + '",'
-                        jAgentInfo = jAgentInfo + '"hostgroups":' + sAgentHostGroupsMembership + ','
-                        jAgentInfo = jAgentInfo + '"remote":' + sAgentRemoteHosts + ','
-                        jAgentInfo = jAgentInfo + '"version":"' + sAgentVersion + '",'
-                        jAgentInfo = jAgentInfo + '"operating_system":"' + sAgentOS + '",'  
-                        jAgentInfo = jAgentInfo + '"server_name":"' + sCtmServerName + '",'   
-                        jAgentInfo = jAgentInfo + '"server_fqdn":"' + sCtmServerFQDN + '"}'  
-                    if _localDebug: 
-                        logger.debug('CTM Agent Info: %s', jAgentInfo)
-
+                # Sample Debug data
+                # xCtmAgents = [{'hostgroups': 'None', 'nodeid': 'vw-aus-ctm-wk01.adprod.bmc.com', 'operating_system': 'Microsoft Windows Server 2016  (Build 14393)', 'status': 'Available', 'version': '9.0.20.000'}]
+                if "None" in xCtmAgents:
+                    iCtmAgents = 0
+                else:
+                    iCtmAgents = len(xCtmAgents)
+
+                if iCtmAgents > 0:
+                    # Remote hosts and hostgroups per agent, one pass over the server lists
+                    dCtmAgentRemoteHosts = getAgentRemoteHostsIndex(ctmRemoteHosts=jCtmRemoteHosts)
+                    dCtmAgentHostGroups  = getAgentHostGroupsIndex(ctmHostGroups=jCtmHostGroups)
+                    iCtmAgent = 1
+                    for xAgent in xCtmAgents:
+                        lCtmAgentTasks.append((sCtmServerName,sCtmServerFQDN,xAgent,dCtmAgentRemoteHosts,dCtmAgentHostGroups,iCtmAgent,iCtmAgents))
+                        # Internal Agent Counter
+                        iCtmAgent = iCtmAgent + 1
+
+                lCtmServerData.append((sCtmServerName,sCtmServerFQDN,sCtmServerParameters,sServerRemoteHosts,xCtmAgents,iCtmAgents))
+
+            # Get CTM Agent Info, at most CTM.discovery.server_limit agents per server at once
+            def getAgentTaskInfo(task):
+                return getAgentInfo(ctmApiClient=ctmApiClient,ctmServer=task[0],ctmServerFqdn=task[1],ctmAgent=task[2],ctmAgentRemoteHosts=task[3],ctmAgentHostGroups=task[4],ctmAiJobTypes=jCtmAiJobTypes,ctmAppTypes=sCtmAppTypes,iCtmAgent=task[5],iCtmAgents=task[6],ctmState=discoState)
+
+            lCtmAgentInfo = discoFanOut.map(func=getAgentTaskInfo,items=lCtmAgentTasks,server=lambda task: task[0],name="agents")
+
+            iCtmAgentInfo = 0
+            for sCtmServerName,sCtmServerFQDN,sCtmServerParameters,sServerRemoteHosts,xCtmAgents,iCtmAgents in lCtmServerData:
+                xCtmAgentsInfo = ""
+                if "None" in xCtmAgents:
+                    xCtmAgentsInfo = {}
+
+                for sAgentName,jAgentInfo,jAgentFile,xAgentDetails in lCtmAgentInfo[iCtmAgentInfo:iCtmAgentInfo + iCtmAgents]:
+                    if xAgentDetails is not None:
+                        discoState.setAgentDetails(ctmServer=sCtmServerName,ctmAgent=sAgentName,entry=xAgentDetails)
                     if iCtmAgents == 1:
                         xCtmAgentsInfo = str(jAgentInfo).rstrip(',')
                     else:
                         xCtmAgentsInfo = str(jAgentInfo + ',' +xCtmAgentsInfo).rstrip(',')
-                    # Internal Agent Counter
-                    iCtmAgent = iCtmAgent + 1
 
                     # Write Status File for Agent
-                    jAgentInfo = w3rkstatt.dTranslate4Json(data=jAgentInfo)   
-                    filePath = writeAgentInfoFile(ctmAgent=sAgentName,data=jAgentInfo)
+                    filePath = writeAgentInfoFile(ctmAgent=sAgentName,data=jAgentFile)
+                iCtmAgentInfo = iCtmAgentInfo + iCtmAgents
                 
-            xCtmAgentList = '{"server":"'  + sCtmServerName  + '","host":"'  + sCtmServerFQDN  +'","parameters":' + sCtmServerParameters + ',"runners":'  + str(iCtmAgents) + ',"remote":'  + str(sServerRemoteHosts)  + ',"agents":[' + str(xCtmAgentsInfo) + ']}'
-            # Write Server Status File
-            filePath = writeServerInfoFile(ctmServer=sCtmServerName,data=xCtmAgentList)
+                xCtmAgentList = '{"server":"'  + sCtmServerName  + '","host":"'  + sCtmServerFQDN  +'","parameters":' + sCtmServerParameters + ',"runners":'  + str(iCtmAgents) + ',"remote":'  + str(sServerRemoteHosts)  + ',"agents":[' + str(xCtmAgentsInfo) + ']}'
+                # Write Server Status File
+                filePath = writeServerInfoFile(ctmServer=sCtmServerName,data=xCtmAgentList)
             
-            if iCtmServers > 1:                
-                yCtmAgentList = str(xCtmAgentList + ',' + yCtmAgentList).rstrip(',')
-            else:
-                yCtmAgentList = str(xCtmAgentList).rstrip(',')
+                if iCtmServers > 1:                
+                    yCtmAgentList = str(xCtmAgentList + ',' + yCtmAgentList).rstrip(',')
+                else:
+                    yCtmAgentList = str(xCtmAgentList).rstrip(',')
 
         
 
-        yCtmAgentList = yCtmAgentList
-        zCtmAgentList = '{"inventory":{'+ '"servers":[' + yCtmAgentList + '],"profiles":' + jCtmCentralConnectionProfiles + ',"jobtypes":' + sCtmAiJobTypes + '}}'
-        jCtmAgentList = w3rkstatt.dTranslate4Json(data=zCtmAgentList)
-
-        # Write Inventory File
-        filePath    = writeInventoryInfoFile(data=jCtmAgentList)
-
-        if _localDebug:  
-            logger.debug('CTM Servers: %s', jCtmServers)
-            logger.debug('CTM Agents: %s', jCtmAgentList)
+            yCtmAgentList = yCtmAgentList
+            zCtmAgentList = '{"inventory":{'+ '"servers":[' + yCtmAgentList + '],"profiles":' + jCtmCentralConnectionProfiles + ',"jobtypes":' + sCtmAiJobTypes + '}}'
+            jCtmAgentList = w3rkstatt.dTranslate4Json(data=zCtmAgentList)
+
+            # Write Inventory File
+            filePath    = writeInventoryInfoFile(data=jCtmAgentList)
+
+            if _localDebug:  
+                logger.debug('CTM Servers: %s', jCtmServers)
+                logger.debug('CTM Agents: %s', jCtmAgentList)
+        finally:
+            # Write the collected files and stop the workers, also after an error
+            if jsonBatch is not None:
+                jsonBatch.flush()
+                jsonBatch = None
+            discoFanOut.close()
+
+        # Keep agent details and file hashes for the next incremental run
+        discoState.save()
+        discoState = None
 
 
     # Close CTM AAPI connection
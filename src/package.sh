@@ -134,6 +134,11 @@ FILES_REQUIRED=(
     "core_tsim.py"
     "core_bhom.py"
     "core_tso.py"
+    "core_http.py"
+    "core_token.py"
+    "core_cache.py"
+    "stub_server.py"
+    "bench_transform.py"
     "ctm_alerts.py"
     "disco_ctm.py"
     "w3rkstatt.py"
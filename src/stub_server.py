@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+# Filename: stub_server.py
+"""
+(c) 2026 Rafael Ulhoa
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation the
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and to permit
+persons to whom the Software is furnished to do so, subject to the following conditions:
+The above copyright notice and this permission notice (including the next paragraph) shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR
+COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+https://opensource.org/licenses/GPL-3.0
+# SPDX-License-Identifier: GPL-3.0-or-later
+For information on SDPX, https://spdx.org/licenses/GPL-3.0-or-later.html
+
+w3rkstatt Python stub server
+Replay recorded responses of Control-M AAPI, BHOM, Helix ITSM, TSIM, TSO,
+ServiceNow and SMTP for load tests and benchmarks
+
+With "STUB.enabled" set in the project config, w3rkstatt.getProjectConfig()
+points all connectors at this server, e.g. for uat.py and the benchmarks.
+
+Usage:
+    python stub_server.py
+    python stub_server.py :record
+    python stub_server.py :latency 50 :errors 0.05
+
+Recorded responses contain live data and tokens, keep recording files private.
+
+Change Log
+Date (YMD)    Name                  What
+--------      ------------------    ------------------------
+20261019      Rafael Ulhoa          Initial Development
+20261019      Rafael Ulhoa          Self signed certificate in the state folder, not the cwd
+
+"""
+
+import os
+import re
+import ssl
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import argparse
+import threading
+import tempfile
+import subprocess
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# handle dev environment vs. production
+try:
+    import w3rkstatt as w3rkstatt
+except:
+    # fix import issues for modules
+    sys.path.append(
+        os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+    from src import w3rkstatt as w3rkstatt
+
+# Get configuration from bmcs_core.json
+jCfgData = w3rkstatt.getProjectConfig()
+cfgFolder = w3rkstatt.getJsonValue(path="$.DEFAULT.config_folder",
+                                   data=jCfgData)
+tmpFolder = w3rkstatt.getJsonValue(path="$.DEFAULT.template_folder",
+                                   data=jCfgData)
+
+stub_host = w3rkstatt.getJsonValue(path="$.STUB.host",
+                                   data=jCfgData) or "localhost"
+stub_bind = w3rkstatt.getJsonValue(path="$.STUB.bind",
+                                   data=jCfgData) or "127.0.0.1"
+stub_http_port = int(
+    w3rkstatt.getJsonValue(path="$.STUB.http_port", data=jCfgData) or 18080)
+stub_https_port = int(
+    w3rkstatt.getJsonValue(path="$.STUB.https_port", data=jCfgData) or 18443)
+stub_smtp_port = int(
+    w3rkstatt.getJsonValue(path="$.STUB.smtp_port", data=jCfgData) or 18025)
+stub_latency = float(
+    w3rkstatt.getJsonValue(path="$.STUB.latency_ms", data=jCfgData) or 0)
+stub_jitter = float(
+    w3rkstatt.getJsonValue(path="$.STUB.jitter_ms", data=jCfgData) or 0)
+stub_error_rate = float(
+    w3rkstatt.getJsonValue(path="$.STUB.error_rate", data=jCfgData) or 0)
+stub_error_status = int(
+    w3rkstatt.getJsonValue(path="$.STUB.error_status", data=jCfgData) or 503)
+stub_recordings = w3rkstatt.getJsonValue(
+    path="$.STUB.recordings", data=jCfgData) or "stub.recordings.json"
+stub_certfile = w3rkstatt.getJsonValue(path="$.STUB.certfile", data=jCfgData)
+stub_keyfile = w3rkstatt.getJsonValue(path="$.STUB.keyfile", data=jCfgData)
+
+# Record mode: path prefix -> live base url, e.g. "/automation-api": "https://ctm:8443"
+stub_upstreams = w3rkstatt.getJsonValue(path="$.STUB.upstreams",
+                                        data=jCfgData) or {}
+
+# Assign module defaults
+_modVer = "20.26.10.00"
+_localDebug = False
+logger = logging.getLogger(__name__)
+logFile = w3rkstatt.getJsonValue(path="$.DEFAULT.log_file", data=jCfgData)
+loglevel = w3rkstatt.getJsonValue(path="$.DEFAULT.loglevel", data=jCfgData)
+epoch = time.time()
+parser = argparse.ArgumentParser(prefix_chars=':')
+parser.add_argument(':record',
+                    action='store_true',
+                    help='forward to STUB.upstreams and record responses')
+parser.add_argument(':latency', type=float, help='latency in ms')
+parser.add_argument(':jitter', type=float, help='latency jitter in ms')
+parser.add_argument(':errors', type=float, help='error rate 0..1')
+parser.add_argument(':recordings', help='recordings file')
+
+_placeholder = re.compile(r"\{\{([a-zA-Z0-9_.]+)\}\}")
+
+
+def getRecordingsFile(file):
+    '''
+    Locate the recordings file, absolute or in the template folder
+
+    :param str file: file name
+    :return: file name, fully qualified
+    :rtype: str
+    '''
+    if os.path.isabs(file):
+        return file
+    for folder in [tmpFolder, os.path.join(w3rkstatt.getCurrentFolder(),
+                                           "templates")]:
+        if folder and os.path.isfile(os.path.join(folder, file)):
+            return os.path.join(folder, file)
+    return os.path.join(tmpFolder or cfgFolder, file)
+
+
+def _getRequestValue(data, path):
+    value = data
+    for key in path.split("."):
+        if isinstance(value, list) and key.isdigit() and int(key) < len(
+                value):
+            value = value[int(key)]
+        elif isinstance(value, dict) and key in value:
+            value = value[key]
+        else:
+            return ""
+    return value
+
+
+def renderTemplate(data, context):
+    '''
+    Fill {{placeholders}} of a recorded response
+
+    Supported: uuid, epoch, base, group.N (path regex group),
+    request.<key>.<index> (json request body)
+
+    :param str data: recorded response
+    :param dict context: request details
+    :return: response
+    :rtype: str
+    '''
+
+    def replace(match):
+        key = match.group(1)
+        if key == "uuid":
+            return str(uuid.uuid4())
+        if key == "epoch":
+            return str(int(time.time()))
+        if key == "base":
+            return context["base"]
+        if key.startswith("group."):
+            index = int(key.split(".")[1])
+            groups = context["groups"]
+            if index <= len(groups) and groups[index - 1] is not None:
+                return groups[index - 1]
+            return ""
+        if key.startswith("request."):
+            return str(_getRequestValue(context["request"], key[8:]))
+        return match.group(0)
+
+    return _placeholder.sub(replace, data)
+
+
+class StubRoutes(object):
+    '''
+    Recorded responses, matched in file order, first match wins
+    '''
+
+    def __init__(self, file):
+        self.file = file
+        self.lock = threading.Lock()
+        self.routes = []
+        self.load()
+
+    def load(self):
+        data = w3rkstatt.getFileJson(self.file) if os.path.isfile(
+            self.file) else {}
+        routes = []
+        for route in data.get("routes", []):
+            route = dict(route)
+            route["regex"] = re.compile(route["path"])
+            routes.append(route)
+        self.routes = routes
+        logger.info('STUB: %s routes from: "%s"', len(routes), self.file)
+
+    def match(self, method, path):
+        for route in self.routes:
+            if route.get("method", "*") not in ("*", method):
+                continue
+            match = route["regex"].search(path)
+            if match:
+                return route, match.groups()
+        return None, ()
+
+    def record(self, route):
+        with self.lock:
+            route["regex"] = re.compile(route["path"])
+            self.routes.insert(0, route)
+            content = {
+                "version": 1,
+                "routes": [{k: v
+                            for k, v in item.items() if k != "regex"}
+                           for item in self.routes]
+            }
+            w3rkstatt.writeJsonFile(file=self.file, content=content)
+
+
+def injectFault(route):
+    '''
+    Apply latency and decide on an injected error
+
+    :param dict route: matched route, may override latency_ms, jitter_ms, error_rate
+    :return: injected error
+    :rtype: boolean
+    '''
+    latency = float(route.get("latency_ms", stub_latency))
+    jitter = float(route.get("jitter_ms", stub_jitter))
+    delay = latency + random.uniform(0, jitter)
+    if delay > 0:
+        time.sleep(delay / 1000.0)
+    return random.random() < float(route.get("error_rate", stub_error_rate))
+
+
+class StubHttpHandler(BaseHTTPRequestHandler):
+    '''
+    Replay recorded HTTP responses
+    '''
+    protocol_version = "HTTP/1.1"
+    server_version = "w3rkstatt-stub/" + _modVer
+
+    def log_message(self, format, *args):
+        if _localDebug:
+            logger.debug('STUB: ' + format, *args)
+
+    def _readBody(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length > 0 else b""
+
+    def _send(self, status, body, headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        headers = headers or {}
+        if "Content-Type" not in headers:
+            headers["Content-Type"] = "application/json"
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _forward(self, path, body):
+        # record mode: longest matching prefix wins
+        prefixes = sorted([p for p in stub_upstreams if path.startswith(p)],
+                          key=len,
+                          reverse=True)
+        if len(prefixes) < 1:
+            return None
+        import core_http as http
+        url = stub_upstreams[prefixes[0]].rstrip("/") + self.path
+        headers = {
+            k: v
+            for k, v in self.headers.items()
+            if k.lower() not in ("host", "content-length", "connection")
+        }
+        response = http.request(self.command,
+                                url,
+                                data=body,
+                                headers=headers)
+        route = {
+            "name": "recorded." + str(int(time.time() * 1000)),
+            "method": self.command,
+            "path": "^" + re.escape(path) + "$",
+            "status": response.status_code,
+            "headers": {
+                k: v
+                for k, v in response.headers.items()
+                if k.lower() in ("content-type", "authentication-token")
+            }
+        }
+        try:
+            route["body"] = response.json()
+        except ValueError:
+            route["text"] = response.text
+        self.server.routes.record(route)
+        return route
+
+    def _handle(self):
+        path = urlsplit(self.path).path
+        body = self._readBody()
+        route = None
+        groups = ()
+        if self.server.recordMode:
+            route = self._forward(path, body)
+        if route is None:
+            route, groups = self.server.routes.match(self.command, path)
+        if route is None:
+            logger.info('STUB: No route: %s %s', self.command, self.path)
+            self._send(404, json.dumps({"errors": [{"message": "no stub"}]}))
+            return
+
+        if injectFault(route):
+            status = int(route.get("error_status", stub_error_status))
+            self._send(status,
+                       json.dumps({"errors": [{
+                           "message": "stub error"
+                       }]}))
+            return
+
+        try:
+            request = json.loads(body) if body else {}
+        except ValueError:
+            request = {}
+        context = {
+            "base": self.server.baseUrl,
+            "groups": groups,
+            "request": request
+        }
+        if "body" in route:
+            data = json.dumps(route["body"])
+        else:
+            data = route.get("text", "")
+        data = renderTemplate(data, context)
+        headers = {
+            k: renderTemplate(v, context)
+            for k, v in route.get("headers", {}).items()
+        }
+        self._send(int(route.get("status", 200)), data, headers)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+    do_DELETE = _handle
+    do_PATCH = _handle
+    do_HEAD = _handle
+
+
+class StubSmtpHandler(socketserver.StreamRequestHandler):
+    '''
+    Accept mails without delivering them, enough for smtplib
+    '''
+
+    def _reply(self, line):
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def handle(self):
+        self._reply("220 " + stub_host + " w3rkstatt stub ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ")[0].upper()
+            if verb == "EHLO":
+                self._reply("250-" + stub_host)
+                self._reply("250-AUTH PLAIN LOGIN")
+                self._reply("250 8BITMIME")
+            elif verb == "HELO":
+                self._reply("250 " + stub_host)
+            elif verb == "AUTH":
+                if command.upper().startswith("AUTH LOGIN"):
+                    parts = command.split(" ")
+                    if len(parts) < 3:
+                        self._reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self._reply("235 2.7.0 Authentication successful")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    size += len(data)
+                if injectFault({}):
+                    self._reply("451 4.3.0 stub error")
+                else:
+                    self.server.messages += 1
+                    logger.info('STUB: SMTP message %s, %s bytes',
+                                self.server.messages, size)
+                    self._reply("250 2.0.0 Ok: queued")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 2.1.0 Ok")
+            elif verb == "QUIT":
+                self._reply("221 2.0.0 Bye")
+                return
+            else:
+                self._reply("502 5.5.2 Command not implemented")
+
+
+class StubSmtpServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    messages = 0
+
+
+def getStateFolder():
+    '''
+    Get a writable folder for generated files, the config folder,
+    ~/.w3rkstatt/configs or a new temp folder, never the current folder
+
+    :return: folder, fully qualified
+    :rtype: str
+    '''
+    if cfgFolder and os.path.isabs(cfgFolder) and os.path.isdir(cfgFolder):
+        return cfgFolder
+    folder = os.path.join(os.path.expanduser("~"), ".w3rkstatt", "configs")
+    try:
+        os.makedirs(folder, exist_ok=True)
+        if os.access(folder, os.W_OK):
+            return folder
+    except OSError:
+        pass
+    return tempfile.mkdtemp(prefix="w3rkstatt_stub_")
+
+
+def getSslContext():
+    '''
+    Get the TLS context of the https listener, create a self signed
+    certificate with openssl if none is configured
+
+    :return: ssl context
+    :rtype: ssl.SSLContext
+    '''
+    certFile = stub_certfile
+    keyFile = stub_keyfile
+    if not (certFile and keyFile):
+        stateFolder = getStateFolder()
+        certFile = os.path.join(stateFolder, "stub.cert.pem")
+        keyFile = os.path.join(stateFolder, "stub.key.pem")
+    if not (os.path.isfile(certFile) and os.path.isfile(keyFile)):
+        subprocess.run([
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-days", "365", "-subj", "/CN=" + stub_host, "-keyout", keyFile,
+            "-out", certFile
+        ],
+                       check=True,
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile=certFile, keyfile=keyFile)
+    return context
+
+
+def startStubServers(routes, record=False):
+    '''
+    Start the http, https and smtp listeners in background threads
+
+    :param StubRoutes routes: recorded responses
+    :param bool record: forward to upstreams and record
+    :return: servers
+    :rtype: list
+    '''
+    servers = []
+    httpServer = ThreadingHTTPServer((stub_bind, stub_http_port),
+                                     StubHttpHandler)
+    httpServer.baseUrl = "http://" + stub_host + ":" + str(stub_http_port)
+    servers.append(httpServer)
+
+    try:
+        httpsServer = ThreadingHTTPServer((stub_bind, stub_https_port),
+                                          StubHttpHandler)
+        httpsServer.socket = getSslContext().wrap_socket(httpsServer.socket,
+                                                         server_side=True)
+        httpsServer.baseUrl = "https://" + stub_host + ":" + str(
+            stub_https_port)
+        servers.append(httpsServer)
+    except (OSError, subprocess.SubprocessError, ssl.SSLError) as err:
+        logger.error('STUB: https listener unavailable: %s', err)
+
+    for server in servers:
+        server.routes = routes
+        server.recordMode = record
+        server.daemon_threads = True
+
+    smtpServer = StubSmtpServer((stub_bind, stub_smtp_port), StubSmtpHandler)
+    servers.append(smtpServer)
+
+    for server in servers:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        logger.info('STUB: Listening on: %s:%s', *server.server_address[:2])
+    return servers
+
+
+if __name__ == "__main__":
+    logging.basicConfig(filename=logFile,
+                        filemode='a',
+                        level=logging.DEBUG,
+                        format='%(asctime)s - %(levelname)s # %(message)s',
+                        datefmt='%d-%b-%y %H:%M:%S')
+    args = parser.parse_args()
+    if args.latency is not None:
+        stub_latency = args.latency
+    if args.jitter is not None:
+        stub_jitter = args.jitter
+    if args.errors is not None:
+        stub_error_rate = args.errors
+    if args.recordings:
+        stub_recordings = args.recordings
+
+    logger.info('STUB: Start stub server')
+    logger.info('Version: %s ', _modVer)
+    logger.info('STUB: Latency: %s ms, Jitter: %s ms, Error Rate: %s',
+                stub_latency, stub_jitter, stub_error_rate)
+
+    stubRoutes = StubRoutes(file=getRecordingsFile(stub_recordings))
+    stubServers = startStubServers(routes=stubRoutes, record=args.record)
+    print(f"Version: {_modVer}")
+    print(f"Stub Server: http:{stub_http_port} https:{stub_https_port} smtp:{stub_smtp_port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for server in stubServers:
+            server.shutdown()
+        logger.info('STUB: End stub server')
+        logging.shutdown()
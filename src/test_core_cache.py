@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# Filename: test_core_cache.py
+"""
+w3rkstatt core_cache tests
+
+Usage:
+    python -m pytest test_core_cache.py
+"""
+
+import core_cache as cache
+
+
+class _Clock(object):
+
+    def __init__(self):
+        self.now = 1000000.0
+
+    def time(self):
+        return self.now
+
+
+JOBS_CSV = """Folder,Job,Status
+DCO,job1,Ended OK
+DCO,job2,Ended Not OK
+FIN,job3,Ended OK
+FIN,job3,Ended OK
+"""
+
+
+def test_ttl_cache_loads_once(monkeypatch):
+    monkeypatch.setattr(cache, "time", _Clock())
+    folderCache = cache.TtlCache(name="test_folder", ttl=60, persist=False)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return {"jobs": 3}
+
+    assert folderCache.get(("IN01", "DCO"), load=load) == {"jobs": 3}
+    assert folderCache.get(("IN01", "DCO"), load=load) == {"jobs": 3}
+    assert len(loads) == 1
+
+
+def test_ttl_cache_expiry(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    folderCache = cache.TtlCache(name="test_folder", ttl=60, persist=False)
+    folderCache.put(("IN01", "DCO"), "v1")
+    clock.now += 59
+    assert folderCache.get(("IN01", "DCO")) == "v1"
+    clock.now += 2
+    assert folderCache.get(("IN01", "DCO")) is None
+    assert folderCache.get(("IN01", "DCO"), load=lambda: "v2") == "v2"
+
+
+def test_ttl_cache_drops_least_recently_used():
+    folderCache = cache.TtlCache(name="test_folder",
+                                 ttl=60,
+                                 size=2,
+                                 persist=False)
+    folderCache.put("a", 1)
+    folderCache.put("b", 2)
+    assert folderCache.get("a") == 1
+    folderCache.put("c", 3)
+    assert folderCache.get("b") is None
+    assert folderCache.get("a") == 1
+    assert folderCache.get("c") == 3
+
+
+def test_ttl_cache_none_is_not_cached():
+    folderCache = cache.TtlCache(name="test_folder", ttl=60, persist=False)
+    assert folderCache.get("a", load=lambda: None) is None
+    assert "a" not in folderCache.entries
+
+
+def test_ttl_cache_invalidate():
+    folderCache = cache.TtlCache(name="test_folder", ttl=60, persist=False)
+    folderCache.put("a", 1)
+    folderCache.put("b", 2)
+    folderCache.invalidate("a")
+    assert folderCache.get("a") is None
+    assert folderCache.get("b") == 2
+    folderCache.invalidate()
+    assert folderCache.get("b") is None
+
+
+def test_ttl_cache_persist_shared(monkeypatch, tmp_path):
+    monkeypatch.setattr(cache, "cache_folder", str(tmp_path))
+    first = cache.TtlCache(name="test_shared", ttl=60, persist=True)
+    first.put(("IN01", "DCO"), {"jobs": 3})
+    second = cache.TtlCache(name="test_shared", ttl=60, persist=True)
+    assert second.get(("IN01", "DCO")) == {"jobs": 3}
+    second.invalidate()
+    third = cache.TtlCache(name="test_shared", ttl=60, persist=True)
+    assert third.get(("IN01", "DCO")) is None
+
+
+def test_table_cache_query(tmp_path):
+    jobs = cache.TableCache(name="jobs",
+                            partition="Folder",
+                            folder=str(tmp_path))
+    status = jobs.store(data=JOBS_CSV, keepDuplicate="last")
+    assert status == {"written": 2, "unchanged": 0, "removed": 0}
+    assert jobs.getSchema()["rows"] == 3
+
+    df = jobs.query(filters={"Folder": "DCO", "Status": "Ended Not OK"})
+    assert df["Job"].tolist() == ["job2"]
+    df = jobs.query(columns=["Job"], filters={"Folder": ["DCO", "FIN"]})
+    assert list(df.columns) == ["Job"]
+    assert sorted(df["Job"].tolist()) == ["job1", "job2", "job3"]
+
+
+def test_table_cache_refresh_keeps_unchanged_partitions(tmp_path):
+    jobs = cache.TableCache(name="jobs",
+                            partition="Folder",
+                            folder=str(tmp_path))
+    jobs.store(data=JOBS_CSV, keepDuplicate="last")
+    status = jobs.store(data="Folder,Job,Status\nDCO,job1,Ended OK\n"
+                        "DCO,job2,Ended OK\n")
+    assert status == {"written": 1, "unchanged": 0, "removed": 1}
+    status = jobs.store(data="Folder,Job,Status\nDCO,job1,Ended OK\n"
+                        "DCO,job2,Ended OK\n")
+    assert status == {"written": 0, "unchanged": 1, "removed": 0}
+    assert jobs.query(filters={"Folder": "FIN"}).empty
+    assert len(list((tmp_path / "table.jobs").glob("part.*"))) == 1
+
+
+def test_table_cache_empty(tmp_path):
+    jobs = cache.TableCache(name="jobs", folder=str(tmp_path))
+    assert jobs.getSchema() == {}
+    assert jobs.query(columns=["Job"]).empty
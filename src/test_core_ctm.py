@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# Filename: test_core_ctm.py
+"""
+w3rkstatt core_ctm tests
+
+Usage:
+    python -m pytest test_core_ctm.py
+"""
+
+import core_ctm as ctm
+
+
+def test_classifier_first_rule_wins():
+    classifier = ctm.CtmMessageClassifier([{
+        "match": "AGENT PLATFORM"
+    }, {
+        "match": "STATUS OF AGENT"
+    }])
+    rule = classifier.classify("STATUS OF AGENT PLATFORM x")
+    assert rule["match"] == "AGENT PLATFORM"
+
+
+def test_classifier_overlapping_later_rule():
+    classifier = ctm.CtmMessageClassifier([{
+        "match": "PLATFORM ctmcore"
+    }, {
+        "match": "AGENT PLATFORM"
+    }])
+    rule = classifier.classify("STATUS OF AGENT PLATFORM ctmcore CHANGED")
+    assert rule["match"] == "PLATFORM ctmcore"
+
+
+def test_classifier_no_match():
+    classifier = ctm.CtmMessageClassifier([{"match": "DATA CENTER"}])
+    assert classifier.classify("Ended not OK") is None
+    assert ctm.CtmMessageClassifier([]).classify("Ended not OK") is None
+
+
+def test_classifier_regex_rule():
+    classifier = ctm.CtmMessageClassifier([{
+        "match": "Ended not OK"
+    }, {
+        "match": "Failed to order \\w+",
+        "regex": True
+    }])
+    rule = classifier.classify("Failed to order job1")
+    assert rule["regex"] is True
+
+
+class _ReportInfo(object):
+
+    def __init__(self, status):
+        self.report_id = "r1"
+        self.status = status
+        self.url = "https://ctm/reports/r1.csv"
+
+
+class _ReportRunner(ctm.CtmReportRunner):
+
+    def _submit(self, ctmReportName):
+        if ctmReportName == "Broken":
+            raise OSError("disk full")
+        return _ReportInfo("SUCCEEDED")
+
+
+def test_report_runner_failure_per_report(monkeypatch, tmp_path):
+    monkeypatch.setattr(ctm, "downloadCtmReport", lambda url, file: file)
+    runner = _ReportRunner(ctmApiClient=None,
+                           folder=str(tmp_path),
+                           cached=False)
+    reports = runner.run(["Jobs", "Broken", "Services"])
+    assert [report.name for report in reports] == [
+        "Jobs", "Broken", "Services"
+    ]
+    assert [report.status for report in reports] == [
+        "SUCCEEDED", "FAILED", "SUCCEEDED"
+    ]
+    assert reports[0].url == "https://ctm/reports/r1.csv"
+    assert reports[0].file.startswith(str(tmp_path))
+
+
+def test_output_capture_counts_bytes():
+    capture = ctm.CtmJobOutputCapture(headLines=10,
+                                      tailLines=10,
+                                      maxBytes=40)
+    # 10 characters, 20 bytes in utf-8
+    capture.feed("ääääääääää\n" * 3)
+    capture.close()
+    assert capture.size == 63
+    assert capture.headBytes + capture.tailBytes <= 40
+    assert capture.truncated
+
+
+def test_output_capture_clips_long_line_in_bytes():
+    capture = ctm.CtmJobOutputCapture(headLines=10,
+                                      tailLines=10,
+                                      maxBytes=20)
+    capture.feed("ä" * 20)
+    capture.close()
+    assert capture.clipped
+    assert len(capture.getText().encode("utf-8")) <= 10
+
+
+def test_output_capture_creates_spill_folder(tmp_path):
+    spillFile = str(tmp_path / "spill" / "ctm_output_1.log.gz")
+    capture = ctm.CtmJobOutputCapture(spillFile=spillFile)
+    capture.feed("line 1\nline 2\n")
+    capture.close()
+    assert capture.getInfo()["file"] == spillFile
+    assert (tmp_path / "spill" / "ctm_output_1.log.gz").is_file()
+
+
+def test_output_capture_without_writable_spill_folder(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a folder")
+    capture = ctm.CtmJobOutputCapture(
+        spillFile=str(blocker / "ctm_output_1.log.gz"))
+    capture.feed("line 1\n")
+    capture.close()
+    assert capture.file is None
+    assert capture.getText() == "line 1"
+
+
+class _BrokenStream(object):
+
+    def stream(self, size):
+        yield b"line 1\nline 2\n"
+        raise ctm.urllib3.exceptions.ProtocolError("connection reset")
+
+    def release_conn(self):
+        pass
+
+
+class _RunApi(object):
+
+    def get_job_output(self, job_id, run_no, _preload_content):
+        return _BrokenStream()
+
+
+class _CtmApi(object):
+    run = _RunApi()
+
+
+def test_capture_job_output_stream_error(monkeypatch):
+    monkeypatch.setattr(ctm, "getCtmApi", lambda ctmApiClient: _CtmApi())
+    capture = ctm.captureCtmJobOutput(ctmApiClient=None,
+                                      ctmJobID="abc:0001",
+                                      ctmJobRunId=1)
+    assert capture.truncated
+    assert capture.getInfo()["interrupted"] is True
+    assert capture.getText().startswith("line 1\nline 2")
+
+
+JOB_LOG = "\n".join([
+    "Event Time\tEvent Date\tMessage\tCode",
+    "12:48:07 2-Apr-2021  ORDERED JOB:24; DAILY FORCED, ODATE 20210402   \t5065",
+    "12:48:08 2-Apr-2021  JOB SUBMITTED TO AGENT\t5105",
+    "",
+    "12:48:11 2-Apr-2021  ENDED AT 20210402124811. OSCOMPSTAT 1. RUNCNT 1\t5100",
+    "12:50:00 2-Apr-2021  ENDED AT 20210402125000. OSCOMPSTAT 0. RUNCNT 2\t5100",
+])
+
+
+def test_job_log_entries():
+    entries = list(ctm.iterCtmJobLog(ctm.iterCtmJobLogLines(JOB_LOG)))
+    assert [entry["code"] for entry in entries] == [
+        "5065", "5105", "5100", "5100"
+    ]
+    assert entries[0] == {
+        "time": "12:48:07",
+        "date": "2-Apr-2021",
+        "message": "ORDERED JOB:24; DAILY FORCED, ODATE 20210402",
+        "code": "5065",
+        "odate": "20210402"
+    }
+    assert entries[2]["oscompstat"] == "1"
+    assert entries[2]["run_count"] == "1"
+    assert entries[2]["ended"] == "2021-04-02 12:48:11"
+    assert "odate" not in entries[1]
+
+
+def test_job_log_stops_after_run():
+    entries = list(
+        ctm.iterCtmJobLog(ctm.iterCtmJobLogLines(JOB_LOG), runCounter="1"))
+    assert len(entries) == 3
+    assert entries[-1]["run_count"] == "1"
+
+
+def test_job_log_escaped():
+    escaped = JOB_LOG.replace("\t", "\\t").replace("\n", "\\n")
+    entries = ctm.iterCtmJobLog(ctm.iterCtmJobLogLines(escaped,
+                                                       separator="\\n"),
+                                escaped=True)
+    assert list(entries) == list(
+        ctm.iterCtmJobLog(ctm.iterCtmJobLogLines(JOB_LOG)))
+
+
+def test_job_log_from_file_lines(tmp_path):
+    logFile = tmp_path / "job.log"
+    logFile.write_text(JOB_LOG + "\n")
+    with open(str(logFile), "r") as f:
+        entries = list(ctm.iterCtmJobLog(f))
+    assert len(entries) == 4
+    assert entries[-1]["run_count"] == "2"
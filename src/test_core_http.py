@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# Filename: test_core_http.py
+"""
+w3rkstatt core_http tests
+
+Usage:
+    python -m pytest test_core_http.py
+"""
+
+import time
+import asyncio
+import threading
+
+import core_http as http
+
+
+def _answer(value, wait=0.0, started=None):
+
+    def call():
+        if started is not None:
+            started.append(time.monotonic())
+        time.sleep(wait)
+        return value
+
+    return call
+
+
+def _fail(wait=0.0):
+
+    def call():
+        time.sleep(wait)
+        raise OSError("source down")
+
+    return call
+
+
+def test_hedge_first_valid_answer_wins():
+    result = http.hedge([_answer("live", wait=0.3),
+                         _answer("archive", wait=0.0)],
+                        delay=0.05)
+    assert result == "archive"
+
+
+def test_hedge_invalid_answer_waits_for_next_source():
+    result = http.hedge([_answer({"status": False}),
+                         _answer({"status": True}, wait=0.1)],
+                        valid=lambda data: data["status"] is True,
+                        delay=0.0)
+    assert result == {"status": True}
+
+
+def test_hedge_delayed_start():
+    started = []
+    begin = time.monotonic()
+    result = http.hedge([_answer("live", wait=0.05, started=started),
+                         _answer("archive", started=started)],
+                        delay=0.5)
+    assert result == "live"
+    # The archive source was never needed
+    assert len(started) == 1
+    assert started[0] - begin < 0.2
+
+
+def test_hedge_next_source_at_once_after_failure():
+    started = []
+    begin = time.monotonic()
+    result = http.hedge([_fail(), _answer("archive", started=started)],
+                        delay=5.0)
+    assert result == "archive"
+    assert started[0] - begin < 1.0
+
+
+def test_hedge_all_failed():
+    assert http.hedge([_fail(), _fail()], delay=0.0) is None
+
+
+def test_hedge_timeout():
+    begin = time.monotonic()
+    result = http.hedge([_answer("live", wait=2.0)], timeout=0.2)
+    assert result is None
+    assert time.monotonic() - begin < 1.0
+
+
+def test_hedge_timeout_returns_invalid_answer():
+    result = http.hedge([_answer("partial"), _answer("full", wait=2.0)],
+                        valid=lambda data: data == "full",
+                        delay=0.0,
+                        timeout=0.2)
+    assert result == "partial"
+
+
+def test_hedge_discard_loser():
+    discarded = []
+    finished = threading.Event()
+
+    def discard(data):
+        discarded.append(data)
+        finished.set()
+
+    result = http.hedge([_answer("live", wait=0.2),
+                         _answer("archive")],
+                        delay=0.0,
+                        discard=discard)
+    assert result == "archive"
+    assert finished.wait(2.0)
+    assert discarded == ["live"]
+
+
+def test_run_async():
+    loop = asyncio.new_event_loop()
+    try:
+        result = loop.run_until_complete(
+            http.runAsync(lambda value: value * 2, 21, limit="test"))
+    finally:
+        loop.close()
+    assert result == 42
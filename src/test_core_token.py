@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# Filename: test_core_token.py
+"""
+w3rkstatt core_token tests
+
+Usage:
+    python -m pytest test_core_token.py
+"""
+
+import json
+import base64
+
+import core_http as http
+import core_token as token
+
+
+class _Clock(object):
+
+    def __init__(self):
+        self.now = 1000000.0
+
+    def time(self):
+        return self.now
+
+
+class _Backend(object):
+
+    def __init__(self, logins=None):
+        self.logins = 0
+        self.logouts = []
+        self.tokens = logins
+
+    def login(self):
+        self.logins += 1
+        if self.tokens is not None:
+            return self.tokens.pop(0)
+        return "token-" + str(self.logins)
+
+    def logout(self, authToken):
+        self.logouts.append(authToken)
+
+
+def _getJwt(expires):
+    claims = json.dumps({"exp": expires}).encode("utf-8")
+    payload = base64.urlsafe_b64encode(claims).decode("ascii").rstrip("=")
+    return "header." + payload + ".signature"
+
+
+def test_token_cached_until_expiry(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(token, "time", clock)
+    backend = _Backend()
+    tokens = token.TokenCache(name="test",
+                              login=backend.login,
+                              logout=backend.logout,
+                              ttl=3600,
+                              persist=False)
+    assert tokens.getToken() == "token-1"
+    clock.now += 3600 - token.token_margin - 1
+    assert tokens.getToken() == "token-1"
+    assert backend.logins == 1
+
+    # Renewed within the refresh margin, the old session is ended
+    clock.now += 2
+    assert tokens.getToken() == "token-2"
+    assert backend.logins == 2
+    assert backend.logouts == ["token-1"]
+
+
+def test_token_jwt_expiry(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(token, "time", clock)
+    jwt = _getJwt(clock.now + 900)
+    backend = _Backend(logins=[jwt, "token-2"])
+    tokens = token.TokenCache(name="test",
+                              login=backend.login,
+                              ttl=3600,
+                              persist=False)
+    assert tokens.getToken() == jwt
+    assert tokens.expires == clock.now + 900
+    clock.now += 900 - token.token_margin + 1
+    assert tokens.getToken() == "token-2"
+
+
+def test_token_call_retries_on_401():
+    backend = _Backend()
+    tokens = token.TokenCache(name="test",
+                              login=backend.login,
+                              logout=backend.logout,
+                              persist=False)
+    calls = []
+
+    def getChange(change, token):
+        calls.append(token)
+        http._lastResponse.status = 401 if len(calls) == 1 else 200
+        return {"change": change, "token": token}
+
+    result = tokens.call(getChange, change="CRQ000000000001")
+    assert result == {"change": "CRQ000000000001", "token": "token-2"}
+    assert calls == ["token-1", "token-2"]
+    assert backend.logouts == ["token-1"]
+
+
+def test_token_call_without_401_keeps_token():
+    backend = _Backend()
+    tokens = token.TokenCache(name="test", login=backend.login, persist=False)
+
+    def getChange(change, token):
+        http._lastResponse.status = 200
+        return token
+
+    assert tokens.call(getChange, change="CRQ1") == "token-1"
+    assert tokens.call(getChange, change="CRQ2") == "token-1"
+    assert backend.logins == 1
+
+
+def test_token_call_login_failed():
+    backend = _Backend(logins=["token-1", None])
+    tokens = token.TokenCache(name="test", login=backend.login, persist=False)
+
+    def getChange(change, token):
+        http._lastResponse.status = 401
+        return token
+
+    assert tokens.call(getChange, change="CRQ1") is None
+    assert token.TokenCache(name="test", login=lambda: None,
+                            persist=False).call(getChange,
+                                                change="CRQ1") is None
+
+
+def test_token_close_ends_session():
+    backend = _Backend()
+    tokens = token.TokenCache(name="test",
+                              login=backend.login,
+                              logout=backend.logout,
+                              persist=False)
+    tokens.getToken()
+    tokens.close()
+    assert backend.logouts == ["token-1"]
+    tokens.close()
+    assert backend.logouts == ["token-1"]
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# Filename: test_disco_ctm.py
+"""
+w3rkstatt disco_ctm tests
+
+Usage:
+    python -m pytest test_disco_ctm.py
+"""
+
+import json
+import threading
+
+import pytest
+import pandas as pd
+
+import disco_ctm as disco
+
+
+def test_fan_out_keeps_order():
+    fanOut = disco.DiscoFanOut(workers=4, serverLimit=2)
+    try:
+        results = fanOut.map(func=lambda item: item * 2,
+                             items=range(20),
+                             server=lambda item: item % 3)
+    finally:
+        fanOut.close()
+    assert results == [item * 2 for item in range(20)]
+
+
+def test_fan_out_nested_map_runs_inline():
+    fanOut = disco.DiscoFanOut(workers=2, serverLimit=2)
+    threads = set()
+
+    def inner(item):
+        threads.add(threading.current_thread().name)
+        return item
+
+    def outer(item):
+        return fanOut.map(func=inner, items=[item, item + 1])
+
+    try:
+        results = fanOut.map(func=outer, items=[0, 10, 20, 30])
+    finally:
+        fanOut.close()
+    assert results == [[0, 1], [10, 11], [20, 21], [30, 31]]
+    assert all(name.startswith("disco") for name in threads)
+
+
+def test_fan_out_error_propagates():
+
+    def fail(item):
+        if item == 3:
+            raise ValueError("agent down")
+        return item
+
+    fanOut = disco.DiscoFanOut(workers=4, serverLimit=4)
+    try:
+        with pytest.raises(ValueError):
+            fanOut.map(func=fail, items=range(6))
+    finally:
+        fanOut.close()
+    assert fanOut.executor is None
+
+
+class _CtmConnection(object):
+    api_client = None
+
+
+def test_disco_closes_workers_after_error(monkeypatch, tmp_path):
+
+    def fail(ctmApiClient):
+        raise OSError("connection reset")
+
+    monkeypatch.setattr(disco, "data_folder", str(tmp_path))
+    monkeypatch.setattr(disco.ctm, "getCtmConnection", _CtmConnection)
+    monkeypatch.setattr(disco.ctm, "delCtmConnection", lambda obj: None)
+    monkeypatch.setattr(disco, "getCtmServers", fail)
+    disco.discoFanOut._getExecutor()
+    with pytest.raises(OSError):
+        disco.discoCtm(incremental=False)
+    assert disco.discoFanOut.executor is None
+    assert disco.jsonBatch is None
+
+
+HOST_GROUPS = {
+    "groups": [{
+        "group": "hg_linux",
+        "agent": "ag02.local"
+    }, {
+        "group": "hg_linux",
+        "agent": "ag01.local"
+    }, {
+        "group": "hg_all",
+        "agent": "ag01.local"
+    }, {
+        "group": "hg_all",
+        "agent": "ag03.local"
+    }]
+}
+REMOTE_HOSTS = {
+    "remote": [{
+        "host": "remote1.local",
+        "agent": "ag01.local"
+    }, {
+        "host": "remote2.local",
+        "agent": "ag03.local"
+    }, {
+        "host": "remote3.local",
+        "agent": "ag01.local"
+    }]
+}
+
+
+def _getPandasMembership(records, recordPath, key, name, ctmAgent):
+    # Former pandas groupby of getAgentHostGroupsMembership and
+    # getAgentRemoteHosts, reference for the dict indexes
+    df = pd.json_normalize(records, record_path=[recordPath])
+    if ctmAgent != "*":
+        df = df.loc[df['agent'] == ctmAgent]
+    df = df.groupby('agent')[key].apply(list).reset_index(name=name)
+    return json.loads(df.to_json(orient='records'))
+
+
+def test_agent_indexes():
+    assert disco.getAgentHostGroupsIndex(HOST_GROUPS) == {
+        "ag02.local": ["hg_linux"],
+        "ag01.local": ["hg_linux", "hg_all"],
+        "ag03.local": ["hg_all"]
+    }
+    assert disco.getAgentRemoteHostsIndex(REMOTE_HOSTS) == {
+        "ag01.local": ["remote1.local", "remote3.local"],
+        "ag03.local": ["remote2.local"]
+    }
+    assert disco.getAgentHostGroupsIndex({}) == {}
+
+
+@pytest.mark.parametrize("ctmAgent",
+                         ["*", "ag01.local", "ag02.local", "ag09.local"])
+def test_agent_host_groups_match_pandas(ctmAgent):
+    jCtmAgents = disco.getAgentHostGroupsMembership(HOST_GROUPS,
+                                                    ctmAgent=ctmAgent)
+    assert json.loads(jCtmAgents) == _getPandasMembership(
+        HOST_GROUPS, "groups", "group", "groups", ctmAgent)
+
+
+@pytest.mark.parametrize("ctmAgent",
+                         ["*", "ag01.local", "ag03.local", "ag02.local"])
+def test_agent_remote_hosts_match_pandas(ctmAgent):
+    name = "host" if ctmAgent == "*" else "hosts"
+    jCtmAgents = disco.getAgentRemoteHosts(REMOTE_HOSTS, ctmAgent=ctmAgent)
+    assert json.loads(jCtmAgents) == _getPandasMembership(
+        REMOTE_HOSTS, "remote", "host", name, ctmAgent)
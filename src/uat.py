@@ -27,6 +27,8 @@ Date (YMD)    Name                  What
 20210521      Volker Scheithauer    Consolidate test cases
 20210527      Volker Scheithauer    Update UAT
 20220715      Volker Scheithauer    Update UAT
+20261019      Rafael Ulhoa          Run against the stub server
+20261019      Rafael Ulhoa          Bulk job status for comma separated order IDs
 
 """
 
@@ -71,6 +73,9 @@ cryptoFile = w3rkstatt.getJsonValue(path="$.DEFAULT.crypto_file",
                                     data=jCfgData)
 smtp_ssl = w3rkstatt.getJsonValue(path="$.MAIL.ssl", data=jCfgData)
 
+# Run against stub_server.py instead of the live backends
+stubStatus = w3rkstatt.getJsonValue(path="$.STUB.enabled", data=jCfgData)
+
 logger = w3rkstatt.logging.getLogger(__name__)
 logFile = w3rkstatt.getJsonValue(path="$.DEFAULT.log_file", data=jCfgData)
 loglevel = w3rkstatt.getJsonValue(path="$.DEFAULT.loglevel", data=jCfgData)
@@ -447,13 +452,22 @@ def demoCTM():
                                                     data=jCfgData)
             ctm_job_srv = w3rkstatt.getJsonValue(path="$.CTM.jobs.server",
                                                  data=jCfgData)
-            ctm_job_runid = ctm_job_srv + ":" + ctm_job_oderid
-
-            ctmJobInfo = ctm.getCtmJobInfo(ctmApiClient=ctmApiClient,
-                                           ctmServer=ctm_job_srv,
-                                           ctmOrderID=ctm_job_oderid)
-            # ctmJobStatusAdv = getCtmJobStatusAdv(ctmApiClient=ctmApiClient,ctmServer=ctm_job_srv,ctmOrderID=ctm_job_oderid)
-            logger.info('CTM Job: %s', ctmJobInfo)
+            # One or more comma separated order IDs, one status query
+            ctmJobBatch = ctm.CtmJobStatusBatch()
+            ctm_job_oderids = [
+                oderid.strip() for oderid in ctm_job_oderid.split(",")
+            ]
+            for oderid in ctm_job_oderids:
+                ctmJobBatch.add(ctmServer=ctm_job_srv, ctmOrderID=oderid)
+            ctmJobStatuses = ctmJobBatch.fetch(ctmApiClient=ctmApiClient)
+
+            for oderid in ctm_job_oderids:
+                ctmJobInfo = ctm.getCtmJobInfo(ctmApiClient=ctmApiClient,
+                                               ctmServer=ctm_job_srv,
+                                               ctmOrderID=oderid,
+                                               jobStatuses=ctmJobStatuses)
+                # ctmJobStatusAdv = getCtmJobStatusAdv(ctmApiClient=ctmApiClient,ctmServer=ctm_job_srv,ctmOrderID=ctm_job_oderid)
+                logger.info('CTM Job: %s', ctmJobInfo)
 
 
 # Demo Helix ITSM
@@ -626,6 +640,7 @@ if __name__ == "__main__":
     logger.info('CTM Url: %s', ctm.ctm_url)
     logger.info('CTM User: %s', ctm.ctm_user)
     logger.info('Epoch: %s', epoch)
+    logger.info('Stub Server: %s', stubStatus)
 
     demoStatusCTM = w3rkstatt.getJsonValue(path="$.CTM.demo", data=jCfgData)
     demoStatusITSM = w3rkstatt.getJsonValue(path="$.ITSM.demo", data=jCfgData)
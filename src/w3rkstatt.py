@@ -29,6 +29,9 @@ Date (YMD)    Name                  What
 20220715      Volker Scheithauer    Add API Key Encryption
 20230522      Volker Scheithauer    Update API key issues
 20240315      Rafael Ulhoa          Updated dTranslate4Json to handle attributes that have quotes in them when converting to json
+20261019      Rafael Ulhoa          Atomic, compact and batched json file writer
+20261019      Rafael Ulhoa          Redirect connectors to the stub server
+20261019      Rafael Ulhoa          Project config file name helper
 
 """
 
@@ -406,12 +409,74 @@ def readHtmlFile(file):
     return lines
 
 
-def writeJsonFile(file, content):
+def encodeJson(content, compact=False):
     '''
-    Write file content
+    Serialize content to a json string
+
+    :param str content: json content
+    :param bool compact: skip indentation and whitespace
+    :return: json string
+    :rtype: str
+    :raises ValueError: N/A
+    :raises TypeError: N/A    
+    '''
+    if compact:
+        return json.dumps(content, ensure_ascii=False, separators=(',', ':'))
+    return json.dumps(content, ensure_ascii=False, indent=4)
+
+
+def syncFolder(path):
+    '''
+    Flush folder metadata to disk, e.g. after a rename
+
+    :param str path: a given folder, fully qualified
+    :return: status
+    :rtype: boolean
+    :raises ValueError: N/A
+    :raises TypeError: N/A    
+    '''
+    status = True
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        # Windows does not support folder handles
+        status = False
+    return status
+
+
+def _writeTempJsonFile(file, data, durability):
+    # Write next to the target file, the rename has to stay on the same file system
+    tmpFile = file + "." + str(os.getpid()) + "." + uuid.uuid4().hex[:8] + ".tmp"
+    try:
+        with open(tmpFile, 'x', encoding='utf-8') as f:
+            f.write(data)
+            if durability != "none":
+                f.flush()
+                os.fsync(f.fileno())
+    except (OSError, ValueError):
+        if os.path.isfile(tmpFile):
+            os.remove(tmpFile)
+        raise
+    return tmpFile
+
+
+def writeJsonFile(file, content, compact=False, durability="none"):
+    '''
+    Write file content, readers never see a partial file
+
+    Durability levels:
+     - none: leave flushing to the operating system
+     - file: fsync the file before it replaces the target
+     - dir:  fsync the file and the folder after the replace
 
     :param str file: a given file name, fully qualified
     :param str content: file content
+    :param bool compact: skip indentation and whitespace
+    :param str durability: none, file, dir
     :return: status
     :rtype: boolean
     :raises ValueError: N/A
@@ -419,15 +484,114 @@ def writeJsonFile(file, content):
     '''
     status = True
     try:
-        with open(file, 'w', encoding='utf-8') as f:
-            json.dump(content, f, ensure_ascii=False, indent=4)
+        data = encodeJson(content, compact=compact)
+        tmpFile = _writeTempJsonFile(file, data, durability)
+        os.replace(tmpFile, file)
+        if durability == "dir":
+            syncFolder(os.path.dirname(os.path.abspath(file)))
     except ValueError as error:
         status = False
         logger.error('Script: Invalid json: %s', error)
+    except OSError as error:
+        status = False
+        logger.error('Script: Write file "%s" failed: %s', file, error)
 
     return status
 
 
+class JsonFileBatch(object):
+    '''
+    Collect json files and write them in one flush cycle
+
+    Files are staged as temp files and only replace their targets on flush,
+    folder metadata is synced once per folder instead of once per file.
+
+    with w3rkstatt.JsonFileBatch(compact=True, durability="dir") as batch:
+        batch.add(file="/tmp/a.json", content=data)
+    '''
+
+    def __init__(self, compact=False, durability="none", size=0):
+        '''
+        :param bool compact: skip indentation and whitespace
+        :param str durability: none, file, dir
+        :param int size: flush automatically after this many files, 0 = on exit only
+        '''
+        self.compact = compact
+        self.durability = durability
+        self.size = size
+        self.pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+        return False
+
+    def add(self, file, content):
+        '''
+        Stage file content, the last content per file wins
+
+        :param str file: a given file name, fully qualified
+        :param str content: file content
+        :return: status
+        :rtype: boolean
+        '''
+        try:
+            data = encodeJson(content, compact=self.compact)
+        except ValueError as error:
+            logger.error('Script: Invalid json: %s', error)
+            return False
+        self.pending[file] = data
+        if self.size > 0 and len(self.pending) >= self.size:
+            return self.flush()
+        return True
+
+    def flush(self):
+        '''
+        Write all staged files
+
+        :return: status
+        :rtype: boolean
+        '''
+        status = True
+        staged = []
+        pending = self.pending
+        self.pending = {}
+        for file, data in pending.items():
+            try:
+                staged.append(
+                    (_writeTempJsonFile(file, data, self.durability), file))
+            except OSError as error:
+                status = False
+                logger.error('Script: Write file "%s" failed: %s', file, error)
+
+        folders = set()
+        for tmpFile, file in staged:
+            try:
+                os.replace(tmpFile, file)
+                folders.add(os.path.dirname(os.path.abspath(file)))
+            except OSError as error:
+                status = False
+                logger.error('Script: Write file "%s" failed: %s', file, error)
+                if os.path.isfile(tmpFile):
+                    os.remove(tmpFile)
+
+        if self.durability == "dir":
+            for folder in folders:
+                syncFolder(folder)
+        return status
+
+    def discard(self):
+        '''
+        Drop all staged files
+        '''
+        self.pending = {}
+
+
 def getJsonValue(path, data):
     '''
     Extract data from json content using jsonPath
@@ -1408,25 +1572,74 @@ def getProjectDefaultConfig(file):
     return sLocalCfgFileContent
 
 
-def getProjectConfig():
+def applyStubConfig(data):
     '''
-    Get Project Config 
+    Point all connectors at the local stub server, see stub_server.py
 
-    :param:
+    :param dict data: project config
     :return: project config
     :rtype: dict
     :raises ValueError: N/A
-    :raises TypeError: N/A    
+    :raises TypeError: N/A
     '''
 
+    jStub = data.get("STUB", {})
+    sHost = jStub.get("host", "localhost")
+    sHttpPort = str(jStub.get("http_port", 18080))
+    sHttpsPort = str(jStub.get("https_port", 18443))
+    sSmtpPort = str(jStub.get("smtp_port", 18025))
+
+    # Host only, the connectors build https urls without port
+    for section in ["BHOM", "TSIM", "TSPS"]:
+        if section in data:
+            data[section]["host"] = sHost + ":" + sHttpsPort
+    if "CTM" in data:
+        data["CTM"]["host"] = sHost
+        data["CTM"]["port"] = sHttpsPort
+        data["CTM"]["ssl"] = True
+        data["CTM"]["ssl_verification"] = False
+    for section in ["ITSM", "TSO", "SNOW"]:
+        if section in data:
+            data[section]["host"] = sHost
+            data[section]["port"] = sHttpPort
+            data[section]["ssl"] = False
+    if "MAIL" in data:
+        data["MAIL"]["host"] = sHost
+        data["MAIL"]["port"] = sSmtpPort
+        data["MAIL"]["ssl"] = False
+    return data
+
+
+def getProjectConfigFileName():
+    '''
+    Get Project Config file name of this host
+
+    :param:
+    :return: file name, fully qualified
+    :rtype: str
+    :raises ValueError: N/A
+    :raises TypeError: N/A    
+    '''
     sHomeFolder = getHomeFolder()
     coreProjectFolder = os.path.join(sHomeFolder, ".w3rkstatt")
     coreProjecConfigFolder = os.path.join(coreProjectFolder, "configs")
+    sConfigFileName = sHostname + ".json"
+    return os.path.join(coreProjecConfigFolder, sConfigFileName)
+
+
+def getProjectConfig():
+    '''
+    Get Project Config 
+
+    :param:
+    :return: project config
+    :rtype: dict
+    :raises ValueError: N/A
+    :raises TypeError: N/A    
+    '''
 
     # Get Custom Config File & Content
-    sConfigFileName = sHostname + ".json"
-    sProjectConfigFileName = os.path.join(coreProjecConfigFolder,
-                                          sConfigFileName)
+    sProjectConfigFileName = getProjectConfigFileName()
     sCfgFilesConfigFileStatus = getFileStatus(sProjectConfigFileName)
 
     if sCfgFilesConfigFileStatus:
@@ -1434,6 +1647,9 @@ def getProjectConfig():
     else:
         sCfgFileContent = {}
 
+    if sCfgFileContent.get("STUB", {}).get("enabled") is True:
+        sCfgFileContent = applyStubConfig(data=sCfgFileContent)
+
     return sCfgFileContent
 
 